@@ -0,0 +1,51 @@
+"""Per-request cost of token authentication, with and without the token cache.
+
+    python -m benchmarks.bench_auth --requests 5000
+
+Authenticates the same token repeatedly through DRF's TokenAuthentication and
+core.authentication.CachedTokenAuthentication and reports time and queries
+per request.
+"""
+import argparse
+
+from benchmarks.common import setup_django, test_database, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=1000, help="Users seeded so the token table is not trivial.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIRequestFactory
+
+    from benchmarks import datagen
+    from core.authentication import CachedTokenAuthentication, token_cache
+    from core.models import User
+
+    with test_database():
+        datagen.seed(args.users // 2, args.users - args.users // 2)
+        Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in User.objects.all()])
+        key = Token.objects.order_by('?').first().key
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Token {key}')
+        token_cache.clear()
+
+        print(f"{'backend':<28} {'us/request':>10} {'queries/request':>16}")
+        for backend in (TokenAuthentication(), CachedTokenAuthentication()):
+            def run():
+                for _ in range(args.requests):
+                    backend.authenticate(request)
+
+            with CaptureQueriesContext(connection) as queries:
+                elapsed, _ = timed(run)
+            print(f"{type(backend).__name__:<28} {elapsed / args.requests * 1e6:>10.1f} "
+                  f"{len(queries) / args.requests:>16.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Concurrent session booking against an on-disk database.
+
+    python -m benchmarks.bench_booking --threads 16 --attempts 100 --tutors 20
+
+Students in several threads, each with its own connection, try to book
+random one-hour sessions with a few tutors through core.bookings.book, so
+many attempts collide. Reports throughput, latency and outcomes, then checks
+that no two confirmed bookings of one tutor or one student overlap. Run it
+with DB_ENGINE=postgresql too: SQLite serializes every writer, so only
+PostgreSQL exercises the per-tutor and per-student row locks.
+
+Runs in a throwaway test database. On SQLite that is a file in a temporary
+directory (DB_TEST_NAME), since threads cannot share an in-memory one; with
+many threads, raise DB_BUSY_TIMEOUT so that a writer starved
+of the lock for longer than the default 5 s is not counted as a failure.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from benchmarks.common import setup_django, test_database
+
+OVERLAPS = """
+    SELECT count(*) FROM core_booking a JOIN core_booking b
+      ON a.id < b.id AND a.status = 'confirmed' AND b.status = 'confirmed'
+     AND (a.tutor_id = b.tutor_id OR a.student_id = b.student_id)
+     AND a.start < b."end" AND b.start < a."end"
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--attempts', type=int, default=100, help="Booking attempts per thread.")
+    parser.add_argument('--tutors', type=int, default=20)
+    parser.add_argument('--days', type=int, default=7, help="Days ahead that sessions are spread over.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.setdefault('DB_TEST_NAME', os.path.join(directory, 'bench.sqlite3'))
+        setup_django()
+        from django.db import connection, connections
+        from django.utils import timezone
+
+        from benchmarks import datagen
+        from core.bookings import BookingConflict, book, set_availability
+        from core.matching import DAYS
+        from core.models import StudentProfile, TutorProfile
+
+        with test_database():
+            datagen.seed(args.threads, args.tutors, seed=args.seed)
+            tutors = list(TutorProfile.objects.order_by('-id')[:args.tutors])
+            students = list(StudentProfile.objects.order_by('-id')[:args.threads])
+            for tutor in tutors:
+                set_availability(tutor, [{'day': day, 'start': '08:00', 'end': '20:00'} for day in DAYS])
+            first_day = timezone.make_aware(
+                timezone.datetime.combine(timezone.localdate() + timedelta(days=1), timezone.datetime.min.time())
+            )
+            connections.close_all()
+
+            outcomes, latencies = {}, []
+            lock = threading.Lock()
+            barrier = threading.Barrier(args.threads)
+
+            def attempt(worker):
+                rng = random.Random(args.seed * 1000 + worker)
+                student = students[worker]
+                barrier.wait()
+                for _ in range(args.attempts):
+                    start = first_day + timedelta(days=rng.randrange(args.days), hours=8 + rng.randrange(22) / 2)
+                    started = time.perf_counter()
+                    try:
+                        book(student, rng.choice(tutors), start, start + timedelta(hours=1))
+                        outcome = 'booked'
+                    except BookingConflict:
+                        outcome = 'conflict'
+                    except Exception as exc:
+                        outcome = type(exc).__name__
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                        latencies.append(elapsed)
+                connections.close_all()
+
+            workers = [threading.Thread(target=attempt, args=(worker,)) for worker in range(args.threads)]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+
+            with connection.cursor() as cursor:
+                cursor.execute(OVERLAPS)
+                overlaps = cursor.fetchone()[0]
+
+    latencies.sort()
+    total = sum(outcomes.values())
+    print(f"{args.threads} threads x {args.attempts} attempts, {args.tutors} tutors, {connection.vendor}")
+    print(f"{total / elapsed:.0f} attempts/s, p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f} ms")
+    print(', '.join(f'{name}: {count}' for name, count in sorted(outcomes.items())))
+    print(f"overlapping confirmed bookings: {overlaps}")
+    if overlaps:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Throughput of the vectorized matcher on synthetic profiles.
+
+    python -m benchmarks.bench_matcher --students 10000 --tutors 100000
+
+No database is touched: profiles are generated directly as the arrays that
+``core.batch_matching.load_profiles`` would produce.
+"""
+import argparse
+import time
+
+from benchmarks.common import setup_django
+
+
+def synthetic_profiles(np, students, tutors, subjects, locations, seed):
+    from core.batch_matching import StudentArrays, TutorArrays
+
+    rng = np.random.default_rng(seed)
+    words = (subjects + 63) // 64
+
+    def bitsets(count, per_profile):
+        bits = np.zeros((count, words), dtype=np.uint64)
+        picks = rng.integers(0, subjects, size=(count, per_profile))
+        rows = np.repeat(np.arange(count), per_profile)
+        values = np.left_shift(np.uint64(1), (picks.ravel() % 64).astype(np.uint64))
+        np.bitwise_or.at(bits, (rows, picks.ravel() // 64), values)
+        return bits
+
+    return (
+        StudentArrays(
+            ids=np.arange(1, students + 1),
+            location_codes=rng.integers(0, locations, size=students),
+            subject_bits=bitsets(students, 3),
+        ),
+        TutorArrays(
+            ids=np.arange(1, tutors + 1),
+            location_codes=rng.integers(0, locations, size=tutors),
+            subject_bits=bitsets(tutors, 3),
+            day_counts=rng.integers(0, 8, size=tutors),
+            rates=rng.uniform(100, 2000, size=tutors).round(2),
+        ),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=10_000)
+    parser.add_argument('--tutors', type=int, default=100_000)
+    parser.add_argument('--subjects', type=int, default=200)
+    parser.add_argument('--locations', type=int, default=500)
+    parser.add_argument('--top-k', type=int, default=100)
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    import numpy as np
+    from core.batch_matching import top_k_matches
+
+    students, tutors = synthetic_profiles(np, args.students, args.tutors, args.subjects, args.locations, args.seed)
+    started = time.perf_counter()
+    matches = 0
+    for _, _, scores in top_k_matches(students, tutors, args.top_k, args.chunk_size):
+        matches += int((scores > 0).sum())
+    elapsed = time.perf_counter() - started
+
+    pairs = args.students * args.tutors
+    print(f"students={args.students} tutors={args.tutors} subjects={args.subjects} "
+          f"top_k={args.top_k} chunk_size={args.chunk_size}")
+    print(f"scored {pairs:,} pairs in {elapsed:.2f}s -> {pairs / elapsed:,.0f} pairs/s, "
+          f"{args.students / elapsed:,.0f} students/s, {matches:,} matches kept")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Radius search over geocoded tutors: geohash-indexed query versus a full scan.
+
+    python -m benchmarks.bench_nearby --tutors 100000 --radius 10
+
+Seeds tutors, scatters them up to --spread km around the gazetteer places so
+they do not all share a handful of points, then times core.geo.within_radius
+against computing the exact distance for every tutor. Both must return the
+same tutors.
+"""
+import argparse
+import math
+import random
+
+from benchmarks.common import setup_django, test_database, timed
+
+
+def scatter(spread_km, seed, chunk_size=5000):
+    """Move every tutor to a random point near its geocoded place."""
+    from core.geo import KM_PER_DEGREE, encode_geohash
+    from core.models import TutorProfile
+
+    rng = random.Random(seed)
+    last_pk = 0
+    while chunk := list(TutorProfile.objects.filter(pk__gt=last_pk).order_by('pk')
+                        .only('latitude', 'longitude', 'geohash')[:chunk_size]):
+        last_pk = chunk[-1].pk
+        for tutor in chunk:
+            distance, bearing = spread_km * math.sqrt(rng.random()), rng.uniform(0, 2 * math.pi)
+            tutor.latitude += distance * math.cos(bearing) / KM_PER_DEGREE
+            tutor.longitude += distance * math.sin(bearing) / KM_PER_DEGREE / math.cos(math.radians(tutor.latitude))
+            tutor.geohash = encode_geohash(tutor.latitude, tutor.longitude)
+        TutorProfile.objects.bulk_update(chunk, ['latitude', 'longitude', 'geohash'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tutors', type=int, default=100_000)
+    parser.add_argument('--radius', type=float, default=10, help="Search radius in km.")
+    parser.add_argument('--spread', type=float, default=60, help="How far tutors are scattered from each place, in km.")
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    from benchmarks import datagen
+    from core.geo import distance_expression, geocode, within_radius
+    from core.models import TutorProfile
+
+    with test_database():
+        datagen.seed(0, args.tutors, seed=args.seed)
+        scatter(args.spread, args.seed)
+        rng = random.Random(args.seed)
+        centres = [geocode(rng.choice(datagen.LOCATIONS)) for _ in range(args.queries)]
+        tutors = TutorProfile.objects.filter(user__is_approved=True).only('id')
+
+        def indexed():
+            return [
+                list(within_radius(tutors, lat, lon, args.radius)[:args.limit].values_list('id', flat=True))
+                for lat, lon in centres
+            ]
+
+        def full_scan():
+            return [
+                list(tutors.filter(latitude__isnull=False)
+                     .annotate(distance_km=distance_expression(lat, lon))
+                     .filter(distance_km__lte=args.radius).order_by('distance_km', 'id')[:args.limit]
+                     .values_list('id', flat=True))
+                for lat, lon in centres
+            ]
+
+        print(f"tutors={args.tutors} radius={args.radius}km spread={args.spread}km "
+              f"queries={args.queries} limit={args.limit} vendor={connection.vendor}")
+        print(f"{'query':<12} {'ms/query':>10} {'tutors/query':>13}")
+        results = {}
+        for name, run in (('full scan', full_scan), ('geohash', indexed)):
+            elapsed, results[name] = timed(run, repeat=3)
+            found = sum(map(len, results[name])) / args.queries
+            print(f"{name:<12} {elapsed / args.queries * 1000:>10.2f} {found:>13.1f}")
+        if results['full scan'] != results['geohash']:
+            raise SystemExit("geohash query returned different tutors than the full scan")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Concurrent student registrations against an on-disk SQLite database.
+
+    python -m benchmarks.bench_registration --threads 16 --per-thread 50
+
+Posts to StudentRegisterView from several threads at once, each with its own
+database connection, and reports throughput and failures for:
+
+  rollback        Django's stock SQLite backend (rollback journal)
+  wal             core.backends.sqlite_wal
+  wal-immediate   core.backends.sqlite_wal with IMMEDIATE transactions
+
+Each mode runs in a fresh process on a fresh database file. Passwords use the
+MD5 hasher so the database, not PBKDF2, is what is being measured.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import PROJECT_DIR, setup_django
+
+MODES = {
+    'rollback': {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}},
+    'wal': {'ENGINE': 'core.backends.sqlite_wal', 'OPTIONS': {}},
+    'wal-immediate': {'ENGINE': 'core.backends.sqlite_wal', 'OPTIONS': {'transaction_mode': 'IMMEDIATE'}},
+}
+
+
+def run_mode(mode, threads, per_thread):
+    """Run one mode in this process and return its results."""
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['DB_NAME'] = os.path.join(directory, 'bench.sqlite3')
+        setup_django()
+        from django.conf import settings
+        from django.core.management import call_command
+        from django.db import connections
+        from django.test.utils import setup_test_environment
+        from rest_framework.test import APIClient
+
+        # Nothing has connected yet, so the connection handler picks this up
+        settings.DATABASES['default'].update(MODES[mode])
+        settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        setup_test_environment()
+        call_command('migrate', verbosity=0)
+        connections.close_all()
+
+        created, failed, latencies = [0], {}, []
+        lock = threading.Lock()
+        start = threading.Barrier(threads)
+
+        def register(worker):
+            client = APIClient()
+            start.wait()
+            for n in range(per_thread):
+                number = worker * per_thread + n
+                started = time.perf_counter()
+                try:
+                    response = client.post('/api/register/student/', {
+                        'email': f'student{number}@example.com', 'mobile_number': f'7{number:09d}',
+                        'password': 'pass12345', 'full_name': f'Student {number}', 'class_name': '10',
+                        'required_subjects': 'Maths, Physics', 'location': 'Kochi',
+                    })
+                    outcome = response.status_code
+                except Exception as exc:
+                    outcome = type(exc).__name__
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if outcome == 201:
+                        created[0] += 1
+                        latencies.append(elapsed)
+                    else:
+                        failed[str(outcome)] = failed.get(str(outcome), 0) + 1
+            connections.close_all()
+
+        workers = [threading.Thread(target=register, args=(worker,)) for worker in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'created': created[0],
+        'failed': failed,
+        'per_second': created[0] / elapsed,
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--per-thread', type=int, default=50)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--mode', choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.threads, args.per_thread)))
+        return
+
+    print(f"{args.threads} threads x {args.per_thread} registrations")
+    print(f"{'mode':<15} {'created':>8} {'per sec':>9} {'p95 ms':>9}  failures")
+    for mode in args.modes:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_registration', '--mode', mode,
+             '--threads', str(args.threads), '--per-thread', str(args.per_thread)],
+            cwd=PROJECT_DIR, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        p95 = f"{result['p95_ms']:.1f}" if result['p95_ms'] is not None else '-'
+        failures = ', '.join(f'{name}: {count}' for name, count in sorted(result['failed'].items())) or '-'
+        print(f"{mode:<15} {result['created']:>8} {result['per_second']:>9.1f} {p95:>9}  {failures}")
+
+
+if __name__ == '__main__':
+    main()
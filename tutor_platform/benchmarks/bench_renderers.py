@@ -0,0 +1,64 @@
+"""Render time and body size of the response formats for a large listing.
+
+    python -m benchmarks.bench_renderers --rows 10000
+
+Serializes --rows tutors with TutorProfileSerializer once, then times each
+renderer on that data and each compression the middleware can apply to the
+orjson body. MessagePack and brotli rows only appear when the packages are
+installed.
+"""
+import argparse
+import gzip
+
+from benchmarks.common import setup_django, test_database, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from rest_framework.renderers import JSONRenderer
+
+    from benchmarks import datagen
+    from core.middleware import DEFAULT_RESPONSE_COMPRESSION, brotli
+    from core.models import TutorProfile
+    from core.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+    from core.serializers import TutorProfileSerializer
+
+    config = {**DEFAULT_RESPONSE_COMPRESSION, **settings.RESPONSE_COMPRESSION}
+    with test_database():
+        datagen.seed(0, args.rows, seed=args.seed)
+        data = TutorProfileSerializer(TutorProfile.objects.for_listing().order_by('id'), many=True).data
+
+    renderers = [('json (drf)', JSONRenderer()), ('json (orjson)', ORJSONRenderer())]
+    if msgpack is not None:
+        renderers.append(('msgpack', MessagePackRenderer()))
+
+    print(f"rows={len(data)}")
+    print(f"{'format':<22} {'ms':>8} {'bytes':>11} {'ratio':>6}")
+    baseline = None
+    for label, renderer in renderers:
+        elapsed, body = timed(lambda: renderer.render(data), repeat=args.repeat)
+        baseline = baseline or len(body)
+        print(f"{label:<22} {elapsed * 1000:>8.1f} {len(body):>11,} {len(body) / baseline:>6.2f}")
+
+    body = ORJSONRenderer().render(data)
+    compressions = [
+        (f"+ gzip {level}", lambda level=level: gzip.compress(body, level, mtime=0))
+        for level in sorted({1, config['GZIP_LEVEL']})
+    ]
+    if brotli is not None:
+        compressions.append((f"+ brotli {config['BROTLI_QUALITY']}",
+                             lambda: brotli.compress(body, quality=config['BROTLI_QUALITY'])))
+    for label, compress in compressions:
+        elapsed, compressed = timed(compress, repeat=args.repeat)
+        print(f"{label:<22} {elapsed * 1000:>8.1f} {len(compressed):>11,} {len(compressed) / baseline:>6.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Full-text tutor search: the FTS index versus an icontains scan.
+
+    python -m benchmarks.bench_search --tutors 100000
+
+Seeds tutors whose descriptions mix a few rare phrases into common filler,
+then times core.search.search_tutors against the icontains fallback it
+replaces, for common, rare and unmatched queries. The scan is unranked, so it
+stops at the first --limit hits; the index ranks every match.
+"""
+import argparse
+import random
+
+from benchmarks.common import setup_django, test_database, timed
+
+PHRASES = ['JEE coaching', 'NEET preparation', 'IIT graduate', 'olympiad training', 'spoken English',
+           'board exam revision', 'CBSE syllabus', 'ICSE syllabus', 'competitive exams', 'crash course']
+QUERIES = ['maths', 'IIT graduate', 'JEE coaching physics', 'olympiad', '"board exam"', 'quantum']
+
+
+def describe(seed, chunk_size=5000):
+    from core.models import TutorProfile
+
+    rng = random.Random(seed)
+    last_pk = 0
+    while chunk := list(TutorProfile.objects.filter(pk__gt=last_pk).order_by('pk')
+                        .only('subjects', 'description')[:chunk_size]):
+        last_pk = chunk[-1].pk
+        for tutor in chunk:
+            extras = rng.sample(PHRASES, rng.randint(0, 2)) if rng.random() < 0.2 else []
+            tutor.description = f"Experienced tutor for {tutor.subjects}. " + '. '.join(extras)
+        TutorProfile.objects.bulk_update(chunk, ['description'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tutors', type=int, default=100_000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    from benchmarks import datagen
+    from core.models import TutorProfile
+    from core.search import _search_fallback, parse_query, search_tutors
+
+    with test_database():
+        datagen.seed(0, args.tutors, seed=args.seed)
+        describe(args.seed)
+        tutors = TutorProfile.objects.for_listing().filter(user__is_approved=True, user__is_rejected=False)
+
+        print(f"tutors={args.tutors} limit={args.limit} vendor={connection.vendor}")
+        print(f"{'query':<24} {'index ms':>9} {'scan ms':>9} {'results':>8}")
+        for query in QUERIES:
+            indexed, found = timed(lambda: search_tutors(tutors, query, args.limit), repeat=args.repeat)
+            scan, _ = timed(lambda: list(_search_fallback(tutors, parse_query(query))[:args.limit]), repeat=args.repeat)
+            print(f"{query:<24} {indexed * 1000:>9.2f} {scan * 1000:>9.2f} {len(found):>8}")
+
+
+if __name__ == '__main__':
+    main()
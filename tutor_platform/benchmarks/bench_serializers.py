@@ -0,0 +1,49 @@
+"""Compare the DRF profile serializers with the .values() fast path.
+
+    python -m benchmarks.bench_serializers --sizes 1000 10000 100000
+
+Runs against a throwaway test database seeded with benchmarks.datagen and
+checks that both paths produce the same JSON.
+"""
+import argparse
+
+from benchmarks.common import setup_django, test_database, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+
+    from benchmarks import datagen
+    from core.fast_serializers import get_values_plan
+    from core.models import StudentProfile, TutorProfile
+    from core.serializers import StudentProfileSerializer, TutorProfileSerializer
+
+    cases = [
+        ('students', StudentProfile, StudentProfileSerializer),
+        ('tutors', TutorProfile, TutorProfileSerializer),
+    ]
+    renderer = JSONRenderer()
+    with test_database():
+        seeded = 0
+        print(f"{'rows':>8} {'listing':<9} {'drf s':>8} {'fast s':>8} {'speedup':>8}")
+        for size in sorted(args.sizes):
+            datagen.seed(size - seeded, size - seeded, seed=size)
+            seeded = size
+            for label, model, serializer_class in cases:
+                queryset = model.objects.for_listing().order_by('id')
+                plan = get_values_plan(serializer_class)
+                drf, expected = timed(lambda: serializer_class(queryset.all(), many=True).data, args.repeat)
+                fast, actual = timed(lambda: plan.serialize(queryset.all()), args.repeat)
+                if renderer.render(actual) != renderer.render(expected):
+                    raise SystemExit(f"fast path output differs for {label} at {size} rows")
+                print(f"{size:>8} {label:<9} {drf:>8.3f} {fast:>8.3f} {drf / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
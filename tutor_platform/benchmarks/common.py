@@ -0,0 +1,50 @@
+import os
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    """Make the project importable and configure Django for a standalone script."""
+    if str(PROJECT_DIR) not in sys.path:
+        sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutor_platform.settings')
+    import django
+    django.setup()
+
+
+class test_database:
+    """Create a throwaway test database for the duration of a ``with`` block."""
+
+    def __init__(self, verbosity=0):
+        self.verbosity = verbosity
+
+    def __enter__(self):
+        from django.db import connection
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        self.old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=self.verbosity, autoclobber=True)
+        return connection
+
+    def __exit__(self, *exc_info):
+        from django.db import connection
+        from django.test.utils import teardown_test_environment
+
+        connection.creation.destroy_test_db(self.old_name, verbosity=self.verbosity)
+        teardown_test_environment()
+
+
+def timed(func, repeat=1):
+    """Run ``func`` ``repeat`` times and return (best seconds, last result)."""
+    import time
+
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
@@ -0,0 +1,66 @@
+"""Seed synthetic students and tutors with bulk_create.
+
+Passwords are stored unusable ('!') so seeding is not dominated by PBKDF2.
+"""
+import random
+from decimal import Decimal
+
+SUBJECTS = ['maths', 'physics', 'chemistry', 'biology', 'english', 'hindi', 'history',
+            'geography', 'economics', 'computer science', 'accountancy', 'malayalam']
+LOCATIONS = ['Kochi', 'Kozhikode', 'Thrissur', 'Chennai', 'Bengaluru', 'Delhi', 'Mumbai', 'Hyderabad']
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def seed(students, tutors, approved_ratio=1.0, batch_size=2000, seed=0):
+    """Create ``students`` and ``tutors`` users with profiles. Returns (students, tutors) created."""
+    from core.models import StudentProfile, Subject, TutorProfile, User
+
+    rng = random.Random(seed)
+    subjects = {s.name: s for s in Subject.objects.resolve(', '.join(SUBJECTS))}
+    offset = User.objects.count()
+
+    def users(role, count):
+        return [
+            User(email=f'{role}{offset + n}@bench.example.com', mobile_number=f'{offset + n:010d}'[-15:],
+                 role=role, password='!', is_approved=rng.random() < approved_ratio)
+            for n in range(count)
+        ]
+
+    for start in range(0, students, batch_size):
+        created = User.objects.bulk_create(users('student', min(batch_size, students - start)))
+        offset += len(created)
+        picks = [rng.sample(SUBJECTS, rng.randint(1, 3)) for _ in created]
+        profiles = [
+            StudentProfile(user=user, full_name=f'Student {user.pk}', class_name=str(rng.randint(1, 12)),
+                           required_subjects=', '.join(names), location=rng.choice(LOCATIONS))
+            for user, names in zip(created, picks)
+        ]
+        for profile in profiles:
+            profile.geocode()
+        StudentProfile.objects.bulk_create(profiles)
+        StudentProfile.canonical_subjects.through.objects.bulk_create([
+            StudentProfile.canonical_subjects.through(studentprofile_id=profile.pk, subject_id=subjects[name].pk)
+            for profile, names in zip(profiles, picks) for name in names
+        ])
+
+    for start in range(0, tutors, batch_size):
+        created = User.objects.bulk_create(users('tutor', min(batch_size, tutors - start)))
+        offset += len(created)
+        picks = [rng.sample(SUBJECTS, rng.randint(1, 4)) for _ in created]
+        profiles = [
+            TutorProfile(user=user, full_name=f'Tutor {user.pk}', gender=rng.choice(['male', 'female']),
+                         location=rng.choice(LOCATIONS), qualification=rng.choice(['BSc', 'MSc', 'BTech', 'PhD']),
+                         experience_years=rng.randint(0, 20), hourly_rate=Decimal(rng.randint(200, 2000)),
+                         subjects=', '.join(names), description=f'Experienced tutor for {", ".join(names)}',
+                         available_days=', '.join(rng.sample(DAYS, rng.randint(1, 5))))
+            for user, names in zip(created, picks)
+        ]
+        for profile in profiles:
+            profile.geocode()
+        TutorProfile.objects.bulk_create(profiles)
+        TutorProfile.canonical_subjects.through.objects.bulk_create([
+            TutorProfile.canonical_subjects.through(tutorprofile_id=profile.pk, subject_id=subjects[name].pk)
+            for profile, names in zip(profiles, picks) for name in names
+        ])
+
+    return students, tutors
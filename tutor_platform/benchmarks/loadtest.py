@@ -0,0 +1,200 @@
+"""Requests per second and tail latency of the read endpoints under WSGI and ASGI.
+
+    python -m benchmarks.loadtest --token KEY --spawn --concurrency 200 --requests 5000
+    python -m benchmarks.loadtest --token KEY --wsgi http://127.0.0.1:8000 --asgi http://127.0.0.1:8001
+
+Each endpoint is hit through its DRF view on the WSGI server, its DRF view on
+the ASGI server (run in a thread by Django) and its native async view on the
+ASGI server. The client is a plain asyncio HTTP/1.1 keep-alive client with one
+connection per concurrent worker, so it adds no dependencies.
+
+With --spawn the servers are started here (gunicorn for WSGI, uvicorn for
+ASGI; both must be installed) against the database in settings, which should
+already be seeded, e.g. with benchmarks.datagen. The token must belong to a
+user allowed on the chosen endpoint: an admin for the admin lists, an approved
+tutor or student for the dashboards.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import PROJECT_DIR
+
+# name -> (DRF path, native async path)
+ENDPOINTS = {
+    'admin-tutors': ('/api/admin/tutors/', '/api/async/admin/tutors/'),
+    'admin-students': ('/api/admin/students/', '/api/async/admin/students/'),
+    'approved-tutors': ('/api/admin/tutors/approved/', '/api/async/admin/tutors/approved/'),
+    'tutor-dashboard': ('/api/tutor/dashboard/students/', '/api/async/tutor/dashboard/students/'),
+    'student-dashboard': ('/api/student/dashboard/tutors/', '/api/async/student/dashboard/tutors/'),
+}
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response and return (status, body length, keep alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        length = 0
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            length += size
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        length = int(headers['content-length'])
+        await reader.readexactly(length)
+    else:
+        length = len(await reader.read())
+        return status, length, False
+    return status, length, headers.get('connection', '').lower() != 'close'
+
+
+async def run_load(base_url, path, token, concurrency, total):
+    """Send ``total`` GETs over ``concurrency`` connections. Returns (seconds, latencies, errors)."""
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+        f"Authorization: Token {token}\r\nConnection: keep-alive\r\n\r\n"
+    ).encode()
+    remaining = total
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal remaining, errors
+        reader = writer = None
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                writer.write(request)
+                status, _, keep_alive = await read_response(reader)
+            except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                errors += 1
+                if writer is not None:
+                    writer.close()
+                reader = writer = None
+                continue
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, errors
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(label, elapsed, latencies, errors):
+    if not latencies:
+        print(f"{label:<28} {'no successful requests':>40}  errors={errors}")
+        return
+    ms = [value * 1000 for value in latencies]
+    print(f"{label:<28} {len(latencies) / elapsed:>9.1f} {statistics.median(ms):>9.1f} "
+          f"{percentile(ms, 0.95):>9.1f} {percentile(ms, 0.99):>9.1f} {errors:>7}")
+
+
+def wait_for_port(base_url, timeout=30):
+    url = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+
+    async def probe():
+        _, writer = await asyncio.open_connection(url.hostname, url.port)
+        writer.close()
+
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(probe())
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"Server at {base_url} did not start within {timeout}s")
+
+
+def spawn_servers(args):
+    """Start gunicorn and uvicorn on the ports of --wsgi and --asgi. Returns the processes."""
+    for program in ('gunicorn', 'uvicorn'):
+        if shutil.which(program) is None:
+            raise SystemExit(f"--spawn needs {program} installed (pip install gunicorn uvicorn)")
+    wsgi, asgi = urlsplit(args.wsgi), urlsplit(args.asgi)
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'tutor_platform.settings'}
+    commands = [
+        ['gunicorn', 'tutor_platform.wsgi', '--bind', f'{wsgi.hostname}:{wsgi.port}',
+         '--workers', str(args.workers), '--threads', str(args.threads)],
+        ['uvicorn', 'tutor_platform.asgi:application', '--host', asgi.hostname, '--port', str(asgi.port),
+         '--workers', str(args.workers), '--no-access-log'],
+    ]
+    processes = [
+        subprocess.Popen(command, cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for command in commands
+    ]
+    for base_url in (args.wsgi, args.asgi):
+        wait_for_port(base_url)
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--token', required=True, help="Auth token sent with every request.")
+    parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='tutor-dashboard')
+    parser.add_argument('--wsgi', default='http://127.0.0.1:8000')
+    parser.add_argument('--asgi', default='http://127.0.0.1:8001')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--spawn', action='store_true', help="Start gunicorn and uvicorn instead of using running servers.")
+    parser.add_argument('--workers', type=int, default=1, help="Server worker processes when spawning.")
+    parser.add_argument('--threads', type=int, default=8, help="gunicorn threads per worker when spawning.")
+    args = parser.parse_args()
+
+    drf_path, async_path = ENDPOINTS[args.endpoint]
+    runs = [
+        ('WSGI  DRF view', args.wsgi, drf_path),
+        ('ASGI  DRF view', args.asgi, drf_path),
+        ('ASGI  native async', args.asgi, async_path),
+    ]
+    processes = spawn_servers(args) if args.spawn else []
+    try:
+        print(f"{args.endpoint}: {args.requests} requests, concurrency {args.concurrency}", file=sys.stderr)
+        print(f"{'server / view':<28} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for label, base_url, path in runs:
+            asyncio.run(run_load(base_url, path, args.token, min(args.concurrency, args.warmup), args.warmup))
+            report(label, *asyncio.run(run_load(base_url, path, args.token, args.concurrency, args.requests)))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""End-to-end benchmark suite for the API in core/urls.py.
+
+    python -m benchmarks.suite --students 2000 --tutors 1000 --requests 200 --output results.json
+    python -m benchmarks.suite --targets client server --baseline baseline.json --tolerance 0.2
+
+Seeds a throwaway on-disk database with benchmarks.datagen, rebuilds the match
+table, then runs every scenario against each target:
+
+  client   the DRF test client, in process (no HTTP)
+  server   a threaded local WSGI server on a random port, over HTTP keep-alive
+
+and reports throughput and p50/p95/p99 latency per scenario. Results are
+written as JSON; with --baseline, scenarios whose p95 grew or whose
+throughput dropped by more than --tolerance are listed and the exit status is
+1. Record a baseline by running once with --output baseline.json.
+
+Passwords use the MD5 hasher and the login throttle is lifted while the suite
+runs, so the numbers measure the application rather than PBKDF2 or the
+throttle.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import setup_django, test_database
+
+PASSWORD = 'bench-pass-123'
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def build_scenarios(ctx):
+    """Map scenario name -> (method, token, request(n) -> (path, body) or None, expected status)."""
+    numbers = itertools.count()
+    pending = list(ctx['pending_ids'])
+    pending_lock = threading.Lock()
+
+    def register_student(_):
+        n = next(numbers)
+        return '/api/register/student/', {
+            'email': f'new-student{n}@bench.example.com', 'mobile_number': f'9{n:09d}', 'password': PASSWORD,
+            'full_name': f'New student {n}', 'class_name': '10', 'required_subjects': 'Maths, Physics',
+            'location': 'Kochi',
+        }
+
+    def register_tutor(_):
+        n = next(numbers)
+        return '/api/register/tutor/', {
+            'email': f'new-tutor{n}@bench.example.com', 'mobile_number': f'8{n:09d}', 'password': PASSWORD,
+            'full_name': f'New tutor {n}', 'gender': 'female', 'location': 'Kochi', 'qualification': 'MSc',
+            'experience_years': 4, 'hourly_rate': '450.00', 'subjects': 'Maths, Chemistry',
+            'description': 'Tutor', 'available_days': 'Mon to Fri',
+        }
+
+    def login(n):
+        return '/api/login/', {'email': ctx['login_emails'][n % len(ctx['login_emails'])], 'password': PASSWORD}
+
+    def review(_):
+        with pending_lock:
+            if not pending:
+                return None
+            pk = pending.pop()
+        return f'/api/admin/review-user/{pk}/', {'action': 'approve'}
+
+    def get(path):
+        return lambda n: (path, None)
+
+    return {
+        'register-student': ('POST', None, register_student, 201),
+        'register-tutor': ('POST', None, register_tutor, 201),
+        'login': ('POST', None, login, 200),
+        'tutor-dashboard': ('GET', ctx['tutor_token'], get('/api/tutor/dashboard/students/'), 200),
+        'student-dashboard': ('GET', ctx['student_token'], get('/api/student/dashboard/tutors/'), 200),
+        'tutor-search': ('GET', ctx['student_token'], get('/api/student/tutors/search/?subject=maths'), 200),
+        'admin-students': ('GET', ctx['admin_token'], get('/api/admin/students/'), 200),
+        'admin-tutors': ('GET', ctx['admin_token'], get('/api/admin/tutors/'), 200),
+        'admin-approved-tutors': ('GET', ctx['admin_token'], get('/api/admin/tutors/approved/'), 200),
+        'admin-pending': ('GET', ctx['admin_token'], get('/api/admin/pending/'), 200),
+        'admin-review': ('PATCH', ctx['admin_token'], review, 200),
+    }
+
+
+def prepare(students, tutors, approved_ratio):
+    """Seed the database and return tokens, login emails and pending user ids."""
+    from rest_framework.authtoken.models import Token
+
+    from benchmarks import datagen
+    from core.batch_matching import rematch_all
+    from core.models import User
+
+    datagen.seed(students, tutors, approved_ratio=approved_ratio)
+    rematch_all()
+    admin = User.objects.create_superuser('admin@bench.example.com', PASSWORD)
+    approved = User.objects.filter(is_approved=True, is_staff=False)
+    tutor = approved.filter(role='tutor', tutor_profile__matches__isnull=False).first()
+    student = approved.filter(role='student', student_profile__matches__isnull=False).first()
+
+    login_users = list(approved.order_by('id')[:50])
+    for user in login_users:
+        user.set_password(PASSWORD)
+    User.objects.bulk_update(login_users, ['password'])
+
+    return {
+        'admin_token': Token.objects.create(user=admin).key,
+        'tutor_token': Token.objects.create(user=tutor).key,
+        'student_token': Token.objects.create(user=student).key,
+        'login_emails': [user.email for user in login_users],
+        'pending_ids': list(User.objects.filter(is_approved=False, is_rejected=False).values_list('id', flat=True)),
+    }
+
+
+class ClientSender:
+    def __init__(self):
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+
+    def send(self, method, path, body, token):
+        extra = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        data = json.dumps(body) if body is not None else None
+        return self.client.generic(method, path, data or '', content_type='application/json', **extra).status_code
+
+    def close(self):
+        pass
+
+
+class HTTPSender:
+    def __init__(self, host, port):
+        self.connection = http.client.HTTPConnection(host, port, timeout=60)
+        self.connection.connect()
+        # Without this, Nagle's algorithm holds back the request body until a delayed ACK
+        self.connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send(self, method, path, body, token):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        self.connection.request(method, path, json.dumps(body) if body is not None else None, headers)
+        response = self.connection.getresponse()
+        response.read()
+        return response.status
+
+    def close(self):
+        self.connection.close()
+
+
+def run_scenario(make_sender, scenario, requests, concurrency, warmup):
+    method, token, make_request, expected = scenario
+    counter = itertools.count()
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker(count, record):
+        from django.db import connections
+
+        sender = make_sender()
+        try:
+            for _ in range(count):
+                request = make_request(next(counter))
+                if request is None:
+                    break
+                path, body = request
+                started = time.perf_counter()
+                try:
+                    status = sender.send(method, path, body, token)
+                except Exception:
+                    status = None
+                elapsed = time.perf_counter() - started
+                if record:
+                    with lock:
+                        if status == expected:
+                            latencies.append(elapsed)
+                        else:
+                            errors[0] += 1
+        finally:
+            sender.close()
+            connections.close_all()
+
+    worker(warmup, record=False)
+    per_worker = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(count, True)) for count in per_worker]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        'requests': len(latencies) + errors[0],
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(ms, 0.50), 3) if ms else None,
+        'p95_ms': round(percentile(ms, 0.95), 3) if ms else None,
+        'p99_ms': round(percentile(ms, 0.99), 3) if ms else None,
+    }
+
+
+def start_server():
+    """Serve the project from a thread. Returns (host, port, stop)."""
+    from django.test.testcases import LiveServerThread
+
+    server = LiveServerThread('127.0.0.1', static_handler=lambda handler: handler)
+    server.daemon = True
+    server.start()
+    server.is_ready.wait()
+    if server.error:
+        raise server.error
+    # Accepted sockets inherit this; wsgiref writes headers and body separately
+    server.httpd.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return server.host, server.port, server.terminate
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against ``baseline`` and return the names of regressed scenarios."""
+    regressed = []
+    print(f"\n{'scenario':<32} {'rps':>16} {'p95 ms':>18}")
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous or not previous.get('p95_ms') or not current.get('p95_ms'):
+            continue
+        rps_change = current['rps'] / previous['rps'] - 1 if previous['rps'] else 0.0
+        p95_change = current['p95_ms'] / previous['p95_ms'] - 1
+        flag = ''
+        if rps_change < -tolerance or p95_change > tolerance:
+            regressed.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<32} {current['rps']:>8.1f} ({rps_change:+6.1%}) "
+              f"{current['p95_ms']:>9.2f} ({p95_change:+6.1%}){flag}")
+    return regressed
+
+
+def run(args):
+    """Seed, run every scenario on every target and return the results."""
+    setup_django()
+    import django
+    from django.test.utils import override_settings
+
+    from core import throttling
+
+    results = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            **{name: getattr(args, name) for name in ('students', 'tutors', 'requests', 'concurrency', 'targets')},
+        },
+        'scenarios': {},
+    }
+
+    overrides = override_settings(
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+        ALLOWED_HOSTS=['testserver', '127.0.0.1'],
+    )
+    with test_database(), overrides:
+        ctx = prepare(args.students, args.tutors, args.approved_ratio)
+        ip_limit, throttling.ip_attempts.limit = throttling.ip_attempts.limit, sys.maxsize
+        scenarios = build_scenarios(ctx)
+        names = args.scenarios or list(scenarios)
+        print(f"{'scenario':<32} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        try:
+            for target in args.targets:
+                if target == 'server':
+                    host, port, stop = start_server()
+                    make_sender = lambda: HTTPSender(host, port)
+                else:
+                    stop = None
+                    make_sender = ClientSender
+                try:
+                    for name in names:
+                        throttling.ip_attempts.clear()
+                        throttling.email_failures.clear()
+                        result = run_scenario(make_sender, scenarios[name], args.requests, args.concurrency, args.warmup)
+                        key = f'{target}/{name}'
+                        results['scenarios'][key] = result
+                        print(f"{key:<32} {result['rps']:>9.1f} {result['p50_ms'] or 0:>9.2f} "
+                              f"{result['p95_ms'] or 0:>9.2f} {result['p99_ms'] or 0:>9.2f} {result['errors']:>7}")
+                finally:
+                    if stop:
+                        stop()
+        finally:
+            throttling.ip_attempts.limit = ip_limit
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--tutors', type=int, default=1000)
+    parser.add_argument('--approved-ratio', type=float, default=0.8)
+    parser.add_argument('--requests', type=int, default=200, help="Measured requests per scenario.")
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--targets', nargs='+', choices=['client', 'server'], default=['client'])
+    parser.add_argument('--scenarios', nargs='+', help="Run only these scenarios.")
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--baseline', help="Results file to compare against.")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # An on-disk database lets the server and concurrent workers use their own connections
+        os.environ.setdefault('DB_TEST_NAME', os.path.join(directory, 'suite.sqlite3'))
+        results = run(args)
+
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressed = compare(results, json.load(baseline), args.tolerance)
+        if regressed:
+            print(f"\n{len(regressed)} scenario(s) regressed beyond {args.tolerance:.0%}: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Native async versions of the read-heavy endpoints, for ASGI deployments.
+
+These are plain Django async views rather than DRF views (DRF dispatches
+synchronously, so under ASGI every DRF request is moved to a thread). They
+authenticate with the same tokens, apply the same permission checks and
+return the same JSON as their DRF counterparts in core.views, except that
+the student dashboard returns its top ``limit`` matches instead of cursor
+pages.
+"""
+from django.http import HttpResponse
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+
+from core.authentication import token_cache, token_expired
+from core.fast_serializers import get_values_plan
+from core.filters import filter_tutors
+from core.models import Match, StudentProfile, TutorProfile, approved
+from core.renderers import dumps
+from core.routers import replica_reads
+from core.serializers import (
+    MatchedStudentSerializer, MatchedTutorSerializer, StudentProfileSerializer, TutorProfileSerializer,
+)
+
+CHUNK_SIZE = 2000
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def _json(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+async def authenticate(request):
+    """Resolve the ``Authorization: Token <key>`` header to a user, or None."""
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) != 2 or parts[0].lower() != 'token':
+        return None
+    key = parts[1]
+    cached = token_cache.get(key)
+    if cached is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            return None
+        if not token.user.is_active:
+            return None
+        cached = (token.user, token)
+        token_cache.set(key, token.user, token)
+    user, token = cached
+    if token_expired(token):
+        return None
+    return user
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return None
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def admin_list_view(get_queryset, serializer_class):
+    """Build an async admin-only list view streaming ``.values()`` rows through the fast path."""
+    @replica_reads
+    async def view(request):
+        if request.method != 'GET':
+            return _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+        user = await authenticate(request)
+        if user is None:
+            return _json({"detail": "Authentication credentials were not provided."}, status=401)
+        if not user.is_staff:
+            return _json({"detail": "You do not have permission to perform this action."}, status=403)
+
+        plan = get_values_plan(serializer_class)
+        rows = get_queryset().values(*plan.columns).aiterator(chunk_size=CHUNK_SIZE)
+        return _json([plan.serialize_row(row) async for row in rows])
+    return view
+
+
+admin_students = admin_list_view(lambda: StudentProfile.objects.all(), StudentProfileSerializer)
+admin_tutors = admin_list_view(lambda: TutorProfile.objects.all(), TutorProfileSerializer)
+approved_students = admin_list_view(
+    lambda: StudentProfile.objects.filter(approved('user__')), StudentProfileSerializer
+)
+rejected_students = admin_list_view(
+    lambda: StudentProfile.objects.filter(user__is_rejected=True), StudentProfileSerializer
+)
+approved_tutors = admin_list_view(
+    lambda: TutorProfile.objects.filter(approved('user__')), TutorProfileSerializer
+)
+rejected_tutors = admin_list_view(
+    lambda: TutorProfile.objects.filter(user__is_rejected=True), TutorProfileSerializer
+)
+
+
+async def _dashboard_user(request, role):
+    """Return (user, None) for an approved user of ``role``, else (None, error response)."""
+    if request.method != 'GET':
+        return None, _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    user = await authenticate(request)
+    if user is None:
+        return None, _json({"detail": "Authentication credentials were not provided."}, status=401)
+    if user.role != role:
+        plural = 'tutors' if role == 'tutor' else 'students'
+        return None, _json({"error": f"Only {plural} can access this endpoint"}, status=403)
+    if not user.is_approved:
+        return None, _json({"error": "Your account is not approved yet"}, status=403)
+    return user, None
+
+
+@replica_reads
+async def tutor_dashboard_students(request):
+    user, error = await _dashboard_user(request, 'tutor')
+    if error:
+        return error
+    limit = _limit(request)
+    if limit is None:
+        return _json({"error": "limit must be an integer"}, status=400)
+
+    matches = Match.objects.filter(tutor__user=user).with_students().order_by('-score', 'id')[:limit]
+    return _json(MatchedStudentSerializer([match async for match in matches], many=True).data)
+
+
+@replica_reads
+async def student_dashboard_tutors(request):
+    user, error = await _dashboard_user(request, 'student')
+    if error:
+        return error
+    limit = _limit(request)
+    if limit is None:
+        return _json({"error": "limit must be an integer"}, status=400)
+
+    matches = Match.objects.filter(student__user=user).with_tutors()
+    try:
+        matches = filter_tutors(matches, request.GET, prefix='tutor__')
+    except ValidationError as exc:
+        return _json(exc.detail, status=400)
+    matches = matches.order_by('-score', '-id')[:limit]
+    return _json(MatchedTutorSerializer([match async for match in matches], many=True).data)
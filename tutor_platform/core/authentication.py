@@ -0,0 +1,124 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+DEFAULT_TOKEN_CACHE = {
+    'MAX_ENTRIES': 10000,
+    # Upper bound on how long another worker process can serve a stale user
+    'TTL': 60,
+}
+
+
+class TokenCache:
+    """Thread-safe token key -> (user, token) map with TTL and LRU eviction."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, (user, token))
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_key(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[1][0].pk
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+def _build_token_cache():
+    options = {**DEFAULT_TOKEN_CACHE, **getattr(settings, 'AUTH_TOKEN_CACHE', {})}
+    return TokenCache(options['MAX_ENTRIES'], options['TTL'])
+
+
+token_cache = _build_token_cache()
+
+
+def token_expired(token):
+    """True when ``AUTH_TOKEN_TTL`` (seconds) is set and the token is older than that."""
+    ttl = getattr(settings, 'AUTH_TOKEN_TTL', None)
+    return ttl is not None and token.created < timezone.now() - timedelta(seconds=ttl)
+
+
+def issue_token(user):
+    """Return the user's token, rotating it if it has expired."""
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and token_expired(token):
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that keeps token -> user lookups in an in-process cache.
+
+    Entries are dropped when the token is deleted or the user is saved (see
+    core.signals), and expire after ``AUTH_TOKEN_CACHE['TTL']`` seconds so
+    changes made by other processes are picked up.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            cached = (user, token)
+            token_cache.set(key, user, token)
+        user, token = cached
+
+        if token_expired(token):
+            token_cache.invalidate_key(key)
+            Token.objects.filter(key=key).delete()
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+
+        # Views get their own copy so nothing they set leaks into the cache
+        return copy.copy(user), token
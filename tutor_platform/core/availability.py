@@ -0,0 +1,88 @@
+"""Weekly tutor availability as per-day slot bitmaps.
+
+A day is split into ``SLOTS_PER_DAY`` slots of ``SLOT_MINUTES``; bit ``n`` of a
+day's mask is set when the tutor is free from ``n * SLOT_MINUTES`` minutes
+after midnight, in the site time zone (``settings.TIME_ZONE``). Each mask fits
+in a BigIntegerField, so "free on Tuesday 17:00-19:00" is a bitwise AND in
+SQL: ``tue & mask = mask``.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from core.matching import DAYS
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def parse_time(value):
+    """Parse ``HH:MM`` into minutes after midnight; ``24:00`` is the end of the day."""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    try:
+        hours, minutes = (int(part) for part in str(value).split(':'))
+    except ValueError:
+        raise ValueError(f"'{value}' is not a time in HH:MM format.")
+    if not (0 <= minutes < 60 and 0 <= hours * 60 + minutes <= 24 * 60):
+        raise ValueError(f"'{value}' is not a time of day.")
+    return hours * 60 + minutes
+
+
+def slot_mask(start, end):
+    """The mask of slots covering ``[start, end)``, both in minutes after midnight on slot boundaries."""
+    if start % SLOT_MINUTES or end % SLOT_MINUTES:
+        raise ValueError(f"Times must be on {SLOT_MINUTES}-minute boundaries.")
+    if not 0 <= start < end <= 24 * 60:
+        raise ValueError("The end must be after the start, on the same day.")
+    first, last = start // SLOT_MINUTES, end // SLOT_MINUTES
+    return ((1 << (last - first)) - 1) << first
+
+
+def encode_slots(slots):
+    """Turn ``[{"day": "tue", "start": "17:00", "end": "19:00"}, ...]`` into ``{day: mask}`` for all days."""
+    masks = dict.fromkeys(DAYS, 0)
+    for slot in slots:
+        masks[slot['day']] |= slot_mask(parse_time(slot['start']), parse_time(slot['end']))
+    return masks
+
+
+def format_time(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def decode_slots(masks):
+    """The inverse of encode_slots, with adjacent slots merged into one range."""
+    slots = []
+    for day in DAYS:
+        mask, slot = masks.get(day) or 0, 0
+        while mask >> slot:
+            if not mask >> slot & 1:
+                slot += 1
+                continue
+            start = slot
+            while mask >> slot & 1:
+                slot += 1
+            slots.append({'day': day, 'start': format_time(start * SLOT_MINUTES),
+                          'end': format_time(slot * SLOT_MINUTES)})
+    return slots
+
+
+def local_window(start, end):
+    """``(day, mask)`` for a datetime range inside one local day, in the site time zone."""
+    start, end = timezone.localtime(start), timezone.localtime(end)
+    midnight = datetime.combine(start.date(), time(), tzinfo=start.tzinfo)
+    if end > midnight + timedelta(days=1):
+        raise ValueError("A session cannot run past midnight.")
+    minutes = (start - midnight) // timedelta(minutes=1), (end - midnight) // timedelta(minutes=1)
+    return DAYS[start.weekday()], slot_mask(*minutes)
+
+
+def filter_free(queryset, day, mask, prefix=''):
+    """Tutors whose weekly availability covers every slot in ``mask`` on ``day``.
+
+    ``prefix`` is the lookup path to the TutorProfile, as in core.filters.filter_tutors.
+    """
+    column = f'{prefix}availability__{day}'
+    return queryset.alias(free_slots=F(column).bitand(mask)).filter(free_slots=mask)
@@ -0,0 +1,44 @@
+"""SQLite backend tuned for concurrent use on a single node.
+
+The database file is switched to WAL mode, so readers no longer block the
+writer or each other. The mode is stored in the file, so it is only set when
+the file is not in WAL mode yet and opening a connection never writes to it.
+Each connection also gets ``synchronous=NORMAL`` (safe under WAL),
+memory-mapped reads, a larger page cache and a busy timeout, so a writer waits
+for the lock instead of failing with "database is locked". Override any pragma
+with ``OPTIONS['pragmas']``.
+
+``OPTIONS['transaction_mode'] = 'IMMEDIATE'`` (handled by Django's own SQLite
+backend) takes the write lock when an atomic block starts. Without it, a
+transaction that reads before writing can fail immediately with SQLITE_BUSY
+when another connection committed in between, and the busy timeout does not
+help.
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Bytes of the file to memory-map for reads
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative values are KiB: 64 MiB of page cache per connection
+    'cache_size': -64000,
+    # Milliseconds to wait for a lock
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **kwargs.pop('pragmas', {})}
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            if name == 'journal_mode' and conn.execute('PRAGMA journal_mode').fetchone()[0].lower() == value.lower():
+                continue
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
@@ -0,0 +1,170 @@
+"""Vectorized bulk matcher behind the ``rematch`` management command.
+
+Profiles are loaded into NumPy arrays once: subjects become ``uint64`` bitsets,
+``available_days`` a day count, locations integer codes and rates floats. Scores
+are then computed for a block of students against every tutor at a time, which
+gives the same results as :func:`core.matching.score_pair` without a Python
+loop per pair.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.cache import bump_listing_version
+from core.matching import (
+    AVAILABILITY_WEIGHT, DAYS, LOCATION_WEIGHT, SUBJECT_WEIGHT, TOP_K, normalize_location, parse_days,
+)
+from core.models import Match, StudentProfile, Subject, TutorProfile
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is only needed for bulk rematching
+    np = None
+
+StudentArrays = namedtuple('StudentArrays', ['ids', 'location_codes', 'subject_bits'])
+TutorArrays = namedtuple('TutorArrays', ['ids', 'location_codes', 'subject_bits', 'day_counts', 'rates'])
+
+# Students and tutors without a location get different codes so they never match each other.
+NO_STUDENT_LOCATION = -1
+NO_TUTOR_LOCATION = -2
+
+
+def _subject_bits(owner_ids, links, subject_bit, words):
+    bits = np.zeros((len(owner_ids), words), dtype=np.uint64)
+    if not links:
+        return bits
+    row_of = {owner_id: row for row, owner_id in enumerate(owner_ids)}
+    pairs = [(row_of[owner_id], subject_bit[subject_id]) for owner_id, subject_id in links if owner_id in row_of]
+    if not pairs:
+        return bits
+    rows, positions = np.array(pairs, dtype=np.int64).T
+    values = np.left_shift(np.uint64(1), (positions % 64).astype(np.uint64))
+    np.bitwise_or.at(bits, (rows, positions // 64), values)
+    return bits
+
+
+def _location_code(location, codes, missing):
+    location = normalize_location(location)
+    if not location:
+        return missing
+    return codes.setdefault(location, len(codes))
+
+
+def load_profiles():
+    """Load every approved student and tutor into arrays for :func:`top_k_matches`."""
+    subject_bit = {pk: bit for bit, pk in enumerate(Subject.objects.order_by('id').values_list('id', flat=True))}
+    words = max(1, (len(subject_bit) + 63) // 64)
+    locations = {}
+    approved = Q(user__is_approved=True, user__is_rejected=False)
+
+    student_ids, student_locations = [], []
+    for pk, location in StudentProfile.objects.filter(approved).values_list('id', 'location').iterator(chunk_size=5000):
+        student_ids.append(pk)
+        student_locations.append(_location_code(location, locations, NO_STUDENT_LOCATION))
+    student_links = list(
+        StudentProfile.canonical_subjects.through.objects
+        .filter(studentprofile__user__is_approved=True, studentprofile__user__is_rejected=False)
+        .values_list('studentprofile_id', 'subject_id')
+    )
+
+    tutor_ids, tutor_locations, day_counts, rates = [], [], [], []
+    rows = TutorProfile.objects.filter(approved).values_list('id', 'location', 'available_days', 'hourly_rate')
+    for pk, location, available_days, hourly_rate in rows.iterator(chunk_size=5000):
+        tutor_ids.append(pk)
+        tutor_locations.append(_location_code(location, locations, NO_TUTOR_LOCATION))
+        day_counts.append(bin(parse_days(available_days)).count('1'))
+        rates.append(float(hourly_rate))
+    tutor_links = list(
+        TutorProfile.canonical_subjects.through.objects
+        .filter(tutorprofile__user__is_approved=True, tutorprofile__user__is_rejected=False)
+        .values_list('tutorprofile_id', 'subject_id')
+    )
+
+    students = StudentArrays(
+        ids=np.array(student_ids, dtype=np.int64),
+        location_codes=np.array(student_locations, dtype=np.int64),
+        subject_bits=_subject_bits(student_ids, student_links, subject_bit, words),
+    )
+    tutors = TutorArrays(
+        ids=np.array(tutor_ids, dtype=np.int64),
+        location_codes=np.array(tutor_locations, dtype=np.int64),
+        subject_bits=_subject_bits(tutor_ids, tutor_links, subject_bit, words),
+        day_counts=np.array(day_counts, dtype=np.int64),
+        rates=np.array(rates, dtype=np.float64),
+    )
+    return students, tutors
+
+
+def top_k_matches(students, tutors, top_k=TOP_K, chunk_size=64):
+    """Yield ``(student_ids, tutor_ids, scores)`` blocks of the best tutors per student.
+
+    ``tutor_ids`` and ``scores`` have one row per student, best first; entries
+    with a score of 0 are not matches. Peak memory is a few ``chunk_size`` x
+    ``len(tutors.ids)`` arrays regardless of how many students there are.
+    """
+    tutor_count = len(tutors.ids)
+    k = min(top_k, tutor_count)
+    if k == 0:
+        return
+    availability = AVAILABILITY_WEIGHT * tutors.day_counts / len(DAYS)
+
+    # Rank tutors by (rate, id) and fold the rank into the score as a fraction
+    # smaller than the smallest gap between two distinct scores, so a single
+    # argpartition orders by score, then rate, then id.
+    rank = np.empty(tutor_count, dtype=np.float64)
+    rank[np.lexsort((tutors.ids, tutors.rates))] = np.arange(tutor_count)
+    tie_break = 0.1 * rank / tutor_count
+
+    for start in range(0, len(students.ids), chunk_size):
+        stop = start + chunk_size
+        student_bits = students.subject_bits[start:stop]
+
+        overlap = np.zeros((len(student_bits), tutor_count), dtype=np.int64)
+        for word in range(student_bits.shape[1]):
+            overlap += np.bitwise_count(student_bits[:, word, None] & tutors.subject_bits[None, :, word])
+        same_location = students.location_codes[start:stop, None] == tutors.location_codes[None, :]
+
+        scores = SUBJECT_WEIGHT * overlap + LOCATION_WEIGHT * same_location + availability
+        scores[(overlap == 0) & ~same_location] = 0.0
+
+        keys = scores - tie_break
+        best = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(keys, best, axis=1), axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        yield students.ids[start:stop], tutors.ids[best], np.take_along_axis(scores, best, axis=1)
+
+
+def write_matches(student_ids, tutor_ids, scores, batch_size=5000):
+    """Replace the stored matches of one block of students."""
+    matches = [
+        Match(student_id=int(student_id), tutor_id=int(tutor_id), score=float(score))
+        for student_id, row_tutors, row_scores in zip(student_ids, tutor_ids, scores)
+        for tutor_id, score in zip(row_tutors, row_scores)
+        if score > 0
+    ]
+    with transaction.atomic():
+        Match.objects.filter(student_id__in=student_ids.tolist()).delete()
+        Match.objects.bulk_create(matches, batch_size=batch_size)
+    return len(matches)
+
+
+def rematch_all(top_k=TOP_K, chunk_size=64):
+    """Rebuild the whole match table. Returns ``(students, tutors, matches)`` counts."""
+    if np is None:
+        raise ImportError("numpy is required for bulk rematching")
+    students, tutors = load_profiles()
+
+    not_approved = Q(user__is_approved=False) | Q(user__is_rejected=True)
+    Match.objects.filter(
+        Q(student__in=StudentProfile.objects.filter(not_approved))
+        | Q(tutor__in=TutorProfile.objects.filter(not_approved))
+    ).delete()
+    written = 0
+    if not len(tutors.ids):
+        Match.objects.all().delete()
+    for student_ids, tutor_ids, scores in top_k_matches(students, tutors, top_k, chunk_size):
+        written += write_matches(student_ids, tutor_ids, scores)
+    # Match rows are written without signals, so invalidate cached dashboards here
+    bump_listing_version()
+    return len(students.ids), len(tutors.ids), written
@@ -0,0 +1,63 @@
+"""Availability updates and conflict-free session booking.
+
+A booking is accepted when the tutor's weekly availability covers it and
+neither the tutor nor the student has a confirmed booking overlapping it. The
+overlap check is one query over the (tutor, start) and (student, start)
+indexes, bounded by MAX_BOOKING_LENGTH. It runs in the same transaction as
+the insert, after locking both profile rows, the tutor's first. On PostgreSQL
+under READ COMMITTED the overlap query cannot see a concurrent, uncommitted
+insert, so the locks are what serialize bookings per tutor and per student;
+taking them in a fixed order keeps two bookings from deadlocking. On SQLite
+the IMMEDIATE transaction mode already serializes all writers.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from core.availability import decode_slots, encode_slots, local_window
+from core.matching import DAYS
+from core.models import Booking, StudentProfile, TutorProfile, WeeklyAvailability
+
+
+class BookingConflict(Exception):
+    pass
+
+
+class OutsideAvailability(Exception):
+    pass
+
+
+def get_slots(tutor):
+    availability = WeeklyAvailability.objects.filter(tutor=tutor).values(*DAYS).first()
+    return decode_slots(availability or {})
+
+
+def set_availability(tutor, slots):
+    """Replace a tutor's weekly availability and refresh ``available_days`` to match."""
+    masks = encode_slots(slots)
+    with transaction.atomic():
+        WeeklyAvailability.objects.update_or_create(tutor=tutor, defaults=masks)
+        # available_days still feeds match scoring
+        tutor.available_days = ', '.join(day.title() for day in DAYS if masks[day])
+        tutor.save(update_fields=['available_days'])
+    return decode_slots(masks)
+
+
+def book(student, tutor, start, end):
+    """Book ``[start, end)``. Raises OutsideAvailability or BookingConflict when it cannot be booked."""
+    day, mask = local_window(start, end)
+    with transaction.atomic():
+        list(TutorProfile.objects.select_for_update().filter(pk=tutor.pk).values_list('pk'))
+        list(StudentProfile.objects.select_for_update().filter(pk=student.pk).values_list('pk'))
+        free = WeeklyAvailability.objects.filter(tutor=tutor).values_list(day, flat=True).first() or 0
+        if free & mask != mask:
+            raise OutsideAvailability("The tutor is not available at that time.")
+        clash = (
+            Booking.objects.overlapping(start, end)
+            .filter(Q(tutor=tutor) | Q(student=student))
+            .values_list('tutor_id', flat=True).first()
+        )
+        if clash == tutor.pk:
+            raise BookingConflict("The tutor already has a session booked at that time.")
+        if clash is not None:
+            raise BookingConflict("You already have a session booked at that time.")
+        return Booking.objects.create(tutor=tutor, student=student, start=start, end=end)
@@ -0,0 +1,87 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.db.models import Count
+from rest_framework import status
+from rest_framework.response import Response
+
+LISTING_CACHE_ALIAS = 'listings'
+LISTING_VERSION_KEY = 'listing-version'
+
+
+def listing_cache():
+    return caches[LISTING_CACHE_ALIAS]
+
+
+def get_listing_version():
+    cache = listing_cache()
+    cache.add(LISTING_VERSION_KEY, 1, timeout=None)
+    return cache.get(LISTING_VERSION_KEY, 1)
+
+
+def bump_listing_version():
+    """Invalidate every cached listing by moving to a new version."""
+    cache = listing_cache()
+    cache.add(LISTING_VERSION_KEY, 1, timeout=None)
+    try:
+        return cache.incr(LISTING_VERSION_KEY)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(LISTING_VERSION_KEY, 2, timeout=None)
+        return 2
+
+
+def pending_counts():
+    """Number of users awaiting review per role, cached until the listing version changes."""
+    from core.models import User
+
+    cache = listing_cache()
+    key = f"pending-counts:{get_listing_version()}"
+    counts = cache.get(key)
+    if counts is None:
+        counts = {'student': 0, 'tutor': 0}
+        rows = (
+            User.objects.filter(is_approved=False, is_rejected=False, role__in=list(counts))
+            .values_list('role').annotate(n=Count('id'))
+        )
+        counts.update(rows)
+        cache.set(key, counts)
+    return counts
+
+
+class VersionedCacheMixin:
+    """Serve GET responses from the listing cache until the listing version changes.
+
+    The cache key is built from the listing version, the view, the query string
+    and, when ``cache_per_user`` is set, the requesting user. The same key is
+    used as the ETag, so clients sending ``If-None-Match`` get a 304 without
+    touching the ORM or the serializer.
+    """
+    cache_per_user = False
+
+    def get_cache_key(self, request):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        user = request.user.pk if self.cache_per_user else '-'
+        return f"listing:{get_listing_version()}:{type(self).__name__}:{user}:{query}"
+
+    def get(self, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        etag = '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+        cache = listing_cache()
+
+        cached = cache.get(key)
+        if cached is not None:
+            if etag in request.headers.get('If-None-Match', ''):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = Response(cached)
+        else:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(key, response.data)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache' if self.cache_per_user else 'no-cache'
+        return response
@@ -0,0 +1,123 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef, Value
+from django.db.models.functions import Lower
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.availability import filter_free, parse_time, slot_mask
+from core.geo import geocode
+from core.matching import DAYS
+from core.models import Booking, parse_subjects
+
+
+def _parse_number(params, name, cast):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValidationError({name: f"'{value}' is not a valid number."})
+
+
+def filter_tutors(queryset, params, prefix=''):
+    """Apply the tutor search query parameters to a queryset of tutors.
+
+    ``prefix`` is the lookup path to the TutorProfile, e.g. ``'tutor__'`` when
+    filtering Match rows.
+    """
+    # Each subject is its own join on the indexed Subject table, so a
+    # comma-separated list matches tutors teaching all of them.
+    for name in parse_subjects(params.get('subject', '')):
+        queryset = queryset.filter(**{prefix + 'canonical_subjects__name': name})
+
+    location = params.get('location', '').strip()
+    if location:
+        queryset = queryset.filter(**{prefix + 'location__lower': Lower(Value(location))})
+
+    gender = params.get('gender', '').strip()
+    if gender:
+        queryset = queryset.filter(**{prefix + 'gender__lower': Lower(Value(gender))})
+
+    min_rate = _parse_number(params, 'min_rate', Decimal)
+    if min_rate is not None:
+        queryset = queryset.filter(**{prefix + 'hourly_rate__gte': min_rate})
+
+    max_rate = _parse_number(params, 'max_rate', Decimal)
+    if max_rate is not None:
+        queryset = queryset.filter(**{prefix + 'hourly_rate__lte': max_rate})
+
+    min_experience = _parse_number(params, 'min_experience', int)
+    if min_experience is not None:
+        queryset = queryset.filter(**{prefix + 'experience_years__gte': min_experience})
+
+    max_experience = _parse_number(params, 'max_experience', int)
+    if max_experience is not None:
+        queryset = queryset.filter(**{prefix + 'experience_years__lte': max_experience})
+
+    return filter_availability(queryset, params, prefix)
+
+
+def filter_availability(queryset, params, prefix=''):
+    """Keep tutors free from ``free_from`` to ``free_to`` on ``free_day`` (weekly) or ``free_date``.
+
+    A date also excludes tutors with a confirmed booking overlapping the window.
+    """
+    day, on_date = params.get('free_day', '').strip().lower()[:3], params.get('free_date', '').strip()
+    if not (day or on_date):
+        return queryset
+    try:
+        start, end = parse_time(params.get('free_from', '00:00')), parse_time(params.get('free_to', '24:00'))
+        mask = slot_mask(start, end)
+    except ValueError as exc:
+        raise ValidationError({'free_from': str(exc)})
+
+    if on_date:
+        try:
+            on_date = date.fromisoformat(on_date)
+        except ValueError:
+            raise ValidationError({'free_date': f"'{on_date}' is not a date in YYYY-MM-DD format."})
+        day = DAYS[on_date.weekday()]
+    elif day not in DAYS:
+        raise ValidationError({'free_day': f"Use one of {', '.join(DAYS)}."})
+
+    queryset = filter_free(queryset, day, mask, prefix)
+    if on_date:
+        midnight = timezone.make_aware(datetime.combine(on_date, time()))
+        window_start, window_end = midnight + timedelta(minutes=start), midnight + timedelta(minutes=end)
+        booked = Booking.objects.overlapping(window_start, window_end).filter(tutor=OuterRef(prefix + 'pk'))
+        queryset = queryset.filter(~Exists(booked))
+    return queryset
+
+
+def parse_proximity(params, profile=None, default_radius=10, max_radius=100):
+    """Read ``(latitude, longitude, radius_km)`` for a radius search.
+
+    The centre is ``lat``/``lon`` when given, else the gazetteer entry for
+    ``near``, else ``profile``'s stored coordinates.
+    """
+    latitude = _parse_number(params, 'lat', float)
+    longitude = _parse_number(params, 'lon', float)
+    near = params.get('near', '').strip()
+    if (latitude is None) != (longitude is None):
+        raise ValidationError({'lat': "lat and lon must be given together."})
+    if latitude is not None:
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({'lat': "lat must be within +/-90 and lon within +/-180."})
+    elif near:
+        coordinates = geocode(near)
+        if coordinates is None:
+            raise ValidationError({'near': f"Unknown place '{near}'."})
+        latitude, longitude = coordinates
+    elif profile is not None and profile.latitude is not None:
+        latitude, longitude = profile.latitude, profile.longitude
+    else:
+        raise ValidationError({'near': "Your location could not be geocoded; pass near, or lat and lon."})
+
+    radius = _parse_number(params, 'radius', float)
+    radius = default_radius if radius is None else radius
+    if not 0 < radius <= max_radius:
+        raise ValidationError({'radius': f"Must be more than 0 and at most {max_radius} km."})
+    return latitude, longitude, radius
@@ -0,0 +1,213 @@
+"""Offline geocoding and geohash-indexed proximity search.
+
+Profile locations are free text. They are resolved without any network access
+against the gazetteer at ``settings.GAZETTEER_PATH``: a CSV of
+``name,latitude,longitude`` rows, where alternative spellings are simply more
+rows. Each geocoded profile stores its coordinates and their geohash.
+
+A radius query covers the circle's bounding box with at most
+``MAX_COVER_CELLS`` geohash cells, turns each cell into a range on the indexed
+geohash column, and only computes exact great-circle distances for the rows
+left after that.
+"""
+import csv
+import math
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # cells of roughly 5 x 5 m
+MAX_COVER_CELLS = 16
+
+
+def normalize_place(text):
+    return ' '.join(re.sub(r'[^\w\s-]', ' ', text or '').split()).lower()
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer(path=None):
+    """Read the gazetteer into ``{normalized name: (latitude, longitude)}``."""
+    places = {}
+    with open(path or settings.GAZETTEER_PATH, newline='', encoding='utf-8') as source:
+        rows = csv.reader(line for line in source if line.strip() and not line.startswith('#'))
+        header = next(rows, None)
+        if header != ['name', 'latitude', 'longitude']:
+            raise ValueError(f"Gazetteer header must be name,latitude,longitude, not {header}")
+        for name, latitude, longitude in rows:
+            places.setdefault(normalize_place(name), (float(latitude), float(longitude)))
+    return places
+
+
+def geocode(location):
+    """Resolve a free-text location to ``(latitude, longitude)``, or None if it is not in the gazetteer.
+
+    The whole string is tried first, then each comma-separated part from the
+    most specific, so "Edappally, Kochi, Kerala" finds Edappally and
+    "Somewhere, Kochi" falls back to Kochi.
+    """
+    places = load_gazetteer()
+    candidates = [location] + (location or '').split(',')
+    for candidate in candidates:
+        coordinates = places.get(normalize_place(candidate))
+        if coordinates is not None:
+            return coordinates
+    return None
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def geocode_rows(model, chunk_size=2000):
+    """Re-geocode every row of a profile model, a chunk of primary keys at a time.
+
+    Works with historical models in migrations. Returns the number of rows
+    whose coordinates changed.
+    """
+    fields = ['latitude', 'longitude', 'geohash']
+    changed, last_pk = 0, 0
+    while True:
+        chunk = list(model.objects.filter(pk__gt=last_pk).order_by('pk').only('location', *fields)[:chunk_size])
+        if not chunk:
+            return changed
+        last_pk = chunk[-1].pk
+        stale = []
+        for profile in chunk:
+            coordinates = geocode(profile.location)
+            values = (*coordinates, encode_geohash(*coordinates)) if coordinates else (None, None, '')
+            if values != (profile.latitude, profile.longitude, profile.geohash):
+                profile.latitude, profile.longitude, profile.geohash = values
+                stale.append(profile)
+        model.objects.bulk_update(stale, fields)
+        changed += len(stale)
+
+
+def cell_size(precision):
+    """Height and width in degrees of a geohash cell."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """``(min_lat, max_lat, min_lon, max_lon)`` around a circle; longitudes may run past +/-180."""
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(-90.0, latitude - dlat), min(90.0, latitude + dlat)
+    if min_lat == -90.0 or max_lat == 90.0:
+        return min_lat, max_lat, -180.0, 180.0
+    # Widest at the latitude nearest a pole
+    dlon = dlat / math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if dlon >= 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, longitude - dlon, longitude + dlon
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """The longest geohash prefixes, at most MAX_COVER_CELLS, whose cells cover the circle.
+
+    Returns an empty list when even one-character cells cannot cover it that
+    cheaply, in which case the geohash index cannot narrow the search.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = range(math.floor((min_lat + 90) / height), min(math.floor((max_lat + 90) / height),
+                                                               round(180 / height) - 1) + 1)
+        columns = range(math.floor((min_lon + 180) / width), math.floor((max_lon + 180) / width) + 1)
+        if len(rows) * len(columns) > MAX_COVER_CELLS:
+            continue
+        columns_around = round(360 / width)
+        return sorted({
+            encode_geohash(-90 + (row + 0.5) * height, -180 + (column % columns_around + 0.5) * width, precision)
+            for row in rows for column in columns
+        })
+    return []
+
+
+def _next_prefix(prefix):
+    """The next geohash of the same length, which sorts after every hash starting with ``prefix``."""
+    head = prefix.rstrip(GEOHASH_ALPHABET[-1])
+    if not head:
+        return None
+    carried = len(prefix) - len(head)
+    return head[:-1] + GEOHASH_ALPHABET[GEOHASH_ALPHABET.index(head[-1]) + 1] + GEOHASH_ALPHABET[0] * carried
+
+
+def geohash_ranges(prefixes):
+    """Merge sorted prefixes into ``(start, end)`` ranges; ``end`` is exclusive, None for unbounded."""
+    ranges = []
+    for prefix in prefixes:
+        end = _next_prefix(prefix)
+        if ranges and ranges[-1][1] == prefix:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((prefix, end))
+    return ranges
+
+
+def distance_expression(latitude, longitude, prefix=''):
+    """Great-circle distance in km from a point to a profile's stored coordinates, as an ORM expression."""
+    row_lat = Radians(F(prefix + 'latitude'))
+    a = (
+        Power(Sin((row_lat - Value(math.radians(latitude))) / 2), 2)
+        + Value(math.cos(math.radians(latitude))) * Cos(row_lat)
+        * Power(Sin((Radians(F(prefix + 'longitude')) - Value(math.radians(longitude))) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Sqrt(a), Value(1.0)), output_field=FloatField())
+
+
+def within_radius(queryset, latitude, longitude, radius_km, prefix=''):
+    """Profiles within ``radius_km`` of a point, annotated with ``distance_km`` and nearest first.
+
+    ``prefix`` is the lookup path to the profile, as in core.filters.filter_tutors.
+    """
+    # Ranges on the indexed geohash column pick the candidate cells ...
+    cells = Q()
+    for start, end in geohash_ranges(covering_prefixes(latitude, longitude, radius_km)):
+        cell = Q(**{prefix + 'geohash__gte': start})
+        if end is not None:
+            cell &= Q(**{prefix + 'geohash__lt': end})
+        cells |= cell
+    queryset = queryset.filter(cells, **{prefix + 'latitude__isnull': False})
+
+    # ... the bounding box trims their corners ...
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    queryset = queryset.filter(**{prefix + 'latitude__range': (min_lat, max_lat)})
+    if min_lon >= -180 and max_lon <= 180:
+        queryset = queryset.filter(**{prefix + 'longitude__range': (min_lon, max_lon)})
+
+    # ... and only the rows left get the exact distance
+    return (
+        queryset.annotate(distance_km=distance_expression(latitude, longitude, prefix))
+        .filter(distance_km__lte=radius_km)
+        .order_by('distance_km', prefix + 'id')
+    )
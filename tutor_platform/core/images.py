@@ -0,0 +1,134 @@
+"""Profile image pipeline: one decode per upload, fixed thumbnail sizes.
+
+Thumbnails are written next to the original as ``<name>_<size>.<ext>``.
+Once the process_profile_image job has written them it records the image
+name in the profile's ``*_processed`` column, and the URLs are derived from
+that name alone, so listings never link to thumbnails that do not exist yet.
+Rendering works on file paths only, so a worker renders all the images it
+claimed at once in a process pool.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+# Longest edge in pixels for each derived size
+THUMBNAIL_SIZES = {
+    'small': 96,
+    'medium': 320,
+}
+# Uploaded originals are scaled down to fit this box
+MAX_IMAGE_SIZE = (2048, 2048)
+
+
+def _has_webp():
+    try:
+        from PIL import features
+    except ImportError:
+        return False
+    return features.check('webp')
+
+
+THUMBNAIL_FORMAT, THUMBNAIL_EXTENSION = ('WEBP', 'webp') if _has_webp() else ('JPEG', 'jpg')
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 4},
+    'JPEG': {'quality': 80, 'optimize': True},
+}
+# The original is re-encoded at most once, when it must be rotated, shrunk or stripped
+ORIGINAL_SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+_pool = None
+
+
+def thumbnail_name(name, size):
+    root, _ = os.path.splitext(name)
+    return f"{root}_{size}.{THUMBNAIL_EXTENSION}"
+
+
+def thumbnail_urls(name, storage=default_storage):
+    """Map each thumbnail size to its URL, or None when no processed image is recorded."""
+    if not name:
+        return None
+    return {size: storage.url(thumbnail_name(name, size)) for size in THUMBNAIL_SIZES}
+
+
+def render_image(path):
+    """Normalize the original at ``path`` in place and write its thumbnails beside it.
+
+    EXIF orientation is applied and every output is saved without metadata.
+    The original is only rewritten when it is too large or still carries
+    EXIF data, so a retried job does not re-encode it again. Returns the
+    paths written.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as original:
+        image_format = original.format
+        too_large = original.width > MAX_IMAGE_SIZE[0] or original.height > MAX_IMAGE_SIZE[1]
+        rewrite = too_large or 'exif' in original.info
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail(MAX_IMAGE_SIZE)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    written = []
+    if rewrite:
+        _save_replacing(image, path, image_format, ORIGINAL_SAVE_OPTIONS.get(image_format, {}))
+        written.append(path)
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA')
+    if THUMBNAIL_FORMAT == 'JPEG' and image.mode == 'RGBA':
+        image = image.convert('RGB')
+    for size, edge in THUMBNAIL_SIZES.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((edge, edge))
+        target = thumbnail_name(path, size)
+        _save_replacing(thumbnail, target, THUMBNAIL_FORMAT, SAVE_OPTIONS[THUMBNAIL_FORMAT])
+        written.append(target)
+    return written
+
+
+def _save_replacing(image, path, image_format, options):
+    # Write beside the target and rename, so a failed attempt never leaves a truncated file
+    partial = f'{path}.partial'
+    try:
+        image.save(partial, format=image_format, **options)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=getattr(settings, 'IMAGE_PROCESS_WORKERS', None))
+    return _pool
+
+
+def render_images(paths):
+    """Run render_image on each path, in the process pool unless IMAGE_PROCESS_WORKERS is 0.
+
+    Returns one outcome per path: the paths written, or the exception raised.
+    """
+    global _pool
+    if getattr(settings, 'IMAGE_PROCESS_WORKERS', None) == 0 or len(paths) < 2:
+        futures = None
+    else:
+        futures = [get_pool().submit(render_image, path) for path in paths]
+    outcomes = []
+    for index, path in enumerate(paths):
+        try:
+            outcomes.append(render_image(path) if futures is None else futures[index].result())
+        except BrokenProcessPool as exc:
+            # A crashed child breaks the pool for good; the next batch starts a new one
+            _pool = None
+            outcomes.append(exc)
+        except Exception as exc:
+            outcomes.append(exc)
+    return outcomes
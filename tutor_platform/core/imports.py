@@ -0,0 +1,232 @@
+"""Bulk registration import from CSV or JSONL.
+
+Rows are validated with the registration serializers' own rules, except that
+email and mobile number uniqueness is checked once per batch instead of with
+two queries per row. Valid rows are inserted with bulk_create: users,
+profiles, subject links and tokens, in one transaction per batch. Passwords
+are hashed in a process pool. Imported accounts await review like any other
+registration.
+
+Uploaded files and error reports hold passwords and rejected rows, so the
+admin API keeps them in ``import_storage()``, outside MEDIA_ROOT.
+
+Every rejected row is written to the error report as one JSON line:
+``{"line": 12, "email": "...", "errors": {...}}``.
+"""
+import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+from rest_framework.validators import UniqueValidator
+
+from core.cache import bump_listing_version
+from core.models import StudentProfile, Subject, TutorProfile, User, parse_subjects
+from core.serializers import StudentRegistrationSerializer, TutorRegistrationSerializer
+
+FORMATS = ('csv', 'jsonl')
+UNIQUE_FIELDS = ('email', 'mobile_number')
+# Profile fields taken from each row; uploads cannot be imported
+PROFILE_FIELDS = {
+    'student': ('full_name', 'class_name', 'required_subjects', 'location'),
+    'tutor': ('full_name', 'gender', 'location', 'qualification', 'experience_years', 'hourly_rate',
+              'subjects', 'description', 'available_days'),
+}
+
+_pool = None
+
+
+def _without_unique_validators(serializer_class):
+    class ImportSerializer(serializer_class):
+        def get_fields(self):
+            fields = super().get_fields()
+            for name in UNIQUE_FIELDS:
+                fields[name].validators = [
+                    validator for validator in fields[name].validators if not isinstance(validator, UniqueValidator)
+                ]
+            return fields
+
+    ImportSerializer.__name__ = f'Import{serializer_class.__name__}'
+    return ImportSerializer
+
+
+SERIALIZERS = {
+    'student': _without_unique_validators(StudentRegistrationSerializer),
+    'tutor': _without_unique_validators(TutorRegistrationSerializer),
+}
+PROFILE_MODELS = {'student': StudentProfile, 'tutor': TutorProfile}
+SUBJECT_FIELDS = {'student': 'required_subjects', 'tutor': 'subjects'}
+
+
+def import_storage():
+    """Storage for uploaded import files and their error reports, under IMPORT_ROOT; it has no URL."""
+    return FileSystemStorage(location=settings.IMPORT_ROOT, base_url=None)
+
+
+def detect_format(name):
+    return 'jsonl' if str(name).lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(stream, file_format):
+    """Yield ``(line, row)`` from a text stream; ``row`` is None for unparseable JSONL lines."""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty cells count as missing, as they would in a form post
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+        return
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None
+
+
+def _encode(hasher, password):
+    return hasher.encode(password, hasher.salt())
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=getattr(settings, 'PASSWORD_HASH_WORKERS', None))
+    return _pool
+
+
+def hash_passwords(passwords):
+    """Hash with the default hasher in the process pool, or inline when PASSWORD_HASH_WORKERS is 0."""
+    hasher = get_hasher('default')
+    if getattr(settings, 'PASSWORD_HASH_WORKERS', None) == 0 or len(passwords) < 2:
+        return [_encode(hasher, password) for password in passwords]
+    return list(get_pool().map(_encode, repeat(hasher), passwords, chunksize=max(1, len(passwords) // 32)))
+
+
+class Importer:
+    """Validate and insert rows for one role, collecting per-row errors."""
+
+    def __init__(self, role, batch_size=1000):
+        if role not in SERIALIZERS:
+            raise ValueError(f"Unknown role '{role}'")
+        self.role = role
+        self.batch_size = batch_size
+        self.created = 0
+        self.errors = []
+        self._seen = {name: set() for name in UNIQUE_FIELDS}
+
+    def run(self, rows):
+        """Import ``(line, row)`` pairs. Returns ``{"created", "failed"}`` counts."""
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            self._import_batch(batch)
+        if self.created:
+            bump_listing_version()
+        return {'created': self.created, 'failed': len(self.errors)}
+
+    def _reject(self, line, row, errors):
+        self.errors.append({'line': line, 'email': (row or {}).get('email'), 'errors': errors})
+
+    def _import_batch(self, batch):
+        valid = []
+        for line, row in batch:
+            if row is None:
+                self._reject(line, row, {'non_field_errors': ["Not a JSON object"]})
+                continue
+            serializer = SERIALIZERS[self.role](data=row)
+            if not serializer.is_valid():
+                self._reject(line, row, serializer.errors)
+                continue
+            data = serializer.validated_data
+            data['email'] = User.objects.normalize_email(data['email'])
+            valid.append((line, row, data))
+
+        taken = {
+            'email': set(User.objects.filter(email__in=[data['email'] for _, _, data in valid])
+                         .values_list('email', flat=True)),
+            'mobile_number': set(User.objects.filter(
+                mobile_number__in=[data['mobile_number'] for _, _, data in valid if data.get('mobile_number')]
+            ).values_list('mobile_number', flat=True)),
+        }
+        accepted = []
+        for line, row, data in valid:
+            errors = {}
+            for name in UNIQUE_FIELDS:
+                value = data.get(name)
+                if value and (value in taken[name] or value in self._seen[name]):
+                    errors[name] = [f"user with this {name.replace('_', ' ')} already exists."]
+            if errors:
+                self._reject(line, row, errors)
+                continue
+            for name in UNIQUE_FIELDS:
+                if data.get(name):
+                    self._seen[name].add(data[name])
+            accepted.append((line, row, data))
+        if not accepted:
+            return
+
+        hashes = hash_passwords([data['password'] for _, _, data in accepted])
+        try:
+            with transaction.atomic():
+                self._insert([data for _, _, data in accepted], hashes)
+        except IntegrityError:
+            # Someone registered one of these addresses since the check; retry row by row
+            for (line, row, data), password in zip(accepted, hashes):
+                try:
+                    with transaction.atomic():
+                        self._insert([data], [password])
+                except IntegrityError as exc:
+                    self._reject(line, row, {'non_field_errors': [str(exc)]})
+                else:
+                    self.created += 1
+            return
+        self.created += len(accepted)
+
+    def _insert(self, rows, hashes):
+        users = User.objects.bulk_create([
+            User(email=data['email'], mobile_number=data.get('mobile_number'), password=password, role=self.role)
+            for data, password in zip(rows, hashes)
+        ])
+        profile_model = PROFILE_MODELS[self.role]
+        profiles = [
+            profile_model(user=user, **{name: data[name] for name in PROFILE_FIELDS[self.role] if name in data})
+            for user, data in zip(users, rows)
+        ]
+        for profile in profiles:
+            profile.geocode()
+        profile_model.objects.bulk_create(profiles)
+
+        subject_field = SUBJECT_FIELDS[self.role]
+        names = [parse_subjects(data[subject_field]) for data in rows]
+        subjects = {subject.name: subject for subject in Subject.objects.resolve(
+            ', '.join(sorted({name for row_names in names for name in row_names}))
+        )}
+        through = profile_model.canonical_subjects.through
+        profile_column = f'{profile_model._meta.model_name}_id'
+        through.objects.bulk_create([
+            through(**{profile_column: profile.pk, 'subject_id': subjects[name].pk})
+            for profile, row_names in zip(profiles, names) for name in row_names
+        ])
+
+        Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+
+
+def import_file(stream, role, file_format='csv', batch_size=1000, report=None):
+    """Import a text stream and write rejected rows to ``report`` as JSON lines. Returns the counts."""
+    importer = Importer(role, batch_size=batch_size)
+    summary = importer.run(read_rows(stream, file_format))
+    if report is not None:
+        for error in sorted(importer.errors, key=lambda error: error['line']):
+            report.write(json.dumps(error, default=str) + '\n')
+    return summary
+
+
+def open_text(binary):
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
@@ -0,0 +1,206 @@
+"""A small job queue with a database outbox; no external broker.
+
+``enqueue()`` writes a Job row in the caller's transaction, so a job exists
+exactly when the request that created it commits. ``manage.py run_jobs``
+claims due jobs, runs the registered handler and retries failures with
+exponential backoff; handlers registered with ``batch=True`` get all of a
+worker's claimed jobs of their name in one call. While a worker holds claimed
+jobs, a heartbeat thread keeps their ``locked_at`` fresh; jobs whose worker
+died are claimed again after STALE_AFTER, or marked failed once they are out
+of attempts. With ``JOBS_EAGER = True`` jobs run in-process right after
+commit instead, which is what the tests use.
+"""
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+batch_handlers = set()
+failure_handlers = {}
+
+# Retry delays grow as RETRY_BASE_DELAY * 2 ** (attempts - 1) seconds
+RETRY_BASE_DELAY = 30
+# Running jobs whose worker has sent no heartbeat within this time are claimed again
+STALE_AFTER = timedelta(minutes=10)
+HEARTBEAT_INTERVAL = timedelta(minutes=1)
+
+
+def job(name, batch=False, on_failure=None):
+    """Register a function as the handler for jobs called ``name``.
+
+    A ``batch`` handler is called once with the payloads of every such job a
+    worker claimed, and returns one outcome per payload: the job's result, or
+    the exception it failed with. ``on_failure`` is called with the payload
+    once a job is marked failed for good, to clean up after it.
+    """
+    def register(func):
+        handlers[name] = func
+        if batch:
+            batch_handlers.add(name)
+        else:
+            batch_handlers.discard(name)
+        if on_failure is None:
+            failure_handlers.pop(name, None)
+        else:
+            failure_handlers[name] = on_failure
+        return func
+    return register
+
+
+def enqueue(name, **payload):
+    if name not in handlers:
+        raise KeyError(f"No job handler registered for '{name}'")
+    queued = Job.objects.create(name=name, payload=payload)
+    if getattr(settings, 'JOBS_EAGER', False):
+        transaction.on_commit(lambda: run_job(queued))
+    return queued
+
+
+def claim_jobs(limit):
+    """Mark up to ``limit`` due jobs as running and return them."""
+    now = timezone.now()
+    stale = Q(status='running', locked_at__lt=now - STALE_AFTER)
+    due = Job.objects.filter(Q(status='pending', run_after__lte=now) | stale).order_by('run_after', 'id')
+    exhausted = Job.objects.filter(stale, attempts__gte=F('max_attempts'))
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+            exhausted = exhausted.select_for_update(skip_locked=True)
+        # A job whose worker keeps dying never reaches the retry path in run_job
+        given_up = list(exhausted)
+        Job.objects.filter(id__in=[queued.pk for queued in given_up]).update(
+            status='failed', locked_at=None, last_error='The worker stopped without finishing the job.',
+        )
+        ids = list(due.values_list('id', flat=True)[:limit])
+        Job.objects.filter(id__in=ids).update(status='running', locked_at=now, attempts=F('attempts') + 1)
+    for queued in given_up:
+        run_failure_handler(queued)
+    return list(Job.objects.filter(id__in=ids).order_by('run_after', 'id'))
+
+
+def run_job(queued):
+    """Run one job and record the outcome. Returns True if it succeeded."""
+    if queued.status == 'pending':
+        queued.attempts += 1
+    try:
+        if queued.name in batch_handlers:
+            [result] = handlers[queued.name]([queued.payload])
+            if isinstance(result, Exception):
+                raise result
+        else:
+            result = handlers[queued.name](**queued.payload)
+    except Exception:
+        return record_outcome(queued, error=traceback.format_exc())
+    return record_outcome(queued, result=result)
+
+
+def run_batch(name, batch):
+    """Run claimed jobs of a batch handler with a single call. Returns one success flag per job."""
+    try:
+        outcomes = handlers[name]([queued.payload for queued in batch])
+    except Exception:
+        error = traceback.format_exc()
+        return [record_outcome(queued, error=error) for queued in batch]
+    return [
+        record_outcome(queued, error=''.join(traceback.format_exception(outcome)))
+        if isinstance(outcome, Exception) else record_outcome(queued, result=outcome)
+        for queued, outcome in zip(batch, outcomes)
+    ]
+
+
+def record_outcome(queued, result=None, error=None):
+    """Mark a job done, or schedule its retry when ``error`` is set. Returns True if it succeeded."""
+    if error is not None:
+        logger.warning("Job %s #%s failed (attempt %s)", queued.name, queued.pk, queued.attempts)
+        if queued.attempts >= queued.max_attempts:
+            status, run_after = 'failed', queued.run_after
+        else:
+            status = 'pending'
+            run_after = timezone.now() + timedelta(seconds=RETRY_BASE_DELAY * 2 ** (queued.attempts - 1))
+        Job.objects.filter(pk=queued.pk).update(
+            status=status, run_after=run_after, attempts=queued.attempts, last_error=error, locked_at=None
+        )
+        if status == 'failed':
+            run_failure_handler(queued)
+        return False
+    Job.objects.filter(pk=queued.pk).update(
+        status='done', attempts=queued.attempts, last_error='', locked_at=None, result=result
+    )
+    return True
+
+
+def run_failure_handler(queued):
+    """Call the ``on_failure`` handler of a job that will not be retried, if it has one."""
+    if queued.name not in failure_handlers:
+        return
+    try:
+        failure_handlers[queued.name](**queued.payload)
+    except Exception:
+        logger.exception("Failure handler of job %s #%s failed", queued.name, queued.pk)
+
+
+class Heartbeat(threading.Thread):
+    """Refresh ``locked_at`` of claimed jobs until they finish, so no other worker claims them."""
+
+    def __init__(self, job_ids):
+        super().__init__(name='job-heartbeat', daemon=True)
+        self.job_ids = set(job_ids)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def finished(self, job_id):
+        with self._lock:
+            self.job_ids.discard(job_id)
+
+    def beat(self):
+        with self._lock:
+            job_ids = list(self.job_ids)
+        try:
+            Job.objects.filter(id__in=job_ids, status='running').update(locked_at=timezone.now())
+        except DatabaseError:
+            logger.warning("Job heartbeat failed", exc_info=True)
+
+    def run(self):
+        try:
+            while not self._stopped.wait(HEARTBEAT_INTERVAL.total_seconds()):
+                self.beat()
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def run_pending(limit=100):
+    """Claim and run one batch of due jobs. Returns (succeeded, failed) counts."""
+    succeeded = failed = 0
+    claimed = claim_jobs(limit)
+    if not claimed:
+        return succeeded, failed
+    heartbeat = Heartbeat(queued.pk for queued in claimed)
+    heartbeat.start()
+    try:
+        # Jobs of a batch handler run together, the others one at a time
+        batches = {}
+        for queued in claimed:
+            batches.setdefault(queued.name if queued.name in batch_handlers else queued.pk, []).append(queued)
+        for key, batch in batches.items():
+            outcomes = run_batch(key, batch) if key in batch_handlers else [run_job(batch[0])]
+            succeeded += sum(outcomes)
+            failed += len(outcomes) - sum(outcomes)
+            for queued in batch:
+                heartbeat.finished(queued.pk)
+    finally:
+        heartbeat.stop()
+    return succeeded, failed
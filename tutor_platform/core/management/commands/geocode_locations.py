@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cache import bump_listing_version
+from core.geo import geocode_rows
+from core.models import StudentProfile, TutorProfile
+
+
+class Command(BaseCommand):
+    help = "Re-resolve every profile location against the gazetteer, e.g. after GAZETTEER_PATH changes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Profiles read and updated per batch.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive")
+        changed = 0
+        for model in (StudentProfile, TutorProfile):
+            updated = geocode_rows(model, options['chunk_size'])
+            changed += updated
+            self.stdout.write(f"{model._meta.verbose_name}: {updated} updated")
+        if changed:
+            # bulk_update sends no signals
+            bump_listing_version()
+        self.stdout.write(self.style.SUCCESS(f"Updated coordinates of {changed} profiles"))
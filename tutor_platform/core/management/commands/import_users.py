@@ -0,0 +1,37 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import FORMATS, detect_format, import_file
+
+
+class Command(BaseCommand):
+    help = "Register students or tutors in bulk from a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV with a header row, or JSONL with one object per line; '-' for stdin.")
+        parser.add_argument('--role', choices=['student', 'tutor'], required=True)
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension (.jsonl/.ndjson or CSV).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows validated and inserted per transaction.")
+        parser.add_argument('--report', default='import-errors.jsonl', help="Where rejected rows are written.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+        file_format = options['format'] or detect_format(options['path'])
+
+        started = time.perf_counter()
+        try:
+            source = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(exc)
+        with source, open(options['report'], 'w') as report:
+            summary = import_file(source, options['role'], file_format, options['batch_size'], report=report)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} {options['role']}s in {elapsed:.2f}s; {summary['failed']} rows rejected"
+        ))
+        if summary['failed']:
+            self.stdout.write(f"Rejected rows written to {options['report']}")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import PasswordResetToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired password reset tokens in small chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help="Rows deleted per statement; keeps each write lock short.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive")
+        deleted = PasswordResetToken.objects.purge_expired(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired reset tokens"))
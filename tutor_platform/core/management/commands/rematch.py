@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import batch_matching
+from core.matching import TOP_K
+
+
+class Command(BaseCommand):
+    help = "Recompute the match table for every approved student in vectorized batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K, help="Tutors kept per student.")
+        parser.add_argument('--chunk-size', type=int, default=64,
+                            help="Students scored per batch; bounds peak memory.")
+
+    def handle(self, *args, **options):
+        if batch_matching.np is None:
+            raise CommandError("numpy is required for bulk rematching (pip install numpy)")
+        if options['top_k'] < 1 or options['chunk_size'] < 1:
+            raise CommandError("--top-k and --chunk-size must be positive")
+
+        started = time.perf_counter()
+        students, tutors, matches = batch_matching.rematch_all(options['top_k'], options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Rematched {students} students against {tutors} tutors: "
+            f"{matches} matches written in {elapsed:.2f}s"
+        ))
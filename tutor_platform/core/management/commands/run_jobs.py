@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs from the database outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run one batch of due jobs and exit.")
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--sleep', type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            succeeded, failed = jobs.run_pending(options['batch_size'])
+            if succeeded or failed:
+                self.stdout.write(f"Ran {succeeded + failed} jobs: {succeeded} succeeded, {failed} failed")
+            if options['once']:
+                break
+            if not (succeeded or failed):
+                time.sleep(options['sleep'])
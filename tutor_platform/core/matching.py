@@ -0,0 +1,226 @@
+import re
+
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from core.models import Match, StudentProfile, TutorProfile, approved
+
+SUBJECT_WEIGHT = 10.0
+LOCATION_WEIGHT = 5.0
+AVAILABILITY_WEIGHT = 2.0
+
+# Number of tutors kept per student, best first (score, then cheaper, then older).
+TOP_K = 100
+
+# Profile fields that feed the score or its tie-break; saves that touch none of them skip rematching
+STUDENT_MATCH_FIELDS = frozenset({'location'})
+TUTOR_MATCH_FIELDS = frozenset({'location', 'available_days', 'hourly_rate'})
+
+DAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+ALL_DAYS = (1 << len(DAYS)) - 1
+DAY_GROUPS = {
+    'weekdays': 0b0011111,
+    'weekday': 0b0011111,
+    'weekends': 0b1100000,
+    'weekend': 0b1100000,
+    'everyday': ALL_DAYS,
+    'daily': ALL_DAYS,
+    'all': ALL_DAYS,
+}
+
+
+def _day_index(token):
+    token = token[:3]
+    return DAYS.index(token) if token in DAYS else None
+
+
+def parse_days(text):
+    """Encode a free-form day list such as "Mon, Wed" or "Mon-Fri" as a 7-bit mask."""
+    mask = 0
+    text = (text or '').lower()
+    for start, end in re.findall(r'([a-z]+)\s*(?:-|to)\s*([a-z]+)', text):
+        first, last = _day_index(start), _day_index(end)
+        if first is None or last is None:
+            continue
+        day = first
+        while True:
+            mask |= 1 << day
+            if day == last:
+                break
+            day = (day + 1) % len(DAYS)
+    for token in re.findall(r'[a-z]+', text):
+        if token in DAY_GROUPS:
+            mask |= DAY_GROUPS[token]
+        elif _day_index(token) is not None:
+            mask |= 1 << _day_index(token)
+    return mask
+
+
+def normalize_location(text):
+    return ' '.join((text or '').split()).lower()
+
+
+def score_pair(subject_overlap, same_location, day_mask):
+    """Score a student/tutor pair; pairs sharing neither a subject nor a location score 0."""
+    if not subject_overlap and not same_location:
+        return 0.0
+    return (
+        SUBJECT_WEIGHT * subject_overlap
+        + LOCATION_WEIGHT * same_location
+        + AVAILABILITY_WEIGHT * bin(day_mask).count('1') / len(DAYS)
+    )
+
+
+def _approved(queryset):
+    return queryset.filter(approved('user__'))
+
+
+def rematch_student(student):
+    """Rebuild the top-K tutor matches for one student."""
+    if not (student.user.is_approved and not student.user.is_rejected):
+        Match.objects.filter(student=student).delete()
+        return 0
+
+    subject_ids = list(student.canonical_subjects.values_list('id', flat=True))
+    overlap = dict(
+        TutorProfile.canonical_subjects.through.objects
+        .filter(approved('tutorprofile__user__'), subject_id__in=subject_ids)
+        .values_list('tutorprofile_id')
+        .annotate(n=Count('id'))
+    )
+    location = normalize_location(student.location)
+    same_location = set(
+        _approved(TutorProfile.objects.filter(location__lower=location)).values_list('id', flat=True)
+    ) if location else set()
+
+    scored = []
+    candidates = TutorProfile.objects.filter(id__in=set(overlap) | same_location)
+    rows = candidates.values_list('id', 'location', 'available_days', 'hourly_rate')
+    for tutor_id, tutor_location, available_days, hourly_rate in rows:
+        score = score_pair(
+            overlap.get(tutor_id, 0),
+            normalize_location(tutor_location) == location,
+            parse_days(available_days),
+        )
+        if score > 0:
+            scored.append((score, hourly_rate, tutor_id))
+    # Ties go to the cheaper tutor, then the older profile.
+    scored.sort(key=lambda item: (-item[0], item[1], item[2]))
+
+    with transaction.atomic():
+        Match.objects.filter(student=student).delete()
+        Match.objects.bulk_create(
+            [Match(student=student, tutor_id=tutor_id, score=score) for score, _, tutor_id in scored[:TOP_K]]
+        )
+    return min(len(scored), TOP_K)
+
+
+def _refill(student_ids):
+    # These students lost a tutor from a full list; only a rebuild finds the next best one
+    students = StudentProfile.objects.filter(id__in=student_ids).select_related('user')
+    for student in students:
+        rematch_student(student)
+
+
+def _full_lists(student_ids, tutor):
+    """Per student, the matches ranked TOP_K - 1 and lower among those with other tutors.
+
+    Returns ``{student_id: {position: (match_id, score, hourly_rate, tutor_id)}}``.
+    """
+    ranked = (
+        Match.objects.filter(student_id__in=student_ids).exclude(tutor=tutor)
+        .annotate(position=Window(
+            RowNumber(), partition_by=[F('student_id')],
+            order_by=[F('score').desc(), F('tutor__hourly_rate').asc(), F('tutor_id').asc()],
+        ))
+        .filter(position__gte=TOP_K - 1)
+        .values_list('student_id', 'position', 'id', 'score', 'tutor__hourly_rate', 'tutor_id')
+    )
+    lists = {}
+    for student_id, position, *match in ranked:
+        lists.setdefault(student_id, {})[position] = tuple(match)
+    return lists
+
+
+def rematch_tutor(tutor):
+    """Update one tutor's place in the top-K list of every student it could match.
+
+    The tutor goes into a student's list when it beats the student's current
+    K-th tutor, which then drops out. When the tutor leaves a full list (or
+    its score falls), the student is rebuilt with rematch_student, since the
+    next best tutor is not stored. A rate change alone between tutors with
+    equal scores is not picked up until that student's next rebuild.
+    """
+    existing = dict(Match.objects.filter(tutor=tutor).values_list('student_id', 'score'))
+    if not (tutor.user.is_approved and not tutor.user.is_rejected):
+        Match.objects.filter(tutor=tutor).delete()
+        lists = _full_lists(existing, tutor)
+        _refill([student_id for student_id, ranks in lists.items() if TOP_K not in ranks])
+        return 0
+
+    subject_ids = list(tutor.canonical_subjects.values_list('id', flat=True))
+    overlap = dict(
+        StudentProfile.canonical_subjects.through.objects
+        .filter(approved('studentprofile__user__'), subject_id__in=subject_ids)
+        .values_list('studentprofile_id')
+        .annotate(n=Count('id'))
+    )
+    location = normalize_location(tutor.location)
+    same_location = set(
+        _approved(StudentProfile.objects.filter(location__lower=location)).values_list('id', flat=True)
+    ) if location else set()
+    day_mask = parse_days(tutor.available_days)
+
+    scores = {}
+    for student_id in set(overlap) | same_location:
+        score = score_pair(overlap.get(student_id, 0), student_id in same_location, day_mask)
+        if score > 0:
+            scores[student_id] = score
+
+    lists = _full_lists(set(scores) | set(existing), tutor)
+    matches, dropped, trimmed, refill = [], [], [], []
+    for student_id in set(scores) | set(existing):
+        score, old_score, ranks = scores.get(student_id), existing.get(student_id), lists.get(student_id, {})
+        if TOP_K in ranks:
+            _, kth_score, kth_rate, kth_tutor = ranks[TOP_K]
+            if score is not None and (-score, tutor.hourly_rate, tutor.pk) < (-kth_score, kth_rate, kth_tutor):
+                matches.append(Match(student_id=student_id, tutor=tutor, score=score))
+                trimmed.extend(match[0] for position, match in ranks.items() if position >= TOP_K)
+            elif old_score is not None:
+                dropped.append(student_id)
+        elif TOP_K - 1 in ranks and old_score is not None and (score is None or score < old_score):
+            refill.append(student_id)
+        elif score is not None:
+            matches.append(Match(student_id=student_id, tutor=tutor, score=score))
+        else:
+            dropped.append(student_id)
+
+    with transaction.atomic():
+        Match.objects.filter(tutor=tutor, student_id__in=dropped + refill).delete()
+        Match.objects.filter(id__in=trimmed).delete()
+        Match.objects.bulk_create(
+            matches,
+            update_conflicts=True,
+            unique_fields=['student', 'tutor'],
+            update_fields=['score', 'updated_at'],
+        )
+        _refill(refill)
+    return len(matches)
+
+
+def refresh_matches_for_user(user):
+    """Recompute matches after a user's profile or approval state changed."""
+    if user.role == 'student' and hasattr(user, 'student_profile'):
+        return rematch_student(user.student_profile)
+    if user.role == 'tutor' and hasattr(user, 'tutor_profile'):
+        return rematch_tutor(user.tutor_profile)
+    return 0
+
+
+def refresh_matches_for_users(user_ids):
+    """Recompute matches for many users, e.g. after a bulk review."""
+    for student in StudentProfile.objects.filter(user_id__in=user_ids).select_related('user'):
+        rematch_student(student)
+    for tutor in TutorProfile.objects.filter(user_id__in=user_ids).select_related('user'):
+        rematch_tutor(tutor)
@@ -0,0 +1,128 @@
+"""In-process request metrics, exported in the Prometheus text format.
+
+core.middleware.MetricsMiddleware records one observation per request,
+labelled with the resolved view name (the URL name, or the view's dotted path
+for unnamed routes). Values live in this process only: with several workers,
+scrape each one, or aggregate them in Prometheus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from core.authentication import token_cache
+from core.throttling import login_throttle_metrics
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = {
+    'tutor_request_duration_seconds': ("Time from the request reaching the middleware to the response.", LATENCY_BUCKETS),
+    'tutor_db_queries': ("Database queries run per request.", QUERY_BUCKETS),
+    'tutor_db_duration_seconds': ("Time spent in database queries per request.", LATENCY_BUCKETS),
+    'tutor_serialization_duration_seconds': ("Time spent rendering DRF responses.", LATENCY_BUCKETS),
+    'tutor_response_size_bytes': ("Size of non-streaming response bodies.", SIZE_BUCKETS),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in labels)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter()
+        self.histograms = {name: {} for name in HISTOGRAMS}
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            histogram = self.histograms[name].get(labels)
+            if histogram is None:
+                histogram = self.histograms[name][labels] = Histogram(HISTOGRAMS[name][1])
+            histogram.observe(value)
+
+    def record_request(self, endpoint, method, status, duration, queries, db_time, render_time, size):
+        labels = (('endpoint', endpoint), ('method', method))
+        with self._lock:
+            self.requests[labels + (('status', str(status)),)] += 1
+        self.observe('tutor_request_duration_seconds', labels, duration)
+        self.observe('tutor_db_queries', labels, queries)
+        self.observe('tutor_db_duration_seconds', labels, db_time)
+        if render_time is not None:
+            self.observe('tutor_serialization_duration_seconds', labels, render_time)
+        if size is not None:
+            self.observe('tutor_response_size_bytes', labels, size)
+
+    def clear(self):
+        with self._lock:
+            self.requests.clear()
+            for series in self.histograms.values():
+                series.clear()
+
+    def render(self):
+        lines = ['# HELP tutor_requests_total Requests handled.', '# TYPE tutor_requests_total counter']
+        with self._lock:
+            for labels, count in sorted(self.requests.items()):
+                lines.append(f'tutor_requests_total{{{_labels(labels)}}} {count}')
+            for name, (help_text, buckets) in HISTOGRAMS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{_labels(labels + (("le", bound),))}}} {cumulative}')
+                    lines.append(f'{name}_sum{{{_labels(labels)}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{_labels(labels)}}} {histogram.count}')
+
+        login = login_throttle_metrics()
+        lines += ['# HELP tutor_login_events_total Login attempts by outcome.', '# TYPE tutor_login_events_total counter']
+        for event in ('attempts', 'succeeded', 'failed', 'blocked_ip', 'blocked_email'):
+            lines.append(f'tutor_login_events_total{{event="{event}"}} {login[event]}')
+        lines += [
+            '# HELP tutor_token_cache_lookups_total Token cache lookups by result.',
+            '# TYPE tutor_token_cache_lookups_total counter',
+            f'tutor_token_cache_lookups_total{{result="hit"}} {token_cache.hits}',
+            f'tutor_token_cache_lookups_total{{result="miss"}} {token_cache.misses}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryCollector:
+    """A connection.execute_wrapper that counts and times queries, optionally keeping their SQL."""
+
+    def __init__(self, capture_sql=0):
+        self.capture_sql = capture_sql
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if len(self.statements) < self.capture_sql:
+                self.statements.append((elapsed, sql))
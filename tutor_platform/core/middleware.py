@@ -0,0 +1,162 @@
+import gzip
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from core.metrics import QueryCollector, registry
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - responses are gzipped instead
+    brotli = None
+
+logger = logging.getLogger('core.metrics')
+
+DEFAULT_SLOW_REQUEST_LOG = {
+    'THRESHOLD': None,
+    'MAX_QUERIES': 50,
+}
+
+DEFAULT_RESPONSE_COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 4,
+    'CONTENT_TYPES': ['application/json', 'application/msgpack', 'text/'],
+}
+
+
+class MetricsMiddleware:
+    """Record latency, database queries, render time and size for every request.
+
+    Put it first in MIDDLEWARE so the timings cover the other middleware too.
+    When ``SLOW_REQUEST_LOG['THRESHOLD']`` (seconds) is set, slower requests
+    are logged with the SQL they ran.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        queries = self._collector()
+        with self._wrap_connections(queries):
+            response = self.get_response(request)
+        self._record(request, response, started, queries)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        queries = self._collector()
+        with self._wrap_connections(queries):
+            response = await self.get_response(request)
+        self._record(request, response, started, queries)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called just before DRF renders the response
+        render_started = time.perf_counter()
+
+        def finished(response):
+            request.metrics_render_time = time.perf_counter() - render_started
+
+        response.add_post_render_callback(finished)
+        return response
+
+    def _slow_log(self):
+        return {**DEFAULT_SLOW_REQUEST_LOG, **getattr(settings, 'SLOW_REQUEST_LOG', {})}
+
+    def _collector(self):
+        slow_log = self._slow_log()
+        return QueryCollector(capture_sql=slow_log['MAX_QUERIES'] if slow_log['THRESHOLD'] is not None else 0)
+
+    def _wrap_connections(self, collector):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(collector))
+        return stack
+
+    def _record(self, request, response, started, queries):
+        duration = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.view_name if match else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        registry.record_request(
+            endpoint, request.method, response.status_code, duration,
+            queries.count, queries.duration, getattr(request, 'metrics_render_time', None), size,
+        )
+
+        threshold = self._slow_log()['THRESHOLD']
+        if threshold is not None and duration >= threshold:
+            statements = '\n'.join(f'  {elapsed * 1000:8.2f} ms  {sql}' for elapsed, sql in queries.statements)
+            logger.warning(
+                "Slow request %s %s (%s) %s in %.1f ms, %d queries in %.1f ms\n%s",
+                request.method, request.get_full_path(), endpoint, response.status_code,
+                duration * 1000, queries.count, queries.duration * 1000, statements,
+            )
+
+
+def accepted_encodings(header):
+    """The content codings in an Accept-Encoding header, minus those refused with ``q=0``."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        quality = params.strip().removeprefix('q=').strip() if params else '1'
+        try:
+            if float(quality) > 0:
+                accepted.add(coding.strip().lower())
+        except ValueError:
+            continue
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress API responses with brotli (when installed) or gzip.
+
+    Only complete bodies of at least ``RESPONSE_COMPRESSION['MIN_SIZE']`` bytes
+    with a listed content type are compressed; streamed exports and files are
+    sent as they are. Brotli runs at a low quality, which compresses JSON
+    better than gzip at a similar speed.
+    """
+
+    def process_response(self, request, response):
+        config = {**DEFAULT_RESPONSE_COMPRESSION, **getattr(settings, 'RESPONSE_COMPRESSION', {})}
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(tuple(config['CONTENT_TYPES'])):
+            return response
+        if len(response.content) < config['MIN_SIZE']:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            encoding, content = 'br', brotli.compress(response.content, quality=config['BROTLI_QUALITY'])
+        elif 'gzip' in accepted:
+            encoding, content = 'gzip', gzip.compress(response.content, config['GZIP_LEVEL'], mtime=0)
+        else:
+            return response
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response.headers['Content-Length'] = str(len(content))
+        response.headers['Content-Encoding'] = encoding
+        # A strong ETag must not match the compressed body (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0005_user_reset_password_token_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tutorprofile',
+            index=models.Index(fields=['location'], name='tutor_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutorprofile',
+            index=models.Index(fields=['hourly_rate'], name='tutor_hourly_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutorprofile',
+            index=models.Index(fields=['experience_years'], name='tutor_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutorprofile',
+            index=models.Index(fields=['gender'], name='tutor_gender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_approved', 'is_rejected', 'role'], name='user_review_state_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_tutor_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='canonical_subjects',
+            field=models.ManyToManyField(blank=True, related_name='students', to='core.subject'),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='canonical_subjects',
+            field=models.ManyToManyField(blank=True, related_name='tutors', to='core.subject'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+def parse_subjects(text):
+    names = []
+    for part in (text or '').split(','):
+        name = ' '.join(part.split()).lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def link_profiles(Subject, profiles, text_field, through, fk_name, cache):
+    links = []
+    for profile in profiles.iterator(chunk_size=2000):
+        for name in parse_subjects(getattr(profile, text_field)):
+            if name not in cache:
+                cache[name] = Subject.objects.get_or_create(name=name)[0].pk
+            links.append(through(**{fk_name: profile.pk, 'subject_id': cache[name]}))
+        if len(links) >= 2000:
+            through.objects.bulk_create(links, ignore_conflicts=True)
+            links = []
+    through.objects.bulk_create(links, ignore_conflicts=True)
+
+
+def populate_subjects(apps, schema_editor):
+    Subject = apps.get_model('core', 'Subject')
+    TutorProfile = apps.get_model('core', 'TutorProfile')
+    StudentProfile = apps.get_model('core', 'StudentProfile')
+    cache = {}
+    link_profiles(Subject, TutorProfile.objects.all(), 'subjects',
+                  TutorProfile.canonical_subjects.through, 'tutorprofile_id', cache)
+    link_profiles(Subject, StudentProfile.objects.all(), 'required_subjects',
+                  StudentProfile.canonical_subjects.through, 'studentprofile_id', cache)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_subject'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_subjects, migrations.RunPython.noop),
+    ]
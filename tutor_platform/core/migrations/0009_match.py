@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_populate_subjects'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Match',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='core.studentprofile')),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='core.tutorprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', '-score'], name='match_student_score_idx'), models.Index(fields=['tutor', '-score'], name='match_tutor_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'tutor'), name='unique_student_tutor_match')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:27
+
+import hashlib
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def move_reset_tokens(apps, schema_editor):
+    """Carry outstanding reset tokens over, hashed, with the usual lifetime from when they were issued."""
+    User = apps.get_model('core', 'User')
+    PasswordResetToken = apps.get_model('core', 'PasswordResetToken')
+    ttl = timedelta(seconds=getattr(settings, 'PASSWORD_RESET_TOKEN_TTL', 3600))
+    users = User.objects.exclude(reset_password_token__isnull=True).exclude(reset_password_token='')
+    PasswordResetToken.objects.bulk_create([
+        PasswordResetToken(
+            user_id=pk,
+            token_hash=hashlib.sha256(token.encode()).hexdigest(),
+            expires_at=(created_at or timezone.now()) + ttl,
+        )
+        for pk, token, created_at in users.values_list('id', 'reset_password_token', 'reset_password_token_created_at')
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_job_result'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PasswordResetToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_hash', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reset_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(move_reset_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='user',
+            name='reset_password_token',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='reset_password_token_created_at',
+        ),
+    ]
@@ -0,0 +1,97 @@
+from django.db import migrations
+
+# The index lives outside the model: an FTS5 table kept in step by triggers on
+# SQLite, a generated tsvector column on PostgreSQL. Either way every write to
+# core_tutorprofile, bulk_create and update() included, updates it.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE core_tutorprofile_fts USING fts5(
+        qualification, description,
+        content='core_tutorprofile', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER core_tutorprofile_fts_insert AFTER INSERT ON core_tutorprofile BEGIN
+        INSERT INTO core_tutorprofile_fts (rowid, qualification, description)
+        VALUES (new.id, new.qualification, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER core_tutorprofile_fts_delete AFTER DELETE ON core_tutorprofile BEGIN
+        INSERT INTO core_tutorprofile_fts (core_tutorprofile_fts, rowid, qualification, description)
+        VALUES ('delete', old.id, old.qualification, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER core_tutorprofile_fts_update AFTER UPDATE OF qualification, description ON core_tutorprofile BEGIN
+        INSERT INTO core_tutorprofile_fts (core_tutorprofile_fts, rowid, qualification, description)
+        VALUES ('delete', old.id, old.qualification, old.description);
+        INSERT INTO core_tutorprofile_fts (rowid, qualification, description)
+        VALUES (new.id, new.qualification, new.description);
+    END
+    """,
+    "INSERT INTO core_tutorprofile_fts (core_tutorprofile_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER core_tutorprofile_fts_update',
+    'DROP TRIGGER core_tutorprofile_fts_delete',
+    'DROP TRIGGER core_tutorprofile_fts_insert',
+    'DROP TABLE core_tutorprofile_fts',
+]
+
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE core_tutorprofile ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(qualification, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX tutor_search_vector_idx ON core_tutorprofile USING GIN (search_vector)',
+]
+POSTGRESQL_BACKWARD = [
+    'ALTER TABLE core_tutorprofile DROP COLUMN search_vector',
+]
+
+
+# Names of the SQLite triggers above, which the search tests check still exist
+SQLITE_TRIGGERS = [
+    'core_tutorprofile_fts_insert', 'core_tutorprofile_fts_delete', 'core_tutorprofile_fts_update',
+]
+
+
+def restore_sqlite_index(apps, schema_editor):
+    """Recreate the SQLite triggers and rebuild the index.
+
+    SQLite cannot alter most columns in place, so Django copies
+    core_tutorprofile into a new table and drops the old one, triggers and
+    all. Any later migration that may rebuild the table (AddField of a NOT
+    NULL column, AlterField, RemoveField...) must run this afterwards.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in SQLITE_TRIGGERS:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+    for sql in SQLITE_FORWARD[1:]:
+        schema_editor.execute(sql)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_profile_coordinates'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_tutor_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklyAvailability',
+            fields=[
+                ('tutor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='availability', serialize=False, to='core.tutorprofile')),
+                ('mon', models.BigIntegerField(default=0)),
+                ('tue', models.BigIntegerField(default=0)),
+                ('wed', models.BigIntegerField(default=0)),
+                ('thu', models.BigIntegerField(default=0)),
+                ('fri', models.BigIntegerField(default=0)),
+                ('sat', models.BigIntegerField(default=0)),
+                ('sun', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('status', models.CharField(choices=[('confirmed', 'Confirmed'), ('cancelled', 'Cancelled')], default='confirmed', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='core.studentprofile')),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='core.tutorprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tutor', 'start'], name='booking_tutor_start_idx'), models.Index(fields=['student', 'start'], name='booking_student_start_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('end__gt', models.F('start'))), name='booking_ends_after_start')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:45
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_availability_and_bookings'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tutorprofile',
+            name='tutor_location_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tutorprofile',
+            name='tutor_gender_idx',
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(django.db.models.functions.text.Lower('location'), name='student_location_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutorprofile',
+            index=models.Index(django.db.models.functions.text.Lower('location'), name='tutor_location_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutorprofile',
+            index=models.Index(django.db.models.functions.text.Lower('gender'), name='tutor_gender_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:53
+
+import importlib
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+from core.images import THUMBNAIL_SIZES, thumbnail_name
+
+# Adding (and removing) a NOT NULL column rebuilds core_tutorprofile on SQLite
+fts = importlib.import_module('core.migrations.0015_tutor_fulltext_index')
+
+
+def record_processed_images(apps, schema_editor):
+    # Images whose thumbnails were already written count as processed
+    for name, field in (('StudentProfile', 'profile_photo'), ('TutorProfile', 'profile_image')):
+        model = apps.get_model('core', name)
+        for pk, image in model.objects.exclude(**{field: ''}).exclude(**{field: None}).values_list('pk', field):
+            if all(default_storage.exists(thumbnail_name(image, size)) for size in THUMBNAIL_SIZES):
+                model.objects.filter(pk=pk).update(**{f'{field}_processed': image})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_lower_location_gender_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='profile_photo_processed',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, fts.restore_sqlite_index),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='profile_image_processed',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(fts.restore_sqlite_index, migrations.RunPython.noop),
+        migrations.RunPython(record_processed_images, migrations.RunPython.noop),
+    ]
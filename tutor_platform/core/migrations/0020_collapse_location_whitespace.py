@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def collapse_location_whitespace(apps, schema_editor):
+    # Profiles now store location with whitespace collapsed (GeocodedProfile.geocode)
+    for name in ('StudentProfile', 'TutorProfile'):
+        model = apps.get_model('core', name)
+        for pk, location in model.objects.values_list('pk', 'location').iterator(chunk_size=2000):
+            collapsed = ' '.join((location or '').split())
+            if collapsed != location:
+                model.objects.filter(pk=pk).update(location=collapsed)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_pending_queue_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_location_whitespace, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
+from django.db.models.functions import Lower
 from django.utils import timezone
-import uuid
+from datetime import timedelta
+import hashlib
+import secrets
+
+from core.geo import encode_geohash, geocode
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -38,54 +44,350 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_approved = models.BooleanField(default=False)
     is_rejected = models.BooleanField(default=False) 
     rejection_reason = models.TextField(blank=True, null=True) 
-    reset_password_token = models.CharField(max_length=255, blank=True, null=True)
-    reset_password_token_created_at = models.DateTimeField(blank=True, null=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_approved', 'is_rejected', 'role', 'id'], name='user_review_state_idx'),
+            models.Index(
+                fields=['role', 'id'],
+                name='user_pending_queue_idx',
+                condition=models.Q(is_approved=False, is_rejected=False),
+            ),
+            # The queue without a role filter: (role, id) would need a sort
+            models.Index(
+                fields=['id'],
+                name='user_pending_idx',
+                condition=models.Q(is_approved=False, is_rejected=False),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.email} ({self.role})"
     
     def generate_reset_token(self):
-        token = str(uuid.uuid4())
-        self.reset_password_token = token
-        self.reset_password_token_created_at = timezone.now()
-        self.save()
-        return token
+        return PasswordResetToken.objects.issue(self)
 
     def clear_reset_token(self):
-        self.reset_password_token = None
-        self.reset_password_token_created_at = None
-        self.save()
+        PasswordResetToken.objects.filter(user=self).delete()
+
+
+def parse_subjects(text):
+    """Split a comma-separated subject string into unique, normalized names."""
+    names = []
+    for part in (text or '').split(','):
+        name = ' '.join(part.split()).lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class SubjectManager(models.Manager):
+    def resolve(self, text):
+        """Return Subject rows for a comma-separated string, creating missing ones."""
+        names = parse_subjects(text)
+        if not names:
+            return []
+        self.bulk_create([Subject(name=name) for name in names], ignore_conflicts=True)
+        return list(self.filter(name__in=names))
+
+
+class Subject(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    objects = SubjectManager()
+
+    def __str__(self):
+        return self.name
+
+
+# Case-insensitive equality is written "<field>__lower=...", which the Lower()
+# indexes below serve; iexact compiles to LIKE (SQLite) or UPPER() (PostgreSQL)
+# and never uses an index.
+models.CharField.register_lookup(Lower)
+
+
+def approved(prefix=''):
+    """Approved, unrejected users, as a Q on the User behind ``prefix`` (e.g. ``'user__'``).
+
+    ``is_approved=True`` compiles to a bare boolean column, which SQLite cannot
+    match against user_review_state_idx; comparing with Value() keeps each
+    condition an indexable equality.
+    """
+    return models.Q(**{prefix + 'is_approved': models.Value(True), prefix + 'is_rejected': models.Value(False)})
+
+
+# Columns read by the profile listing serializers
+USER_LISTING_FIELDS = ('user__email', 'user__mobile_number', 'user__is_approved', 'user__is_rejected', 'user__role')
+TUTOR_LISTING_FIELDS = (
+    'full_name', 'gender', 'location', 'qualification', 'experience_years', 'hourly_rate',
+    'subjects', 'description', 'available_days', 'profile_image_processed',
+) + USER_LISTING_FIELDS
+STUDENT_LISTING_FIELDS = (
+    'full_name', 'class_name', 'required_subjects', 'location', 'profile_photo_processed',
+) + USER_LISTING_FIELDS
+
 
+class TutorProfileQuerySet(models.QuerySet):
+    def for_listing(self):
+        return self.select_related('user').only(*TUTOR_LISTING_FIELDS)
 
-class TutorProfile(models.Model):
+
+class StudentProfileQuerySet(models.QuerySet):
+    def for_listing(self):
+        return self.select_related('user').only(*STUDENT_LISTING_FIELDS)
+
+
+class GeocodedProfile(models.Model):
+    """Coordinates resolved from ``location`` against the gazetteer whenever the profile is saved."""
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(max_length=12, blank=True, editable=False, db_index=True)
+
+    GEOCODED_FIELDS = ('latitude', 'longitude', 'geohash')
+
+    class Meta:
+        abstract = True
+
+    def geocode(self):
+        """Set the coordinates from ``location``; they are cleared when the place is unknown.
+
+        Runs of whitespace in ``location`` are collapsed first, so the
+        case-insensitive SQL comparison in core/matching.py agrees with
+        normalize_location() in the bulk matcher.
+        """
+        self.location = ' '.join((self.location or '').split())
+        coordinates = geocode(self.location)
+        if coordinates is None:
+            self.latitude = self.longitude = None
+            self.geohash = ''
+        else:
+            self.latitude, self.longitude = coordinates
+            self.geohash = encode_geohash(*coordinates)
+        return coordinates is not None
+
+    def save(self, *args, update_fields=None, **kwargs):
+        # bulk_create skips this; callers geocode those rows themselves
+        if update_fields is None or 'location' in update_fields:
+            self.geocode()
+            if update_fields is not None:
+                update_fields = {*update_fields, *self.GEOCODED_FIELDS}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class TutorProfile(GeocodedProfile):
+    # On SQLite the full-text index is kept in step by triggers on this table
+    # (migration 0015). Any migration that makes Django rebuild the table
+    # (AlterField, RemoveField, AddField of a NOT NULL column...) silently
+    # drops them: end it with RunPython(restore_sqlite_index) from 0015.
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='tutor_profile')
     full_name = models.CharField(max_length=100)
     profile_image = models.ImageField(upload_to='tutors/', blank=True, null=True)
+    # Name of the image whose thumbnails exist (core/images.py); set by the image job
+    profile_image_processed = models.CharField(max_length=100, blank=True, editable=False)
     gender = models.CharField(max_length=10, blank=True)
     location = models.CharField(max_length=200)
     qualification = models.CharField(max_length=200)
     experience_years = models.IntegerField()
     hourly_rate = models.DecimalField(max_digits=6, decimal_places=2)
     subjects = models.TextField(help_text="Comma-separated subjects")
+    canonical_subjects = models.ManyToManyField(Subject, related_name='tutors', blank=True)
     description = models.TextField()
     available_days = models.CharField(max_length=200)
 
+    objects = TutorProfileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(Lower('location'), name='tutor_location_lower_idx'),
+            models.Index(fields=['hourly_rate'], name='tutor_hourly_rate_idx'),
+            models.Index(fields=['experience_years'], name='tutor_experience_idx'),
+            models.Index(Lower('gender'), name='tutor_gender_lower_idx'),
+        ]
+
     def __str__(self):
         return self.full_name
 
 
-class StudentProfile(models.Model):
+class StudentProfile(GeocodedProfile):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='student_profile')
     full_name = models.CharField(max_length=100)
     profile_photo = models.ImageField(upload_to='students/', blank=True, null=True)
+    profile_photo_processed = models.CharField(max_length=100, blank=True, editable=False)
     class_name = models.CharField(max_length=50)
     required_subjects = models.TextField(help_text="Comma-separated subjects")
+    canonical_subjects = models.ManyToManyField(Subject, related_name='students', blank=True)
     location = models.CharField(max_length=200)
 
+    objects = StudentProfileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(Lower('location'), name='student_location_lower_idx'),
+        ]
+
     def __str__(self):
         return self.full_name
+
+
+class MatchQuerySet(models.QuerySet):
+    def with_tutors(self):
+        fields = ['tutor__' + name for name in TUTOR_LISTING_FIELDS]
+        return self.select_related('tutor__user').only('score', *fields)
+
+    def with_students(self):
+        fields = ['student__' + name for name in STUDENT_LISTING_FIELDS]
+        return self.select_related('student__user').only('score', *fields)
+
+
+class Match(models.Model):
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='matches')
+    tutor = models.ForeignKey(TutorProfile, on_delete=models.CASCADE, related_name='matches')
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MatchQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'tutor'], name='unique_student_tutor_match'),
+        ]
+        indexes = [
+            models.Index(fields=['student', '-score'], name='match_student_score_idx'),
+            models.Index(fields=['tutor', '-score'], name='match_tutor_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.tutor} ({self.score:.2f})"
+
+
+class Job(models.Model):
+    """A unit of deferred work in the database-backed job outbox (see core/jobs.py)."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    # Whatever the handler returned, when it is JSON serializable
+    result = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+def hash_reset_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class PasswordResetTokenManager(models.Manager):
+    def issue(self, user):
+        """Replace the user's reset tokens with a new one and return it; only its hash is stored."""
+        token = secrets.token_urlsafe(32)
+        ttl = getattr(settings, 'PASSWORD_RESET_TOKEN_TTL', 3600)
+        self.filter(user=user).delete()
+        self.create(user=user, token_hash=hash_reset_token(token), expires_at=timezone.now() + timedelta(seconds=ttl))
+        return token
+
+    def lookup(self, token):
+        """The unexpired reset token matching ``token``, with its user, or None."""
+        return (
+            self.select_related('user')
+            .filter(token_hash=hash_reset_token(token), expires_at__gt=timezone.now())
+            .first()
+        )
+
+    def purge_expired(self, chunk_size=1000):
+        """Delete expired tokens ``chunk_size`` rows at a time. Returns the number deleted."""
+        deleted = 0
+        while True:
+            ids = list(self.filter(expires_at__lte=timezone.now()).values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return deleted
+            deleted += self.filter(id__in=ids).delete()[0]
+
+
+class PasswordResetToken(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reset_tokens')
+    # sha256 of the token sent to the user, so a leaked table cannot be replayed
+    token_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = PasswordResetTokenManager()
+
+    def __str__(self):
+        return f"Reset token for {self.user} (expires {self.expires_at:%Y-%m-%d %H:%M})"
+
+
+class WeeklyAvailability(models.Model):
+    """A tutor's recurring weekly free time, one slot bitmap per day (see core/availability.py)."""
+    tutor = models.OneToOneField(TutorProfile, on_delete=models.CASCADE, primary_key=True, related_name='availability')
+    mon = models.BigIntegerField(default=0)
+    tue = models.BigIntegerField(default=0)
+    wed = models.BigIntegerField(default=0)
+    thu = models.BigIntegerField(default=0)
+    fri = models.BigIntegerField(default=0)
+    sat = models.BigIntegerField(default=0)
+    sun = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Availability of {self.tutor}"
+
+
+# Longest bookable session. Overlap checks rely on it to bound their index
+# range: a booking that starts earlier than this before a window cannot reach it.
+MAX_BOOKING_LENGTH = timedelta(hours=4)
+
+
+class BookingQuerySet(models.QuerySet):
+    def overlapping(self, start, end):
+        """Confirmed bookings sharing any time with ``[start, end)``."""
+        return self.filter(status='confirmed', start__gt=start - MAX_BOOKING_LENGTH, start__lt=end, end__gt=start)
+
+
+class Booking(models.Model):
+    STATUS_CHOICES = (
+        ('confirmed', 'Confirmed'),
+        ('cancelled', 'Cancelled'),
+    )
+
+    tutor = models.ForeignKey(TutorProfile, on_delete=models.CASCADE, related_name='bookings')
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='bookings')
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='confirmed')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(end__gt=models.F('start')), name='booking_ends_after_start'),
+        ]
+        indexes = [
+            models.Index(fields=['tutor', 'start'], name='booking_tutor_start_idx'),
+            models.Index(fields=['student', 'start'], name='booking_student_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} with {self.tutor} at {self.start:%Y-%m-%d %H:%M}"
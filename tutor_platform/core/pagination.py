@@ -0,0 +1,26 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TutorCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+
+class MatchCursorPagination(TutorCursorPagination):
+    ordering = ('-score', '-id')
+
+
+class PendingUserCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = 'id'
+
+
+class BookingCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('start', 'id')
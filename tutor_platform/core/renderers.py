@@ -0,0 +1,61 @@
+"""Faster and smaller response bodies for the API.
+
+``ORJSONRenderer`` produces the same bytes as DRF's JSONRenderer, several
+times faster. Types orjson does not handle natively, and datetimes (so they
+keep DRF's ``Z`` suffix), go through DRF's encoder. ``MessagePackRenderer``
+answers ``Accept: application/msgpack`` (or ``?format=msgpack``) with the same
+data in MessagePack. Both libraries are optional: without orjson the JSON
+renderer falls back to DRF's, and settings only list the MessagePack renderer
+when msgpack is installed.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - DRF's encoder is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - MessagePack is only offered when installed
+    msgpack = None
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(data):
+    """``data`` as JSON bytes, matching JSONRenderer's compact output."""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    content = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    # JSONRenderer escapes these so the output is also valid JavaScript
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # orjson only indents by two spaces, so pretty-printed output (the
+        # browsable API, "; indent=4") stays with the stdlib encoder
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default)
@@ -0,0 +1,82 @@
+"""Read-replica routing.
+
+Writes and ordinary reads go to ``default``. Reads made while handling a GET
+or HEAD request for a list endpoint go to one of ``DATABASE_REPLICAS``: every
+DRF ListAPIView, plus any view with ``replica_reads = True`` (see
+ReplicaReadMiddleware). Reads inside a transaction on ``default`` stay there,
+so a request never reads around its own writes.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.generics import ListAPIView
+
+use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_reads(view):
+    """Mark a function view as safe to serve from a read replica."""
+    view.replica_reads = True
+    return view
+
+
+def wants_replica(request, view_func):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    view = getattr(view_func, 'view_class', view_func)
+    default = isinstance(view, type) and issubclass(view, ListAPIView)
+    return getattr(view, 'replica_reads', default)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if not replicas or not use_replica.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMiddleware:
+    """Route the current request's reads to a replica when its view allows it."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = use_replica.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            use_replica.reset(token)
+
+    async def __acall__(self, request):
+        token = use_replica.set(False)
+        try:
+            return await self.get_response(request)
+        finally:
+            use_replica.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if wants_replica(request, view_func):
+            use_replica.set(True)
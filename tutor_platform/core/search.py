@@ -0,0 +1,106 @@
+"""Ranked full-text search over tutor qualifications and descriptions.
+
+The index is created by migration 0015: an FTS5 table on SQLite, a GIN-indexed
+generated ``search_vector`` column on PostgreSQL. Both are maintained by the
+database on every write. Other backends fall back to ``icontains`` on each
+term, unranked.
+
+A query is a list of words and ``"quoted phrases"``; a tutor must match all
+of them. Qualifications weigh more than descriptions. Snippets are
+HTML-escaped with the matches wrapped in ``<mark>``.
+"""
+import html
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Left
+
+SNIPPET_WORDS = 16
+# Passed to the database as highlight markers, swapped for tags after escaping
+_START, _STOP = '\x02', '\x03'
+
+_TERMS = re.compile(r'"([^"]*)"|(\S+)')
+_WORDS = re.compile(r'\w+')
+
+
+def parse_query(text):
+    """Split search text into terms: tuples of words, one word unless the term was a quoted phrase."""
+    terms = []
+    for phrase, word in _TERMS.findall(text or ''):
+        words = tuple(_WORDS.findall((phrase or word).lower()))
+        if words:
+            terms.append(words)
+    return terms
+
+
+def highlight(snippet):
+    if snippet is None:
+        return ''
+    return html.escape(snippet).replace(_START, '<mark>').replace(_STOP, '</mark>')
+
+
+def _fts5_query(terms):
+    return ' '.join('"%s"' % ' '.join(words) for words in terms)
+
+
+def _search_sqlite(queryset, terms):
+    # FTS5 must drive the join (matches first, then profiles by primary key);
+    # extra() is the only way to get that join out of the ORM.
+    fts = 'core_tutorprofile_fts'
+    return queryset.extra(
+        tables=[fts],
+        where=[f'{fts} MATCH %s', f'{fts}.rowid = core_tutorprofile.id'],
+        params=[_fts5_query(terms)],
+        select={
+            'search_rank': f'-bm25({fts}, 2.0, 1.0)',
+            'search_headline': f"snippet({fts}, -1, %s, %s, '…', {SNIPPET_WORDS})",
+        },
+        select_params=[_START, _STOP],
+    ).order_by('-search_rank', 'id')
+
+
+def _search_postgresql(queryset, terms):
+    # websearch_to_tsquery reads the same words-and-quoted-phrases syntax
+    query = ' '.join('"%s"' % ' '.join(words) if len(words) > 1 else words[0] for words in terms)
+    tsquery = "websearch_to_tsquery('english', %s)"
+    return (
+        queryset
+        .filter(RawSQL(f'core_tutorprofile.search_vector @@ {tsquery}', [query], output_field=BooleanField()))
+        .annotate(
+            search_rank=RawSQL(f'ts_rank_cd(core_tutorprofile.search_vector, {tsquery})', [query],
+                               output_field=FloatField()),
+            search_headline=RawSQL(
+                f"ts_headline('english', concat_ws(' ', core_tutorprofile.qualification, "
+                f"core_tutorprofile.description), {tsquery}, %s)",
+                [query, f'StartSel={_START}, StopSel={_STOP}, MaxWords={SNIPPET_WORDS}, MinWords=5'],
+            ),
+        )
+        .order_by('-search_rank', 'id')
+    )
+
+
+def _search_fallback(queryset, terms):
+    for words in terms:
+        phrase = ' '.join(words)
+        queryset = queryset.filter(Q(qualification__icontains=phrase) | Q(description__icontains=phrase))
+    return queryset.annotate(
+        search_rank=Value(None, output_field=FloatField()), search_headline=Left('description', 200),
+    ).order_by('id')
+
+
+def search_tutors(queryset, text, limit=20, offset=0):
+    """Tutors from ``queryset`` matching ``text``, best first, as a list of profiles.
+
+    Each profile gets ``search_rank`` (higher is better) and ``search_snippet``.
+    """
+    terms = parse_query(text)
+    if not terms:
+        return []
+    vendor = connections[queryset.db].vendor
+    search = {'sqlite': _search_sqlite, 'postgresql': _search_postgresql}.get(vendor, _search_fallback)
+    results = list(search(queryset, terms)[offset:offset + limit])
+    for profile in results:
+        profile.search_snippet = highlight(profile.search_headline)
+    return results
@@ -1,6 +1,26 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from core.models import User, TutorProfile, StudentProfile
+from django.utils import timezone
+from core.availability import SLOT_MINUTES, local_window, parse_time, slot_mask
+from core.images import THUMBNAIL_SIZES, thumbnail_urls
+from core.matching import DAYS
+from core.models import (
+    User, TutorProfile, StudentProfile, Subject, Job, PasswordResetToken, Booking, MAX_BOOKING_LENGTH, parse_subjects,
+)
+
+
+class ThumbnailURLsField(serializers.ReadOnlyField):
+    """URLs of the generated thumbnails, read from a profile's ``*_processed`` column.
+
+    Works from either a FieldFile or the stored file name, so the .values()
+    fast path can use it too.
+    """
+    # Keys of the value; CSV exports give each one its own column
+    subfields = tuple(THUMBNAIL_SIZES)
+
+    def to_representation(self, value):
+        return thumbnail_urls(getattr(value, 'name', value))
+
 
 class StudentRegistrationSerializer(serializers.ModelSerializer):
     full_name = serializers.CharField(write_only=True)
@@ -14,6 +34,11 @@ class StudentRegistrationSerializer(serializers.ModelSerializer):
         fields = ['email', 'mobile_number', 'password', 'full_name', 'class_name', 'required_subjects', 'location', 'profile_photo']
         extra_kwargs = {'password': {'write_only': True}}
 
+    def validate_required_subjects(self, value):
+        if not parse_subjects(value):
+            raise serializers.ValidationError("Enter at least one subject")
+        return value
+
     def create(self, validated_data):
         full_name = validated_data.pop('full_name')
         class_name = validated_data.pop('class_name')
@@ -22,7 +47,7 @@ class StudentRegistrationSerializer(serializers.ModelSerializer):
         profile_photo = validated_data.pop('profile_photo', None)
 
         user = User.objects.create_user(role='student', **validated_data)
-        StudentProfile.objects.create(
+        profile = StudentProfile.objects.create(
             user=user,
             full_name=full_name,
             class_name=class_name,
@@ -30,6 +55,7 @@ class StudentRegistrationSerializer(serializers.ModelSerializer):
             location=location,
             profile_photo=profile_photo
         )
+        profile.canonical_subjects.set(Subject.objects.resolve(required_subjects))
         return user
 
 
@@ -50,6 +76,11 @@ class TutorRegistrationSerializer(serializers.ModelSerializer):
         fields = ['email', 'mobile_number', 'password', 'full_name', 'gender', 'location', 'qualification', 'experience_years', 'hourly_rate', 'subjects', 'description', 'available_days', 'profile_image']
         extra_kwargs = {'password': {'write_only': True}}
 
+    def validate_subjects(self, value):
+        if not parse_subjects(value):
+            raise serializers.ValidationError("Enter at least one subject")
+        return value
+
     def create(self, validated_data):
         full_name = validated_data.pop('full_name')
         gender = validated_data.pop('gender', '')
@@ -63,7 +94,7 @@ class TutorRegistrationSerializer(serializers.ModelSerializer):
         profile_image = validated_data.pop('profile_image', None)
 
         user = User.objects.create_user(role='tutor', **validated_data)
-        TutorProfile.objects.create(
+        profile = TutorProfile.objects.create(
             user=user,
             full_name=full_name,
             gender=gender,
@@ -76,6 +107,7 @@ class TutorRegistrationSerializer(serializers.ModelSerializer):
             available_days=available_days,
             profile_image=profile_image
         )
+        profile.canonical_subjects.set(Subject.objects.resolve(subjects))
         return user
 
 
@@ -117,12 +149,10 @@ class ResetPasswordSerializer(serializers.Serializer):
     new_password = serializers.CharField(write_only=True)
 
     def validate(self, attrs):
-        token = attrs.get('token')
-        try:
-            user = User.objects.get(reset_password_token=token)
-        except User.DoesNotExist:
+        reset_token = PasswordResetToken.objects.lookup(attrs.get('token'))
+        if reset_token is None:
             raise serializers.ValidationError("Invalid or expired token")
-        self.context['user'] = user
+        self.context['user'] = reset_token.user
         return attrs
 
     def save(self):
@@ -132,16 +162,66 @@ class ResetPasswordSerializer(serializers.Serializer):
         user.save()
         return user
 
+class BulkReviewFilterSerializer(serializers.Serializer):
+    role = serializers.ChoiceField(choices=['student', 'tutor'], required=False)
+    status = serializers.ChoiceField(choices=['pending', 'approved', 'rejected'], default='pending')
+
+
+class BulkReviewSerializer(serializers.Serializer):
+    MAX_USERS = 10000
+
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False,
+                                allow_empty=False, max_length=MAX_USERS)
+    filter = BulkReviewFilterSerializer(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_USERS, default=MAX_USERS)
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    reason = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide either 'ids' or 'filter'")
+        return attrs
+
+    def get_user_ids(self):
+        """Resolve the request to a list of user ids, oldest registration first."""
+        if 'ids' in self.validated_data:
+            return list(dict.fromkeys(self.validated_data['ids']))
+        filters = self.validated_data['filter']
+        users = User.objects.filter(role__in=['student', 'tutor'])
+        if 'role' in filters:
+            users = users.filter(role=filters['role'])
+        if filters['status'] == 'pending':
+            users = users.filter(is_approved=False, is_rejected=False)
+        elif filters['status'] == 'approved':
+            users = users.filter(is_approved=True, is_rejected=False)
+        else:
+            users = users.filter(is_rejected=True)
+        return list(users.order_by('id').values_list('id', flat=True)[:self.validated_data['limit']])
+
+
+class PendingUserSerializer(serializers.ModelSerializer):
+    full_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'email', 'mobile_number', 'role', 'full_name']
+
+    def get_full_name(self, user):
+        profile = getattr(user, f'{user.role}_profile', None)
+        return profile.full_name if profile else None
+
+
 class StudentProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='user.email')
     mobile_number = serializers.CharField(source='user.mobile_number')
     is_approved = serializers.BooleanField(source='user.is_approved')
     is_rejected = serializers.BooleanField(source='user.is_rejected')
     role = serializers.CharField(source='user.role')
+    profile_photo_thumbnails = ThumbnailURLsField(source='profile_photo_processed')
 
     class Meta:
         model = StudentProfile
-        fields = ['email', 'mobile_number', 'full_name', 'class_name', 'required_subjects', 'location', 'is_approved', 'is_rejected', 'role']
+        fields = ['email', 'mobile_number', 'full_name', 'class_name', 'required_subjects', 'location', 'is_approved', 'is_rejected', 'role', 'profile_photo_thumbnails']
 
 
 class TutorProfileSerializer(serializers.ModelSerializer):
@@ -150,7 +230,108 @@ class TutorProfileSerializer(serializers.ModelSerializer):
     is_approved = serializers.BooleanField(source='user.is_approved')
     is_rejected = serializers.BooleanField(source='user.is_rejected')
     role = serializers.CharField(source='user.role')
+    profile_image_thumbnails = ThumbnailURLsField(source='profile_image_processed')
 
     class Meta:
         model = TutorProfile
-        fields = ['email', 'mobile_number', 'full_name', 'gender', 'location', 'qualification', 'experience_years', 'hourly_rate', 'subjects', 'description', 'available_days', 'is_approved', 'is_rejected', 'role']
+        fields = ['email', 'mobile_number', 'full_name', 'gender', 'location', 'qualification', 'experience_years', 'hourly_rate', 'subjects', 'description', 'available_days', 'is_approved', 'is_rejected', 'role', 'profile_image_thumbnails']
+
+
+class BookableTutorSerializer(TutorProfileSerializer):
+    """Tutors in the student search, with the id that bookings are made against."""
+
+    class Meta(TutorProfileSerializer.Meta):
+        fields = ['id'] + TutorProfileSerializer.Meta.fields
+
+
+class NearbyTutorSerializer(TutorProfileSerializer):
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta(TutorProfileSerializer.Meta):
+        fields = TutorProfileSerializer.Meta.fields + ['distance_km']
+
+    def get_distance_km(self, tutor):
+        return round(tutor.distance_km, 2)
+
+
+class TutorTextSearchSerializer(TutorProfileSerializer):
+    search_rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(source='search_snippet', read_only=True)
+
+    class Meta(TutorProfileSerializer.Meta):
+        fields = TutorProfileSerializer.Meta.fields + ['search_rank', 'snippet']
+
+
+class MatchedStudentSerializer(serializers.BaseSerializer):
+    """Serializes a Match row as the matched student plus its score."""
+
+    def to_representation(self, instance):
+        data = StudentProfileSerializer(instance.student).data
+        data['match_score'] = instance.score
+        return data
+
+
+class MatchedTutorSerializer(serializers.BaseSerializer):
+    """Serializes a Match row as the matched tutor plus its score."""
+
+    def to_representation(self, instance):
+        data = TutorProfileSerializer(instance.tutor).data
+        data['match_score'] = instance.score
+        return data
+
+
+class BulkImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    role = serializers.ChoiceField(choices=['student', 'tutor'])
+    format = serializers.ChoiceField(choices=['csv', 'jsonl'], required=False)
+    batch_size = serializers.IntegerField(min_value=1, max_value=10000, default=1000)
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'status', 'attempts', 'last_error', 'result', 'created_at']
+
+
+class AvailabilitySlotSerializer(serializers.Serializer):
+    day = serializers.ChoiceField(choices=DAYS)
+    start = serializers.CharField()
+    end = serializers.CharField()
+
+    def validate(self, attrs):
+        try:
+            slot_mask(parse_time(attrs['start']), parse_time(attrs['end']))
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return attrs
+
+
+class AvailabilitySerializer(serializers.Serializer):
+    slots = AvailabilitySlotSerializer(many=True, max_length=len(DAYS) * 24 * 60 // SLOT_MINUTES)
+
+
+class BookingSerializer(serializers.ModelSerializer):
+    tutor = serializers.PrimaryKeyRelatedField(
+        queryset=TutorProfile.objects.filter(user__is_approved=True, user__is_rejected=False)
+    )
+    tutor_name = serializers.CharField(source='tutor.full_name', read_only=True)
+    student_name = serializers.CharField(source='student.full_name', read_only=True)
+
+    class Meta:
+        model = Booking
+        fields = ['id', 'tutor', 'tutor_name', 'student_name', 'start', 'end', 'status', 'created_at']
+        read_only_fields = ['status', 'created_at']
+
+    def validate(self, attrs):
+        start, end = attrs['start'], attrs['end']
+        if start <= timezone.now():
+            raise serializers.ValidationError({'start': "Sessions must be booked in the future."})
+        if not start < end <= start + MAX_BOOKING_LENGTH:
+            raise serializers.ValidationError(
+                {'end': f"Sessions last at most {MAX_BOOKING_LENGTH.total_seconds() / 3600:g} hours after the start."}
+            )
+        try:
+            local_window(start, end)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return attrs
@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from core.authentication import token_cache
+from core.cache import bump_listing_version
+from core.matching import STUDENT_MATCH_FIELDS, TUTOR_MATCH_FIELDS, rematch_student, rematch_tutor
+from core.models import User, StudentProfile, TutorProfile, Booking, WeeklyAvailability
+
+
+def _affects_matches(created, update_fields, match_fields):
+    # A new profile is matched once its subjects are set (m2m_changed below)
+    if created:
+        return False
+    return update_fields is None or not match_fields.isdisjoint(update_fields)
+
+
+@receiver(post_save, sender=StudentProfile)
+def rematch_saved_student(sender, instance, created, update_fields, **kwargs):
+    if _affects_matches(created, update_fields, STUDENT_MATCH_FIELDS):
+        rematch_student(instance)
+
+
+@receiver(post_save, sender=TutorProfile)
+def rematch_saved_tutor(sender, instance, created, update_fields, **kwargs):
+    if _affects_matches(created, update_fields, TUTOR_MATCH_FIELDS):
+        rematch_tutor(instance)
+
+
+@receiver(m2m_changed, sender=StudentProfile.canonical_subjects.through)
+def rematch_student_subjects(sender, instance, action, reverse, **kwargs):
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        rematch_student(instance)
+
+
+@receiver(m2m_changed, sender=TutorProfile.canonical_subjects.through)
+def rematch_tutor_subjects(sender, instance, action, reverse, **kwargs):
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        rematch_tutor(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_save, sender=TutorProfile)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=StudentProfile)
+@receiver(post_delete, sender=TutorProfile)
+@receiver(m2m_changed, sender=StudentProfile.canonical_subjects.through)
+@receiver(m2m_changed, sender=TutorProfile.canonical_subjects.through)
+@receiver(post_save, sender=WeeklyAvailability)
+@receiver(post_save, sender=Booking)
+def invalidate_listings(sender, **kwargs):
+    # After commit: a listing read before then would be cached under the new version
+    transaction.on_commit(bump_listing_version)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Covers approval changes in ReviewUserView and password resets
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    token_cache.invalidate_key(instance.key)
@@ -0,0 +1,80 @@
+"""Handlers for work deferred from the request path through core.jobs."""
+import io
+import os
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.mail import mail_admins
+
+from core.cache import bump_listing_version
+from core.images import render_images
+from core.imports import import_file, import_storage, open_text
+from core.jobs import job
+from core.matching import refresh_matches_for_users
+from core.models import User
+
+
+@job('process_profile_image', batch=True)
+def process_profile_images(payloads):
+    """Normalize uploaded profile images, generate their thumbnails and record them as processed."""
+    images = []
+    for payload in payloads:
+        profile_model = apps.get_model('core', payload['model'])
+        instance = profile_model.objects.filter(pk=payload['pk']).first()
+        image_field = getattr(instance, payload['field'], None) if instance else None
+        images.append((profile_model, payload, image_field))
+    rendered = iter(render_images([image_field.path for _, _, image_field in images if image_field]))
+
+    outcomes = []
+    for profile_model, payload, image_field in images:
+        outcome = next(rendered) if image_field else None
+        if image_field and not isinstance(outcome, Exception):
+            # Unless the image was replaced meanwhile; its own job records that one
+            field = payload['field']
+            profile_model.objects.filter(pk=payload['pk'], **{field: image_field.name}).update(
+                **{f'{field}_processed': image_field.name}
+            )
+            outcome = None
+        outcomes.append(outcome)
+    if any(image_field for _, _, image_field in images):
+        bump_listing_version()
+    return outcomes
+
+
+@job('notify_admins_of_registration')
+def notify_admins_of_registration(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    mail_admins(
+        f"New {user.role} registration awaiting approval",
+        f"{user.email} registered as a {user.role} and is waiting for review.",
+    )
+
+
+def delete_import_upload(upload, **payload):
+    import_storage().delete(upload)
+
+
+@job('import_users', on_failure=delete_import_upload)
+def import_users(upload, role, file_format, batch_size=1000):
+    """Import an uploaded CSV/JSONL file, store its error report and delete the upload.
+
+    A failed attempt keeps the upload for the retry; the last one deletes it.
+    """
+    storage = import_storage()
+    report = io.StringIO()
+    with storage.open(upload, 'rb') as source:
+        summary = import_file(open_text(source), role, file_format, batch_size=batch_size, report=report)
+    if summary['failed']:
+        root, _ = os.path.splitext(upload)
+        summary['report'] = storage.save(f'{root}-errors.jsonl', ContentFile(report.getvalue().encode()))
+    storage.delete(upload)
+    return summary
+
+
+@job('refresh_matches')
+def refresh_matches(user_ids):
+    """Recompute matches for reviewed users, then drop dashboards cached meanwhile."""
+    refresh_matches_for_users(user_ids)
+    bump_listing_version()
@@ -1 +1,1346 @@
+import csv
+import gzip
+import importlib
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+from unittest import mock, skipUnless
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
 
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, F, Q
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core import jobs
+from core.authentication import token_cache
+from core.bookings import BookingConflict, book
+from core.availability import decode_slots, encode_slots
+from core.fast_serializers import get_values_plan
+from core.filters import filter_tutors
+from core.geo import covering_prefixes, encode_geohash, geocode, geohash_ranges, haversine_km
+from core.images import render_image, render_images
+from core.imports import hash_passwords
+from core.matching import parse_days, refresh_matches_for_user
+from core.metrics import registry
+from core.middleware import accepted_encodings
+from core.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+from core.search import parse_query
+from core.routers import ReplicaReadMiddleware, ReplicaRouter, use_replica
+from core.models import User, StudentProfile, TutorProfile, Subject, Match, Job, PasswordResetToken, Booking, approved
+from core.serializers import StudentProfileSerializer, TutorProfileSerializer
+from core.throttling import email_failures, ip_attempts, login_metrics
+
+
+def make_student(email, approved=True, **profile):
+    user = User.objects.create_user(email=email, password='pass12345', role='student', is_approved=approved)
+    defaults = {'full_name': email, 'class_name': '10', 'required_subjects': 'Maths', 'location': 'Kochi'}
+    defaults.update(profile)
+    profile = StudentProfile.objects.create(user=user, **defaults)
+    profile.canonical_subjects.set(Subject.objects.resolve(profile.required_subjects))
+    return user
+
+
+def make_tutor(email, approved=True, **profile):
+    user = User.objects.create_user(email=email, password='pass12345', role='tutor', is_approved=approved)
+    defaults = {
+        'full_name': email, 'gender': 'female', 'location': 'Kochi', 'qualification': 'MSc',
+        'experience_years': 3, 'hourly_rate': Decimal('500.00'), 'subjects': 'Maths',
+        'description': 'Tutor', 'available_days': 'Mon, Wed',
+    }
+    defaults.update(profile)
+    profile = TutorProfile.objects.create(user=user, **defaults)
+    profile.canonical_subjects.set(Subject.objects.resolve(profile.subjects))
+    return user
+
+
+def client_for(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+class TutorSearchTests(TestCase):
+    url = '/api/student/tutors/search/'
+
+    def setUp(self):
+        self.student = make_student('student@example.com')
+        make_tutor('maths@example.com', subjects='Maths, Physics', hourly_rate=Decimal('300.00'), experience_years=2)
+        make_tutor('chem@example.com', subjects='Chemistry', location='Delhi', gender='male', experience_years=8)
+        make_tutor('pending@example.com', approved=False)
+
+    def emails(self, response):
+        return sorted(row['email'] for row in response.data['results'])
+
+    def test_lists_only_approved_tutors(self):
+        response = client_for(self.student).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.emails(response), ['chem@example.com', 'maths@example.com'])
+
+    def test_filters(self):
+        client = client_for(self.student)
+        self.assertEqual(self.emails(client.get(self.url, {'subject': 'physics'})), ['maths@example.com'])
+        self.assertEqual(self.emails(client.get(self.url, {'location': 'delhi'})), ['chem@example.com'])
+        self.assertEqual(self.emails(client.get(self.url, {'max_rate': '400'})), ['maths@example.com'])
+        self.assertEqual(self.emails(client.get(self.url, {'min_experience': '5', 'gender': 'male'})), ['chem@example.com'])
+
+    @skipUnless(connection.vendor == 'sqlite', "checks SQLite query plans")
+    def test_filters_use_indexes(self):
+        tutors = TutorProfile.objects.for_listing().filter(approved('user__'), user__role='tutor').order_by('-id')
+        plan = filter_tutors(tutors, {'location': 'DELHI'}).explain()
+        self.assertIn('tutor_location_lower_idx', plan)
+        self.assertIn('tutor_gender_lower_idx', filter_tutors(tutors, {'gender': 'Male'}).explain())
+        self.assertNotIn('SCAN core_user', filter_tutors(tutors, {}).explain())
+        self.assertEqual([t.user.email for t in filter_tutors(tutors, {'location': 'DELHI'})], ['chem@example.com'])
+
+    def test_invalid_number_is_rejected(self):
+        response = client_for(self.student).get(self.url, {'min_rate': 'cheap'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination(self):
+        response = client_for(self.student).get(self.url, {'page_size': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_tutors_cannot_search(self):
+        tutor = User.objects.get(email='maths@example.com')
+        response = client_for(tutor).get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+
+class SubjectNormalizationTests(TestCase):
+    def test_registration_links_canonical_subjects(self):
+        response = APIClient().post('/api/register/tutor/', {
+            'email': 'new@example.com', 'mobile_number': '9000000001', 'password': 'pass12345',
+            'full_name': 'New Tutor', 'location': 'Kochi', 'qualification': 'BSc',
+            'experience_years': 1, 'hourly_rate': '250.00', 'subjects': ' Physics,maths , physics',
+            'description': 'Hello', 'available_days': 'Mon',
+        })
+        self.assertEqual(response.status_code, 201)
+        profile = TutorProfile.objects.get(user__email='new@example.com')
+        self.assertEqual(sorted(s.name for s in profile.canonical_subjects.all()), ['maths', 'physics'])
+
+    def test_blank_subjects_are_rejected(self):
+        response = APIClient().post('/api/register/student/', {
+            'email': 's@example.com', 'password': 'pass12345', 'full_name': 'S',
+            'class_name': '9', 'required_subjects': ' , ', 'location': 'Kochi',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('required_subjects', response.data)
+
+
+class MatchingTests(TestCase):
+    def setUp(self):
+        self.student = make_student('student@example.com', required_subjects='Maths, Physics')
+        self.both = make_tutor('both@example.com', subjects='Maths, Physics')
+        self.one = make_tutor('one@example.com', subjects='Physics', location='Delhi')
+        make_tutor('none@example.com', subjects='History', location='Delhi')
+
+    def test_parse_days(self):
+        self.assertEqual(parse_days('Mon, Wed'), 0b0000101)
+        self.assertEqual(parse_days('Monday to Friday'), 0b0011111)
+        self.assertEqual(parse_days('Sat-Mon'), 0b1100001)
+        self.assertEqual(parse_days('weekends'), 0b1100000)
+        self.assertEqual(parse_days(''), 0)
+
+    def test_student_dashboard_is_ranked_by_score(self):
+        response = client_for(self.student).get('/api/student/dashboard/tutors/')
+        self.assertEqual(response.status_code, 200)
+        emails = [row['email'] for row in response.data['results']]
+        self.assertEqual(emails, ['both@example.com', 'one@example.com'])
+        scores = [row['match_score'] for row in response.data['results']]
+        self.assertGreater(scores[0], scores[1])
+
+    def test_tutor_dashboard_reads_matches(self):
+        response = client_for(self.one).get('/api/tutor/dashboard/students/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['email'] for row in response.data], ['student@example.com'])
+
+    def test_review_updates_matches(self):
+        tutor = make_tutor('late@example.com', approved=False, subjects='Maths')
+        self.assertFalse(Match.objects.filter(tutor__user=tutor).exists())
+
+        admin = User.objects.create_superuser('admin@example.com', 'pass12345')
+        client = client_for(admin)
+        client.patch(f'/api/admin/review-user/{tutor.pk}/', {'action': 'approve'})
+        self.assertTrue(Match.objects.filter(tutor__user=tutor, student__user=self.student).exists())
+
+        client.patch(f'/api/admin/review-user/{tutor.pk}/', {'action': 'reject', 'reason': 'Spam'})
+        self.assertFalse(Match.objects.filter(tutor__user=tutor).exists())
+
+    def test_profile_update_rematches(self):
+        profile = self.student.student_profile
+        profile.location = 'Delhi'
+        profile.save()
+        profile.canonical_subjects.set(Subject.objects.resolve('History'))
+        tutors = set(Match.objects.filter(student=profile).values_list('tutor__user__email', flat=True))
+        self.assertEqual(tutors, {'one@example.com', 'none@example.com'})
+
+
+class BulkRematchTests(TestCase):
+    def test_matches_incremental_scores(self):
+        make_student('a@example.com', required_subjects='Maths, Physics')
+        make_student('b@example.com', required_subjects='History', location='Delhi')
+        make_tutor('t1@example.com', subjects='Maths, Physics', available_days='Mon-Fri')
+        make_tutor('t2@example.com', subjects='History', location='Delhi', hourly_rate=Decimal('200.00'))
+        make_tutor('t3@example.com', subjects='History', location='Delhi', hourly_rate=Decimal('100.00'))
+        make_tutor('t4@example.com', subjects='Art', location='Mumbai')
+        incremental = list(Match.objects.order_by('student_id', '-score', 'tutor_id').values_list('student_id', 'tutor_id', 'score'))
+
+        Match.objects.all().delete()
+        call_command('rematch', chunk_size=1, stdout=open('/dev/null', 'w'))
+        bulk = list(Match.objects.order_by('student_id', '-score', 'tutor_id').values_list('student_id', 'tutor_id', 'score'))
+        self.assertEqual(bulk, incremental)
+        self.assertEqual(len(bulk), 3)
+
+    def test_locations_differing_in_whitespace_match(self):
+        student = make_student('a@example.com', required_subjects='History', location='New  York ').student_profile
+        make_tutor('t1@example.com', subjects='Art', location=' new york')
+        self.assertEqual(student.location, 'New York')
+        incremental = list(Match.objects.values_list('student_id', 'tutor_id', 'score'))
+        self.assertEqual(len(incremental), 1)
+
+        Match.objects.all().delete()
+        call_command('rematch', stdout=open('/dev/null', 'w'))
+        self.assertEqual(list(Match.objects.values_list('student_id', 'tutor_id', 'score')), incremental)
+
+    @mock.patch('core.matching.TOP_K', 2)
+    def test_incremental_keeps_top_k_in_any_event_order(self):
+        def table():
+            return list(Match.objects.order_by('student_id', '-score', 'tutor_id')
+                        .values_list('student_id', 'tutor_id', 'score'))
+
+        make_student('early@example.com', required_subjects='Maths, Physics')
+        tutors = [
+            make_tutor('t1@example.com', subjects='Maths', hourly_rate=Decimal('300.00')),
+            make_tutor('t2@example.com', subjects='Maths, Physics', location='Delhi'),
+        ]
+        make_student('late@example.com', required_subjects='Maths', location='Delhi')
+        tutors += [
+            make_tutor('t3@example.com', subjects='Maths', hourly_rate=Decimal('200.00')),
+            make_tutor('t4@example.com', subjects='Maths, Physics', available_days='Mon-Sat'),
+            make_tutor('t5@example.com', subjects='History', location='Delhi'),
+        ]
+        moved = tutors[3].tutor_profile
+        moved.location = 'Delhi'
+        moved.save()
+        slower = tutors[1].tutor_profile
+        slower.available_days = ''
+        slower.save(update_fields=['available_days'])
+        self.assertTrue(all(count <= 2 for count in Match.objects.values('student').annotate(n=Count('id'))
+                            .values_list('n', flat=True)))
+
+        rejected = tutors[3]
+        rejected.is_approved, rejected.is_rejected = False, True
+        rejected.save()
+        refresh_matches_for_user(rejected)
+        incremental = table()
+
+        Match.objects.all().delete()
+        call_command('rematch', top_k=2, chunk_size=1, stdout=open('/dev/null', 'w'))
+        self.assertEqual(table(), incremental)
+        self.assertEqual(len(incremental), 4)
+
+
+class ListingCacheTests(TestCase):
+    url = '/api/admin/tutors/approved/'
+
+    def setUp(self):
+        caches['listings'].clear()
+        self.admin = User.objects.create_superuser('admin@example.com', 'pass12345')
+        make_tutor('t1@example.com')
+
+    def test_repeat_requests_skip_the_database(self):
+        client = client_for(self.admin)
+        first = client.get(self.url)
+        self.assertEqual(len(first.data), 1)
+        # The token lookup is cached too
+        with self.assertNumQueries(0):
+            second = client.get(self.url)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_tutor_dashboard_is_cached(self):
+        tutor = client_for(User.objects.get(email='t1@example.com'))
+        make_student('student@example.com')
+        first = tutor.get('/api/tutor/dashboard/students/')
+        self.assertEqual(len(first.data), 1)
+        with self.assertNumQueries(0):
+            second = tutor.get('/api/tutor/dashboard/students/')
+        self.assertEqual(second.data, first.data)
+
+    def test_if_none_match_returns_304(self):
+        client = client_for(self.admin)
+        etag = client.get(self.url)['ETag']
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_listings_are_invalidated_on_commit(self):
+        client = client_for(self.admin)
+        client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_tutor('t2@example.com')
+            # Read before the commit: the new row must not be cached as current
+            self.assertEqual(len(client.get(self.url).data), 1)
+        self.assertEqual(len(client.get(self.url).data), 2)
+
+    def test_review_invalidates_listing(self):
+        client = client_for(self.admin)
+        etag = client.get(self.url)['ETag']
+        pending = make_tutor('t2@example.com', approved=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch(f'/api/admin/review-user/{pending.pk}/', {'action': 'approve'})
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+
+def seed_profiles(role, count, start=0, approved=True, rejected=False):
+    """Bulk-create ``count`` users of ``role`` with profiles, skipping password hashing."""
+    prefix = {'student': '7', 'tutor': '8'}[role]
+    users = User.objects.bulk_create([
+        User(email=f'{role}{n}@example.com', mobile_number=f'{prefix}{n:09d}', role=role, password='!',
+             is_approved=approved, is_rejected=rejected)
+        for n in range(start, start + count)
+    ])
+    if role == 'tutor':
+        return TutorProfile.objects.bulk_create([
+            TutorProfile(user=user, full_name=user.email, location='Kochi', qualification='MSc',
+                         experience_years=2, hourly_rate=Decimal('400.00'), subjects='Maths',
+                         description='Tutor', available_days='Mon')
+            for user in users
+        ])
+    return StudentProfile.objects.bulk_create([
+        StudentProfile(user=user, full_name=user.email, class_name='10', required_subjects='Maths', location='Kochi')
+        for user in users
+    ])
+
+
+class ListQueryCountTests(TestCase):
+    """Every list endpoint must run a fixed number of queries, whatever the row count."""
+    sizes = (10, 100, 1000)
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin@example.com', 'pass12345')
+
+    def assertConstantQueries(self, url, user, expected, seed):
+        client = client_for(user)
+        client.get(url)  # warm the token cache
+        seeded = 0
+        for size in self.sizes:
+            seed(seeded, size - seeded)
+            seeded = size
+            caches['listings'].clear()
+            with self.subTest(url=url, rows=size), self.assertNumQueries(expected):
+                response = client.get(url, {'page_size': 100})
+            self.assertEqual(response.status_code, 200)
+
+    def test_admin_student_lists(self):
+        for url, approved, rejected in [
+            ('/api/admin/students/', False, False),
+            ('/api/admin/students/approved/', True, False),
+            ('/api/admin/students/rejected/', False, True),
+        ]:
+            StudentProfile.objects.all().delete()
+            User.objects.filter(role='student').delete()
+            seed = lambda start, count: seed_profiles('student', count, start, approved, rejected)
+            # Just the list query; the token lookup is cached
+            self.assertConstantQueries(url, self.admin, 1, seed)
+
+    def test_admin_tutor_lists(self):
+        for url, approved, rejected in [
+            ('/api/admin/tutors/', False, False),
+            ('/api/admin/tutors/approved/', True, False),
+            ('/api/admin/tutors/rejected/', False, True),
+        ]:
+            TutorProfile.objects.all().delete()
+            User.objects.filter(role='tutor').delete()
+            seed = lambda start, count: seed_profiles('tutor', count, start, approved, rejected)
+            self.assertConstantQueries(url, self.admin, 1, seed)
+
+    def test_student_dashboard_and_search(self):
+        student = make_student('me@example.com')
+        profile = student.student_profile
+
+        def seed(start, count):
+            tutors = seed_profiles('tutor', count, start)
+            Match.objects.bulk_create([Match(student=profile, tutor=tutor, score=1.0) for tutor in tutors])
+
+        self.assertConstantQueries('/api/student/dashboard/tutors/', student, 1, seed)
+        self.assertConstantQueries('/api/student/tutors/search/', student, 1, lambda start, count: None)
+
+    def test_tutor_dashboard(self):
+        tutor = make_tutor('me@example.com')
+        profile = tutor.tutor_profile
+
+        def seed(start, count):
+            students = seed_profiles('student', count, start)
+            Match.objects.bulk_create([Match(student=student, tutor=profile, score=1.0) for student in students])
+
+        self.assertConstantQueries('/api/tutor/dashboard/students/', tutor, 1, seed)
+
+
+class FastSerializerTests(TestCase):
+    def test_values_plan_matches_serializers(self):
+        make_student('s1@example.com')
+        make_tutor('t1@example.com', hourly_rate=Decimal('450.5'))
+        User.objects.filter(email='t1@example.com').update(mobile_number=None)
+        for model, serializer_class in [(StudentProfile, StudentProfileSerializer), (TutorProfile, TutorProfileSerializer)]:
+            queryset = model.objects.for_listing().order_by('id')
+            expected = serializer_class(queryset, many=True).data
+            self.assertEqual(get_values_plan(serializer_class).serialize(queryset), expected)
+
+    def test_admin_list_uses_fast_path(self):
+        admin = User.objects.create_superuser('admin@example.com', 'pass12345')
+        make_tutor('t1@example.com')
+        response = client_for(admin).get('/api/admin/tutors/')
+        self.assertEqual(response.data[0]['hourly_rate'], '500.00')
+        self.assertEqual(response.data[0]['email'], 't1@example.com')
+
+
+class StreamingExportTests(TestCase):
+    url = '/api/admin/tutors/'
+
+    def setUp(self):
+        self.client = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+        seed_profiles('tutor', 3)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        response = self.client.get(self.url, {'export': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([row['email'] for row in rows], [f'tutor{n}@example.com' for n in range(3)])
+
+    def test_json_array_matches_regular_list(self):
+        streamed = json.loads(self.content(self.client.get(self.url, {'export': 'json'})))
+        self.assertEqual(streamed, json.loads(self.client.get(self.url).content))
+
+    def test_csv(self):
+        response = self.client.get('/api/admin/students/', {'export': 'csv'})
+        self.assertIn('students.csv', response['Content-Disposition'])
+        self.assertEqual(self.content(response).splitlines()[0].split(',')[0], 'email')
+
+    def test_csv_gives_each_thumbnail_size_a_column(self):
+        TutorProfile.objects.filter(user__email='tutor0@example.com').update(profile_image_processed='tutors/a.jpg')
+        rows = list(csv.DictReader(io.StringIO(self.content(self.client.get(self.url, {'export': 'csv'})))))
+        self.assertNotIn('profile_image_thumbnails', rows[0])
+        self.assertTrue(rows[0]['profile_image_thumbnails_small'].startswith('/media/tutors/a_small.'))
+        self.assertEqual(rows[1]['profile_image_thumbnails_medium'], '')
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(self.url, {'export': 'xml'}).status_code, 400)
+
+
+class BulkReviewTests(TestCase):
+    url = '/api/admin/review-users/'
+
+    def setUp(self):
+        self.client = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+        make_student('student@example.com')
+        self.tutors = [make_tutor(f't{n}@example.com', approved=False) for n in range(3)]
+
+    def test_approve_ids_with_per_id_results(self):
+        ids = [self.tutors[0].pk, self.tutors[1].pk, 999999]
+        with self.settings(JOBS_EAGER=True), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'ids': ids, 'action': 'approve'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual([r['status'] for r in response.data['results']], ['approved', 'approved', 'not_found'])
+        self.assertEqual(User.objects.filter(role='tutor', is_approved=True).count(), 2)
+        self.assertEqual(Match.objects.filter(tutor__user__in=self.tutors[:2]).count(), 2)
+
+    def test_reject_by_filter(self):
+        response = self.client.post(self.url, {
+            'filter': {'role': 'tutor', 'status': 'pending'}, 'action': 'reject', 'reason': 'Incomplete',
+        }, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(
+            set(User.objects.filter(role='tutor').values_list('rejection_reason', flat=True)), {'Incomplete'}
+        )
+        # Matches are refreshed by a job, not in the request
+        job = Job.objects.get(name='refresh_matches')
+        self.assertEqual(sorted(job.payload['user_ids']), sorted(user.pk for user in self.tutors))
+
+    def test_requires_ids_or_filter(self):
+        response = self.client.post(self.url, {'action': 'approve'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class PendingQueueTests(TestCase):
+    def setUp(self):
+        self.client = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+        seed_profiles('student', 3, approved=False)
+        seed_profiles('tutor', 2, approved=False)
+        seed_profiles('tutor', 1, start=10, approved=True)
+
+    def test_queue_is_keyset_paginated_in_registration_order(self):
+        response = self.client.get('/api/admin/pending/', {'page_size': 4})
+        emails = [row['email'] for row in response.data['results']]
+        self.assertEqual(emails, ['student0@example.com', 'student1@example.com',
+                                  'student2@example.com', 'tutor0@example.com'])
+        self.assertEqual(response.data['results'][0]['full_name'], 'student0@example.com')
+        self.assertEqual(response.data['counts'], {'student': 3, 'tutor': 2})
+
+        following = self.client.get(response.data['next'])
+        self.assertEqual([row['email'] for row in following.data['results']], ['tutor1@example.com'])
+
+    def test_role_filter_and_counts(self):
+        response = self.client.get('/api/admin/pending/', {'role': 'tutor'})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(self.client.get('/api/admin/pending/counts/').data, {'student': 3, 'tutor': 2})
+
+    @skipUnless(connection.vendor == 'sqlite', "checks SQLite query plans")
+    def test_queue_is_read_in_index_order(self):
+        from core.views import PendingUsersListView
+
+        view = PendingUsersListView()
+        for params, index in (({}, 'user_pending_idx'), ({'role': 'tutor'}, 'user_pending_queue_idx')):
+            view.request = mock.Mock(query_params=params)
+            plan = view.get_queryset().order_by('id')[:51].explain()
+            self.assertIn(index, plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_pending_queue_query_count(self):
+        self.client.get('/api/admin/pending/counts/')
+        # Only the page query: the token and the counts are cached
+        with self.assertNumQueries(1):
+            self.client.get('/api/admin/pending/')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    url = '/api/student/tutors/search/'
+
+    def setUp(self):
+        self.student = make_student('student@example.com')
+        self.client = client_for(self.student)
+        token_cache.clear()
+
+    def test_second_request_skips_token_query(self):
+        self.client.get(self.url)
+        caches['listings'].clear()
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_user_save_invalidates(self):
+        self.client.get(self.url)
+        User.objects.filter(pk=self.student.pk).update(is_approved=False)
+        caches['listings'].clear()
+        # update() sends no signal, so the cached user is still approved
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.student.pk).save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_token_delete_invalidates(self):
+        self.client.get(self.url)
+        Token.objects.filter(user=self.student).delete()
+        # QuerySet.delete() still sends post_delete for each token
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    @override_settings(AUTH_TOKEN_TTL=60)
+    def test_expired_token_is_rejected_and_rotated_on_login(self):
+        token = Token.objects.get(user=self.student)
+        Token.objects.filter(pk=token.pk).update(created=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+        response = APIClient().post('/api/login/', {'email': 'student@example.com', 'password': 'pass12345'})
+        self.assertNotEqual(response.data['token'], token.key)
+
+
+class LoginThrottleTests(TestCase):
+    url = '/api/login/'
+
+    def setUp(self):
+        make_student('student@example.com')
+        ip_attempts.clear()
+        email_failures.clear()
+        login_metrics.clear()
+
+    def login(self, password, email='student@example.com', ip='10.0.0.1'):
+        return APIClient().post(self.url, {'email': email, 'password': password}, REMOTE_ADDR=ip)
+
+    def test_failed_attempts_lock_the_email_before_hashing(self):
+        for _ in range(email_failures.limit):
+            self.assertEqual(self.login('wrong').status_code, 400)
+        with mock.patch('core.serializers.authenticate') as authenticate:
+            response = self.login('pass12345', ip='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        authenticate.assert_not_called()
+        self.assertEqual(login_metrics['blocked_email'], 1)
+
+    def test_success_clears_email_failures(self):
+        self.login('wrong')
+        self.assertEqual(self.login('pass12345').status_code, 200)
+        self.assertEqual(email_failures.retry_after('student@example.com'), 0)
+        self.assertEqual(len(email_failures), 0)
+
+    @mock.patch.object(ip_attempts, 'limit', 3)
+    def test_ip_limit_applies_across_emails(self):
+        for n in range(ip_attempts.limit):
+            self.login('wrong', email=f'nobody{n}@example.com')
+        self.assertEqual(self.login('pass12345').status_code, 429)
+        self.assertEqual(self.login('pass12345', ip='10.0.0.9').status_code, 200)
+
+    @mock.patch.object(ip_attempts, 'limit', 3)
+    def test_forwarded_for_cannot_dodge_ip_limit(self):
+        for n in range(ip_attempts.limit):
+            response = APIClient().post(self.url, {'email': f'nobody{n}@example.com', 'password': 'wrong'},
+                                        REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'192.0.2.{n}')
+            self.assertEqual(response.status_code, 400)
+        response = APIClient().post(self.url, {'email': 'student@example.com', 'password': 'pass12345'},
+                                    REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='192.0.2.99')
+        self.assertEqual(response.status_code, 429)
+
+        # Behind one trusted proxy the last forwarded address is the client
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            response = APIClient().post(self.url, {'email': 'student@example.com', 'password': 'pass12345'},
+                                        REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='198.51.100.7, 192.0.2.99')
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_endpoint(self):
+        self.login('wrong')
+        client = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+        metrics = client.get('/api/admin/metrics/login/').data
+        self.assertEqual((metrics['attempts'], metrics['failed']), (1, 1))
+
+
+def image_upload(name='photo.jpg', size=(3000, 1000)):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+    def register_student(self):
+        return APIClient().post('/api/register/student/', {
+            'email': 'new@example.com', 'password': 'pass12345', 'full_name': 'New Student',
+            'class_name': '9', 'required_subjects': 'Maths', 'location': 'Kochi',
+            'profile_photo': image_upload(),
+        }, format='multipart')
+
+    def test_registration_enqueues_jobs(self):
+        with self.settings(MEDIA_ROOT=self.media_root):
+            response = self.register_student()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(Job.objects.filter(status='pending').values_list('name', flat=True)),
+            ['notify_admins_of_registration', 'process_profile_image'],
+        )
+
+    def test_worker_processes_profile_image(self):
+        from PIL import Image
+
+        with self.settings(MEDIA_ROOT=self.media_root):
+            self.register_student()
+            call_command('run_jobs', once=True, stdout=io.StringIO())
+            photo = StudentProfile.objects.get(user__email='new@example.com').profile_photo
+            with Image.open(photo.path) as image:
+                self.assertEqual(image.size, (2048, 683))
+        self.assertEqual(Job.objects.filter(status='done').count(), 2)
+
+    def test_failures_are_retried_with_backoff(self):
+        calls = []
+
+        @jobs.job('flaky')
+        def flaky():
+            calls.append(1)
+            raise RuntimeError('boom')
+
+        self.addCleanup(jobs.handlers.pop, 'flaky')
+        queued = jobs.enqueue('flaky')
+        self.assertEqual(jobs.run_pending(), (0, 1))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('pending', 1))
+        self.assertIn('RuntimeError', queued.last_error)
+        self.assertGreater(queued.run_after, timezone.now())
+        # Not due yet
+        self.assertEqual(jobs.run_pending(), (0, 0))
+
+    def test_stale_jobs_are_reclaimed_until_out_of_attempts(self):
+        given_up = []
+
+        @jobs.job('crashy', on_failure=lambda **payload: given_up.append(payload))
+        def crashy(**payload):
+            pass
+
+        self.addCleanup(jobs.handlers.pop, 'crashy')
+        self.addCleanup(jobs.failure_handlers.pop, 'crashy')
+        long_ago = timezone.now() - jobs.STALE_AFTER - timedelta(seconds=1)
+        retried = Job.objects.create(name='crashy', status='running', attempts=1, locked_at=long_ago)
+        exhausted = Job.objects.create(
+            name='crashy', payload={'upload': 'x.csv'}, status='running', attempts=5, locked_at=long_ago,
+        )
+        alive = Job.objects.create(name='crashy', status='running', attempts=1, locked_at=timezone.now())
+        self.assertEqual([queued.pk for queued in jobs.claim_jobs(10)], [retried.pk])
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, 'failed')
+        self.assertEqual(given_up, [{'upload': 'x.csv'}])
+        alive.refresh_from_db()
+        self.assertEqual(alive.attempts, 1)
+
+    def test_heartbeat_keeps_claimed_jobs_fresh(self):
+        long_ago = timezone.now() - jobs.STALE_AFTER - timedelta(seconds=1)
+        running, finished = (Job.objects.create(name='crashy', status='running', locked_at=long_ago) for _ in range(2))
+        heartbeat = jobs.Heartbeat([running.pk, finished.pk])
+        heartbeat.finished(finished.pk)
+        heartbeat.beat()
+        self.assertGreater(Job.objects.get(pk=running.pk).locked_at, long_ago)
+        self.assertEqual(Job.objects.get(pk=finished.pk).locked_at, long_ago)
+        self.assertEqual([queued.pk for queued in jobs.claim_jobs(10)], [finished.pk])
+
+    def test_registration_is_atomic(self):
+        with mock.patch('core.views.enqueue_registration_jobs', side_effect=RuntimeError('queue down')):
+            with self.assertRaises(RuntimeError), self.settings(MEDIA_ROOT=self.media_root):
+                self.register_student()
+        self.assertFalse(User.objects.filter(email='new@example.com').exists())
+        self.assertFalse(Token.objects.exists())
+
+
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+    def test_thumbnails_are_generated_and_exposed(self):
+        from PIL import Image
+
+        with self.settings(MEDIA_ROOT=self.media_root):
+            tutor = make_tutor('t1@example.com', profile_image=image_upload('face.jpg', (800, 600)))
+            name = tutor.tutor_profile.profile_image.name
+            admin = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+            # No links to thumbnails that have not been written yet
+            self.assertIsNone(admin.get('/api/admin/tutors/').data[0]['profile_image_thumbnails'])
+            jobs.enqueue('process_profile_image', model='TutorProfile', pk=tutor.tutor_profile.pk, field='profile_image')
+            jobs.run_pending()
+            row = admin.get('/api/admin/tutors/').data[0]
+
+        urls = row['profile_image_thumbnails']
+        self.assertEqual(set(urls), {'small', 'medium'})
+        self.assertTrue(urls['small'].startswith('/media/tutors/face'))
+        with Image.open(f"{self.media_root}/{name.rsplit('.', 1)[0]}_small.webp") as small:
+            self.assertEqual(max(small.size), 96)
+            self.assertNotIn('exif', small.info)
+
+    @override_settings(IMAGE_PROCESS_WORKERS=2)
+    def test_worker_renders_claimed_images_together(self):
+        with self.settings(MEDIA_ROOT=self.media_root):
+            good = make_tutor('t1@example.com', profile_image=image_upload('face.jpg', (800, 600))).tutor_profile
+            broken = make_tutor('t2@example.com', profile_image=SimpleUploadedFile('bad.jpg', b'not an image'))
+            broken = broken.tutor_profile
+            for profile in (good, broken):
+                jobs.enqueue('process_profile_image', model='TutorProfile', pk=profile.pk, field='profile_image')
+            with mock.patch('core.tasks.render_images', wraps=render_images) as render:
+                self.assertEqual(jobs.run_pending(), (1, 1))
+        render.assert_called_once()
+        self.assertEqual(len(render.call_args.args[0]), 2)
+        good.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual(good.profile_image_processed, good.profile_image.name)
+        self.assertEqual(broken.profile_image_processed, '')
+        failed = Job.objects.get(payload__pk=broken.pk)
+        self.assertEqual((failed.status, failed.attempts), ('pending', 1))
+        self.assertIn('UnidentifiedImageError', failed.last_error)
+
+    def test_retries_do_not_re_encode_the_original(self):
+        path = f'{self.media_root}/large.jpg'
+        with open(path, 'wb') as handle:
+            handle.write(image_upload(size=(3000, 1000)).read())
+        self.assertIn(path, render_image(path))
+        with open(path, 'rb') as handle:
+            first = handle.read()
+        self.assertNotIn(path, render_image(path))
+        with open(path, 'rb') as handle:
+            self.assertEqual(handle.read(), first)
+
+    def test_no_image_serializes_as_null(self):
+        make_tutor('t1@example.com')
+        admin = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+        self.assertIsNone(admin.get('/api/admin/tutors/').data[0]['profile_image_thumbnails'])
+
+
+class AsyncViewTests(TestCase):
+    """The native async views return what their DRF counterparts return."""
+
+    def setUp(self):
+        token_cache.clear()
+        caches['listings'].clear()
+        self.admin = User.objects.create_superuser('admin@example.com', 'pass12345')
+        self.student = make_student('student@example.com', required_subjects='Maths')
+        self.tutor = make_tutor('t1@example.com', subjects='Maths')
+        make_tutor('t2@example.com', subjects='Maths', location='Delhi', approved=False)
+
+    def get(self, user, url, **params):
+        token, _ = Token.objects.get_or_create(user=user)
+        return self.client.get(url, params, HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_admin_lists_match_drf(self):
+        for url in ('admin/tutors/', 'admin/students/', 'admin/tutors/approved/', 'admin/students/rejected/'):
+            expected = self.get(self.admin, f'/api/{url}').json()
+            self.assertEqual(self.get(self.admin, f'/api/async/{url}').json(), expected)
+
+    def test_dashboards_match_drf(self):
+        expected = self.get(self.tutor, '/api/tutor/dashboard/students/').json()
+        self.assertEqual(len(expected), 1)
+        self.assertEqual(self.get(self.tutor, '/api/async/tutor/dashboard/students/').json(), expected)
+        expected = self.get(self.student, '/api/student/dashboard/tutors/').json()['results']
+        self.assertEqual(self.get(self.student, '/api/async/student/dashboard/tutors/').json(), expected)
+
+    def test_permissions(self):
+        self.assertEqual(self.client.get('/api/async/admin/tutors/').status_code, 401)
+        self.assertEqual(self.get(self.student, '/api/async/admin/tutors/').status_code, 403)
+        self.assertEqual(self.get(self.student, '/api/async/tutor/dashboard/students/').status_code, 403)
+        response = self.get(self.student, '/api/async/student/dashboard/tutors/', min_rate='abc')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def route(self, method, view):
+        """The alias reads would use while ``view`` handles a ``method`` request."""
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return ReplicaRouter().db_for_read(User)
+
+        middleware = ReplicaReadMiddleware(get_response)
+        return middleware(RequestFactory().generic(method, '/'))
+
+    def test_list_reads_go_to_replicas(self):
+        from core import async_views, views
+
+        self.assertEqual(self.route('GET', views.AdminTutorListView.as_view()), 'replica_0')
+        self.assertEqual(self.route('GET', views.TutorDashboardStudentsView.as_view()), 'replica_0')
+        self.assertEqual(self.route('GET', async_views.admin_tutors), 'replica_0')
+        self.assertFalse(use_replica.get())
+
+    def test_writes_and_other_views_use_primary(self):
+        from core import views
+
+        self.assertEqual(self.route('POST', views.AdminTutorListView.as_view()), 'default')
+        self.assertEqual(self.route('GET', views.LoginMetricsView.as_view()), 'default')
+        self.assertEqual(ReplicaRouter().db_for_write(User), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        from core import views
+
+        self.assertEqual(self.route('GET', views.AdminTutorListView.as_view()), 'default')
+
+
+@skipUnless(connection.vendor == 'sqlite', "SQLite backend only")
+class SQLiteBackendTests(TestCase):
+    def test_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_journal_mode_is_only_switched_once(self):
+        from django.db.backends.sqlite3 import base as sqlite3_base
+        from core.backends.sqlite_wal.base import DatabaseWrapper
+
+        statements = []
+        connect = sqlite3_base.DatabaseWrapper.get_new_connection
+
+        def traced(self, conn_params):
+            conn = connect(self, conn_params)
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(sqlite3_base.DatabaseWrapper, 'get_new_connection', traced):
+            for _ in range(2):
+                wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': f'{directory}/db.sqlite3'})
+                wrapper.ensure_connection()
+                wrapper.close()
+        self.assertEqual(statements.count('PRAGMA journal_mode = WAL'), 1)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        token_cache.clear()
+        caches['listings'].clear()
+        self.admin = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+        seed_profiles('tutor', 3)
+
+    def test_requests_are_recorded_per_view(self):
+        self.admin.get('/api/admin/tutors/')
+        self.admin.get('/api/admin/tutors/')
+        text = self.admin.get('/api/admin/metrics/').content.decode()
+
+        labels = 'endpoint="core.views.AdminTutorListView",method="GET"'
+        self.assertIn(f'tutor_requests_total{{{labels},status="200"}} 2', text)
+        self.assertIn(f'tutor_request_duration_seconds_count{{{labels}}} 2', text)
+        # The first request also looked up the token
+        self.assertIn(f'tutor_db_queries_bucket{{{labels},le="1"}} 1', text)
+        self.assertIn(f'tutor_db_queries_sum{{{labels}}} 3', text)
+        self.assertIn(f'tutor_serialization_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'tutor_response_size_bytes_count{{{labels}}} 2', text)
+        self.assertIn('tutor_token_cache_lookups_total{result="hit"}', text)
+
+    def test_metrics_require_admin(self):
+        student = client_for(make_student('student@example.com'))
+        self.assertEqual(student.get('/api/admin/metrics/').status_code, 403)
+
+    @override_settings(SLOW_REQUEST_LOG={'THRESHOLD': 0, 'MAX_QUERIES': 5})
+    def test_slow_requests_are_logged_with_sql(self):
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            self.admin.get('/api/admin/tutors/')
+        self.assertIn('core.views.AdminTutorListView', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], PASSWORD_HASH_WORKERS=0)
+class BulkImportTests(TestCase):
+    header = 'email,mobile_number,password,full_name,class_name,required_subjects,location\n'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        make_student('taken@example.com')
+
+    def test_command_imports_rows_and_reports_errors(self):
+        rows = [
+            'a@example.com,7000000001,pass-a-123,Student A,10,"Maths, Physics",Kochi',
+            'b@example.com,7000000002,pass-b-123,,10,Maths,Kochi',
+            'taken@example.com,7000000003,pass-c-123,Student C,10,Maths,Kochi',
+            'd@example.com,7000000001,pass-d-123,Student D,10,Maths,Kochi',
+            'e@example.com,,pass-e-123,Student E,9,Chemistry,Delhi',
+        ]
+        source, report = f'{self.directory}/students.csv', f'{self.directory}/errors.jsonl'
+        with open(source, 'w') as handle:
+            handle.write(self.header + '\n'.join(rows) + '\n')
+
+        call_command('import_users', source, role='student', report=report, batch_size=2, stdout=io.StringIO())
+
+        imported = User.objects.filter(email__in=['a@example.com', 'e@example.com'])
+        self.assertEqual(imported.count(), 2)
+        student = imported.get(email='a@example.com')
+        self.assertTrue(student.check_password('pass-a-123'))
+        self.assertFalse(student.is_approved)
+        self.assertTrue(Token.objects.filter(user=student).exists())
+        self.assertEqual(
+            sorted(student.student_profile.canonical_subjects.values_list('name', flat=True)), ['maths', 'physics']
+        )
+        with open(report) as handle:
+            errors = [json.loads(line) for line in handle]
+        self.assertEqual([error['line'] for error in errors], [3, 4, 5])
+        self.assertIn('full_name', errors[0]['errors'])
+        self.assertIn('email', errors[1]['errors'])
+        self.assertIn('mobile_number', errors[2]['errors'])
+
+    @override_settings(PASSWORD_HASH_WORKERS=2)
+    def test_process_pool_hashing(self):
+        from django.contrib.auth.hashers import check_password
+
+        hashes = hash_passwords(['first-pass', 'second-pass', 'third-pass'])
+        self.assertTrue(check_password('second-pass', hashes[1]))
+
+    def test_api_import_runs_as_a_job(self):
+        admin = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+        rows = [
+            {'email': 'tutor1@example.com', 'password': 'pass-t-123', 'full_name': 'Tutor 1', 'location': 'Kochi',
+             'qualification': 'MSc', 'experience_years': 3, 'hourly_rate': '400.00', 'subjects': 'Maths',
+             'description': 'Tutor', 'available_days': 'Mon'},
+            {'email': 'not-an-email', 'password': 'pass-t-123'},
+        ]
+        upload = SimpleUploadedFile('tutors.jsonl', ''.join(json.dumps(row) + '\n' for row in rows).encode())
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with self.settings(MEDIA_ROOT=media_root, IMPORT_ROOT=self.directory, JOBS_EAGER=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = admin.post('/api/admin/imports/', {'file': upload, 'role': 'tutor'})
+            self.assertEqual(response.status_code, 202)
+            job = admin.get(f"/api/admin/imports/{response.data['id']}/").data
+            report = admin.get(f"/api/admin/imports/{response.data['id']}/report/")
+            errors = [json.loads(line) for line in b''.join(report.streaming_content).splitlines()]
+
+        # The upload is gone and nothing was written where media is served from
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(job['result']['report'])])
+        self.assertEqual(os.listdir(media_root), [])
+
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual((job['result']['created'], job['result']['failed']), (1, 1))
+        self.assertTrue(TutorProfile.objects.filter(user__email='tutor1@example.com').exists())
+        self.assertEqual(errors[0]['line'], 2)
+        self.assertIn('email', errors[0]['errors'])
+
+    def test_upload_is_deleted_when_the_import_fails_for_good(self):
+        admin = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+        upload = SimpleUploadedFile('students.csv', (self.header + 'a@example.com,,pass-a-123,A,10,Maths,Kochi\n').encode())
+        with self.settings(IMPORT_ROOT=self.directory), \
+                mock.patch('core.tasks.import_file', side_effect=RuntimeError('database down')):
+            admin.post('/api/admin/imports/', {'file': upload, 'role': 'student'})
+            self.assertEqual(len(os.listdir(self.directory)), 1)
+            self.assertEqual(jobs.run_pending(), (0, 1))
+            # Kept for the retry
+            self.assertEqual(len(os.listdir(self.directory)), 1)
+            Job.objects.update(run_after=timezone.now(), attempts=F('max_attempts') - 1)
+            self.assertEqual(jobs.run_pending(), (0, 1))
+        self.assertEqual(Job.objects.get().status, 'failed')
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class PasswordResetTests(TestCase):
+    def setUp(self):
+        self.user = make_student('student@example.com')
+        self.client = APIClient()
+
+    def forgot(self):
+        return self.client.post('/api/forgot-password/', {'email': 'student@example.com'}).data['reset_token']
+
+    def reset(self, token, password='new-pass-123'):
+        return self.client.post('/api/reset-password/', {'token': token, 'new_password': password})
+
+    def test_reset_with_token(self):
+        token = self.forgot()
+        self.assertFalse(PasswordResetToken.objects.filter(token_hash=token).exists())
+        self.assertEqual(self.reset(token).status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-pass-123'))
+        # Single use
+        self.assertEqual(self.reset(token).status_code, 400)
+
+    def test_new_token_replaces_old_one(self):
+        first = self.forgot()
+        second = self.forgot()
+        self.assertEqual(self.reset(first).status_code, 400)
+        self.assertEqual(self.reset(second).status_code, 200)
+
+    def test_expired_token_is_refused_and_purged(self):
+        token = self.forgot()
+        PasswordResetToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        other = make_tutor('tutor@example.com').generate_reset_token()
+
+        self.assertEqual(self.reset(token).status_code, 400)
+        call_command('purge_reset_tokens', chunk_size=1, stdout=io.StringIO())
+        self.assertEqual(list(PasswordResetToken.objects.values_list('user__email', flat=True)), ['tutor@example.com'])
+        self.assertIsNotNone(PasswordResetToken.objects.lookup(other))
+
+
+class ProximitySearchTests(TestCase):
+    url = '/api/student/tutors/nearby/'
+
+    def setUp(self):
+        caches['listings'].clear()
+        make_tutor('kochi@example.com', location='Kochi')
+        make_tutor('edappally@example.com', location='Edappally, Kochi')
+        make_tutor('aluva@example.com', location='Aluva', subjects='Physics')
+        make_tutor('thrissur@example.com', location='Thrissur')
+        make_tutor('unknown@example.com', location='Nowhere Town')
+        make_tutor('pending@example.com', location='Kochi', approved=False)
+        self.client = client_for(make_student('student@example.com', location='Cochin'))
+
+    def emails(self, response):
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['email'] for row in response.data]
+
+    def test_profiles_are_geocoded_on_save(self):
+        profile = TutorProfile.objects.get(user__email='edappally@example.com')
+        self.assertEqual((profile.latitude, profile.longitude), geocode('Edappally'))
+        self.assertEqual(profile.geohash, encode_geohash(profile.latitude, profile.longitude))
+        self.assertEqual(TutorProfile.objects.get(user__email='unknown@example.com').geohash, '')
+
+        profile.location = 'Thrissur'
+        profile.save(update_fields=['location'])
+        profile.refresh_from_db()
+        self.assertEqual((profile.latitude, profile.longitude), geocode('Thrissur'))
+
+    def test_geohash_reference_values(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geohash_ranges(['tbz', 'tc0', 'td1']), [('tbz', 'tc1'), ('td1', 'td2')])
+
+    def test_cover_contains_every_point_in_radius(self):
+        for latitude, longitude, radius in [(9.93, 76.27, 10), (0.01, 179.99, 50), (-33.87, 151.21, 3)]:
+            prefixes = covering_prefixes(latitude, longitude, radius)
+            self.assertTrue(prefixes)
+            for bearing in map(math.radians, range(0, 360, 15)):
+                # Points just inside the circle
+                step = 0.99 * radius / 111.2
+                lat = latitude + step * math.cos(bearing)
+                lon = (longitude + step * math.sin(bearing) / math.cos(math.radians(lat)) + 180) % 360 - 180
+                if haversine_km(latitude, longitude, lat, lon) <= radius:
+                    self.assertTrue(encode_geohash(lat, lon).startswith(tuple(prefixes)), (lat, lon))
+
+    def test_nearest_first_within_radius(self):
+        response = self.client.get(self.url, {'radius': 25})
+        self.assertEqual(self.emails(response), ['kochi@example.com', 'edappally@example.com', 'aluva@example.com'])
+        self.assertEqual(response.data[0]['distance_km'], 0)
+        self.assertAlmostEqual(
+            response.data[2]['distance_km'], haversine_km(*geocode('Kochi'), *geocode('Aluva')), places=2
+        )
+
+        self.assertEqual(len(self.emails(self.client.get(self.url, {'radius': 100}))), 4)
+        self.assertEqual(self.emails(self.client.get(self.url, {'radius': 25, 'subject': 'physics'})),
+                         ['aluva@example.com'])
+        self.assertEqual(self.emails(self.client.get(self.url, {'near': 'Trichur', 'radius': 5})),
+                         ['thrissur@example.com'])
+        lat, lon = geocode('Aluva')
+        self.assertEqual(self.emails(self.client.get(self.url, {'lat': lat, 'lon': lon, 'radius': 1})),
+                         ['aluva@example.com'])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'radius': 500}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'near': 'Atlantis'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'lat': 10}).status_code, 400)
+        homeless = client_for(make_student('homeless@example.com', location='Nowhere Town'))
+        self.assertEqual(homeless.get(self.url).status_code, 400)
+
+    def test_geocode_locations_command(self):
+        TutorProfile.objects.update(latitude=None, longitude=None, geohash='')
+        call_command('geocode_locations', chunk_size=2, stdout=io.StringIO())
+        self.assertEqual(TutorProfile.objects.exclude(geohash='').count(), 5)
+
+
+class FullTextSearchTests(TestCase):
+    url = '/api/student/tutors/search/text/'
+
+    def setUp(self):
+        caches['listings'].clear()
+        make_tutor('iit@example.com', qualification='BTech, IIT Madras',
+                   description='IIT graduate offering JEE coaching in physics and maths.')
+        make_tutor('jee@example.com', qualification='MSc Physics', description='Coached JEE aspirants for 5 years.')
+        make_tutor('neet@example.com', qualification='MBBS', description='NEET biology <b>coaching</b>.')
+        make_tutor('pending@example.com', qualification='IIT', description='JEE coaching', approved=False)
+        self.client = client_for(make_student('student@example.com'))
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def emails(self, response):
+        return [row['email'] for row in response.data]
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite keeps the index with triggers")
+    def test_index_triggers_survive_migrations(self):
+        # A later migration that rebuilds core_tutorprofile drops them silently
+        fts = importlib.import_module('core.migrations.0015_tutor_fulltext_index')
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'core_tutorprofile'")
+            triggers = {row[0] for row in cursor.fetchall()}
+        self.assertTrue(set(fts.SQLITE_TRIGGERS) <= triggers, triggers)
+
+    def test_parse_query(self):
+        self.assertEqual(parse_query('IIT "JEE coaching" -- c++'), [('iit',), ('jee', 'coaching'), ('c',)])
+
+    def test_ranked_results_with_snippets(self):
+        response = self.search('JEE coaching')
+        self.assertEqual(sorted(self.emails(response)), ['iit@example.com', 'jee@example.com'])
+        self.assertGreaterEqual(response.data[0]['search_rank'], response.data[1]['search_rank'])
+        self.assertIn('<mark>JEE</mark>', response.data[0]['snippet'])
+
+        # All terms must match; stemming matches "coaching" to "Coached"
+        self.assertEqual(self.emails(self.search('IIT graduate JEE coaching')), ['iit@example.com'])
+        self.assertEqual(self.emails(self.search('"JEE coaching"')), ['iit@example.com'])
+        everyone = self.emails(self.search('coaching'))
+        self.assertEqual(len(everyone), 3)
+        self.assertEqual(self.emails(self.search('coaching', limit=1, offset=2)), everyone[2:])
+        self.assertEqual(self.emails(self.search('jee', experience_years=3, gender='male')), [])
+
+    def test_snippets_are_escaped(self):
+        snippet = self.search('biology').data[0]['snippet']
+        self.assertIn('&lt;b&gt;', snippet)
+        self.assertIn('<mark>biology</mark>', snippet)
+
+    def test_index_follows_saves_and_deletes(self):
+        profile = TutorProfile.objects.get(user__email='neet@example.com')
+        profile.description = 'Chemistry olympiad training'
+        profile.save()
+        self.assertEqual(self.emails(self.search('olympiad')), ['neet@example.com'])
+        self.assertEqual(self.emails(self.search('biology')), [])
+
+        User.objects.filter(email='iit@example.com').delete()
+        self.assertEqual(self.emails(self.search('jee')), ['jee@example.com'])
+
+    def test_empty_query_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'q': '  '}).status_code, 400)
+        self.assertEqual(self.search('!!!').data, [])
+
+
+class BookingTests(TestCase):
+    def setUp(self):
+        caches['listings'].clear()
+        self.tutor = make_tutor('tutor@example.com')
+        self.busy = make_tutor('busy@example.com')
+        make_tutor('never@example.com')
+        self.student = make_student('student@example.com')
+        self.tutor_client, self.student_client = client_for(self.tutor), client_for(self.student)
+        evenings = {'slots': [{'day': 'tue', 'start': '17:00', 'end': '20:00'},
+                              {'day': 'thu', 'start': '09:00', 'end': '12:30'}]}
+        self.assertEqual(self.tutor_client.put('/api/tutor/availability/', evenings, format='json').status_code, 200)
+        client_for(self.busy).put('/api/tutor/availability/', evenings, format='json')
+
+        today = timezone.localdate()
+        self.tuesday = today + timedelta(days=(1 - today.weekday()) % 7 or 7)
+
+    def at(self, hhmm, day=None):
+        hours, minutes = map(int, hhmm.split(':'))
+        return timezone.make_aware(
+            timezone.datetime.combine(day or self.tuesday, timezone.datetime.min.time())
+        ) + timedelta(hours=hours, minutes=minutes)
+
+    def book(self, start, end, tutor=None, client=None):
+        tutor = tutor or self.tutor
+        return (client or self.student_client).post('/api/bookings/', {
+            'tutor': tutor.tutor_profile.pk, 'start': self.at(start).isoformat(), 'end': self.at(end).isoformat(),
+        })
+
+    def test_slots_round_trip(self):
+        slots = [{'day': 'mon', 'start': '00:00', 'end': '01:00'}, {'day': 'mon', 'start': '01:00', 'end': '02:30'},
+                 {'day': 'sun', 'start': '23:30', 'end': '24:00'}]
+        self.assertEqual(decode_slots(encode_slots(slots)), [
+            {'day': 'mon', 'start': '00:00', 'end': '02:30'}, {'day': 'sun', 'start': '23:30', 'end': '24:00'},
+        ])
+        response = self.tutor_client.get('/api/tutor/availability/')
+        self.assertEqual(response.data['slots'][0], {'day': 'tue', 'start': '17:00', 'end': '20:00'})
+        self.assertEqual(TutorProfile.objects.get(user=self.tutor).available_days, 'Tue, Thu')
+
+        bad = {'slots': [{'day': 'tue', 'start': '17:15', 'end': '18:00'}]}
+        self.assertEqual(self.tutor_client.put('/api/tutor/availability/', bad, format='json').status_code, 400)
+        self.assertEqual(self.student_client.get('/api/tutor/availability/').status_code, 403)
+
+    def test_booking_and_conflicts(self):
+        response = self.book('17:00', '18:30')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['status'], 'confirmed')
+
+        # Overlaps the tutor's session
+        other = client_for(make_student('other@example.com'))
+        self.assertEqual(self.book('18:00', '19:00', client=other).status_code, 409)
+        # Back to back is fine
+        self.assertEqual(self.book('18:30', '19:30', client=other).status_code, 201)
+        # The student is busy, whichever tutor they ask
+        self.assertEqual(self.book('17:30', '18:00', tutor=self.busy).status_code, 409)
+        # Outside availability, off the slot grid, too long
+        self.assertEqual(self.book('19:30', '20:30', tutor=self.busy).status_code, 400)
+        self.assertEqual(self.book('19:15', '19:45', tutor=self.busy).status_code, 400)
+        self.assertEqual(self.book('09:00', '14:00', tutor=self.busy).status_code, 400)
+        self.assertEqual(self.book('17:00', '18:00', client=self.tutor_client).status_code, 403)
+
+        listed = self.tutor_client.get('/api/bookings/')
+        self.assertEqual([row['student_name'] for row in listed.data['results']],
+                         ['student@example.com', 'other@example.com'])
+
+        booking = Booking.objects.get(student__user=self.student)
+        self.assertEqual(other.post(f'/api/bookings/{booking.pk}/cancel/').status_code, 404)
+        self.assertEqual(self.student_client.post(f'/api/bookings/{booking.pk}/cancel/').data['status'], 'cancelled')
+        self.assertEqual(self.book('17:30', '18:00', tutor=self.busy).status_code, 201)
+
+    def test_conflict_check_is_one_indexed_query(self):
+        self.book('17:00', '18:00')
+        other = make_student('other@example.com').student_profile
+        with CaptureQueriesContext(connection) as queries, self.assertRaises(BookingConflict):
+            book(other, self.tutor.tutor_profile, self.at('17:30'), self.at('18:30'))
+        self.assertEqual(len([query for query in queries if 'FROM "core_booking"' in query['sql']]), 1)
+
+        plan = Booking.objects.overlapping(self.at('17:00'), self.at('18:00')).filter(
+            Q(tutor_id=1) | Q(student_id=1)
+        ).explain()
+        self.assertIn('booking_tutor_start_idx', plan)
+        self.assertIn('booking_student_start_idx', plan)
+
+    def test_availability_filter(self):
+        url = '/api/student/tutors/search/'
+
+        def emails(**params):
+            response = self.student_client.get(url, params)
+            self.assertEqual(response.status_code, 200, response.data)
+            return sorted(row['email'] for row in response.data['results'])
+
+        self.assertEqual(emails(free_day='tuesday', free_from='17:00', free_to='19:00'),
+                         ['busy@example.com', 'tutor@example.com'])
+        self.assertEqual(emails(free_day='tue', free_from='19:00', free_to='21:00'), [])
+        self.assertEqual(emails(free_day='thu'), [])
+        self.assertEqual(self.student_client.get(url, {'free_day': 'someday'}).status_code, 400)
+
+        self.book('18:00', '19:00', tutor=self.busy)
+        window = {'free_date': self.tuesday.isoformat(), 'free_from': '17:00', 'free_to': '18:30'}
+        self.assertEqual(emails(**window), ['tutor@example.com'])
+        self.assertEqual(emails(free_date=self.tuesday.isoformat(), free_from='19:00', free_to='20:00'),
+                         ['busy@example.com', 'tutor@example.com'])
+
+    def test_search_results_carry_the_id_to_book(self):
+        window = {'free_day': 'tue', 'free_from': '17:00', 'free_to': '18:00'}
+        rows = self.student_client.get('/api/student/tutors/search/', window).data['results']
+        tutor_id = next(row['id'] for row in rows if row['email'] == 'tutor@example.com')
+        self.assertEqual(tutor_id, self.tutor.tutor_profile.pk)
+        response = self.student_client.post('/api/bookings/', {
+            'tutor': tutor_id, 'start': self.at('17:00').isoformat(), 'end': self.at('18:00').isoformat(),
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+
+        # Admin lists keep their fields
+        admin = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+        self.assertNotIn('id', admin.get('/api/admin/tutors/').data[0])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ResponseFormatTests(TestCase):
+    def setUp(self):
+        caches['listings'].clear()
+        self.admin = client_for(User.objects.create_superuser('admin@example.com', 'pass12345'))
+        for number in range(20):
+            make_tutor(f't{number}@example.com')
+
+    def test_orjson_matches_drf_json(self):
+        data = {
+            'when': timezone.now(), 'day': date(2024, 5, 1), 'rate': Decimal('450.50'), 'label': gettext_lazy('Tutor'),
+            'id': uuid.uuid4(), 'pair': (1, 2.5), 3: None, 'text': 'line\u2028break ünïcode',
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(data, 'application/json; indent=4'),
+                         JSONRenderer().render(data, 'application/json; indent=4'))
+
+    def test_gzip_above_threshold(self):
+        plain = self.admin.get('/api/admin/tutors/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        compressed = self.admin.get('/api/admin/tutors/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertLess(len(compressed.content), len(plain.content) / 4)
+
+        refused = self.admin.get('/api/admin/tutors/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(refused.has_header('Content-Encoding'))
+        with override_settings(RESPONSE_COMPRESSION={'MIN_SIZE': len(plain.content) + 1}):
+            small = self.admin.get('/api/admin/tutors/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+        self.assertEqual(accepted_encodings('br;q=0.5, gzip;q=0, *'), {'br', '*'})
+
+    @skipUnless(msgpack, "msgpack is not installed")
+    def test_msgpack_negotiation(self):
+        expected = self.admin.get('/api/admin/tutors/').json()
+        response = self.admin.get('/api/admin/tutors/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], MessagePackRenderer.media_type)
+        self.assertEqual(msgpack.unpackb(response.content), expected)
@@ -0,0 +1,130 @@
+"""Login throttling backed by in-process sliding-window counters.
+
+The throttles run in APIView.initial(), before LoginSerializer calls
+authenticate(), so a throttled request never pays for a password hash.
+Every attempt counts against the client IP; only failed attempts count
+against the email address, and a successful login clears them. The IP is
+DRF's get_ident(), so REST_FRAMEWORK['NUM_PROXIES'] must match the number of
+trusted proxies; otherwise X-Forwarded-For would let one client rotate IPs.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_LOGIN_THROTTLE = {
+    'IP_LIMIT': 30,
+    'EMAIL_LIMIT': 5,
+    'WINDOW': 300,
+    'MAX_KEYS': 100000,
+}
+
+
+class SlidingWindowCounter:
+    """Timestamps of recent events per key, bounded in keys (LRU) and events."""
+
+    def __init__(self, limit, window, max_keys):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+
+    def retry_after(self, key, now=None):
+        """Seconds until ``key`` is under the limit again, or 0 if it already is."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            events = self._events.get(key)
+            if events is None or len(events) < self.limit:
+                return 0
+            return max(0.0, events[0] + self.window - now)
+
+    def hit(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                events = self._events[key] = deque(maxlen=self.limit)
+                if len(self._events) > self.max_keys:
+                    self._events.popitem(last=False)
+            else:
+                self._events.move_to_end(key)
+            while events and events[0] <= now - self.window:
+                events.popleft()
+            events.append(now)
+
+    def reset(self, key):
+        with self._lock:
+            self._events.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def __len__(self):
+        return len(self._events)
+
+
+def _build_counters():
+    options = {**DEFAULT_LOGIN_THROTTLE, **getattr(settings, 'LOGIN_THROTTLE', {})}
+    return (
+        SlidingWindowCounter(options['IP_LIMIT'], options['WINDOW'], options['MAX_KEYS']),
+        SlidingWindowCounter(options['EMAIL_LIMIT'], options['WINDOW'], options['MAX_KEYS']),
+    )
+
+
+ip_attempts, email_failures = _build_counters()
+login_metrics = Counter()
+
+
+def login_email(data):
+    """The normalized email of a login payload, or '' when there is none."""
+    return str(data.get('email', '')).strip().lower() if hasattr(data, 'get') else ''
+
+
+def record_login_result(data, succeeded):
+    email = login_email(data)
+    if succeeded:
+        login_metrics['succeeded'] += 1
+        email_failures.reset(email)
+    else:
+        login_metrics['failed'] += 1
+        email_failures.hit(email)
+
+
+def login_throttle_metrics():
+    return {
+        **{name: login_metrics[name] for name in ('attempts', 'succeeded', 'failed', 'blocked_ip', 'blocked_email')},
+        'tracked_ips': len(ip_attempts),
+        'tracked_emails': len(email_failures),
+    }
+
+
+class LoginIPThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        login_metrics['attempts'] += 1
+        ip = self.get_ident(request)
+        self._wait = ip_attempts.retry_after(ip)
+        if self._wait:
+            login_metrics['blocked_ip'] += 1
+            return False
+        ip_attempts.hit(ip)
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class LoginEmailThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        email = login_email(request.data)
+        self._wait = email_failures.retry_after(email) if email else 0
+        if self._wait:
+            login_metrics['blocked_email'] += 1
+            return False
+        return True
+
+    def wait(self):
+        return self._wait
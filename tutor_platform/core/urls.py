@@ -1,4 +1,5 @@
 from django.urls import path
+from . import async_views
 from .views import *
 
 urlpatterns = [
@@ -7,9 +8,17 @@ urlpatterns = [
 
     #api for login for both student and tutors
     path('login/', LoginView.as_view()),
+    path('admin/metrics/login/', LoginMetricsView.as_view()),
+    path('admin/metrics/', MetricsView.as_view()),
     
     #api for admin approval
     path('admin/review-user/<int:pk>/', ReviewUserView.as_view()),
+    path('admin/review-users/', BulkReviewUserView.as_view()),
+
+    #bulk registration import from CSV/JSONL
+    path('admin/imports/', BulkImportView.as_view()),
+    path('admin/imports/<int:pk>/', ImportJobView.as_view()),
+    path('admin/imports/<int:pk>/report/', ImportReportView.as_view()),
 
     #api for reset password
     path('forgot-password/', ForgotPasswordView.as_view()),
@@ -26,8 +35,31 @@ urlpatterns = [
     path('admin/tutors/approved/', ApprovedTutorsListView.as_view()),
     path('admin/tutors/rejected/', RejectedTutorsListView.as_view()),
 
+    #queue of users awaiting review
+    path('admin/pending/', PendingUsersListView.as_view()),
+    path('admin/pending/counts/', PendingUserCountsView.as_view()),
+
     #tutor and student dashboard views 
      path('tutor/dashboard/students/', TutorDashboardStudentsView.as_view()),
      path('student/dashboard/tutors/', StudentDashboardTutorsView.as_view()),
+     path('student/tutors/search/', TutorSearchView.as_view()),
+     path('student/tutors/nearby/', NearbyTutorsView.as_view()),
+     path('student/tutors/search/text/', TutorTextSearchView.as_view()),
+
+    #weekly availability and session booking
+    path('tutor/availability/', TutorAvailabilityView.as_view()),
+    path('bookings/', BookingListCreateView.as_view()),
+    path('bookings/<int:pk>/cancel/', BookingCancelView.as_view()),
+
+
+    #native async versions of the read-heavy endpoints for ASGI
+    path('async/admin/students/', async_views.admin_students),
+    path('async/admin/tutors/', async_views.admin_tutors),
+    path('async/admin/students/approved/', async_views.approved_students),
+    path('async/admin/students/rejected/', async_views.rejected_students),
+    path('async/admin/tutors/approved/', async_views.approved_tutors),
+    path('async/admin/tutors/rejected/', async_views.rejected_tutors),
+    path('async/tutor/dashboard/students/', async_views.tutor_dashboard_students),
+    path('async/student/dashboard/tutors/', async_views.student_dashboard_tutors),
 
 ]
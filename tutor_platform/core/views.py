@@ -2,12 +2,39 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAdminUser,IsAuthenticated,IsAdminUser
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
 from .serializers import *
-from core.models import User, StudentProfile, TutorProfile
+from core.models import User, StudentProfile, TutorProfile, Match, Job, Booking, approved
+from .authentication import issue_token, token_cache
+from .bookings import BookingConflict, OutsideAvailability, book, get_slots, set_availability
+from .cache import VersionedCacheMixin, bump_listing_version, pending_counts
+from .exports import StreamingExportMixin
+from .fast_serializers import FastListMixin
+from .filters import filter_tutors, parse_proximity
+from .geo import within_radius
+from .imports import detect_format, import_storage
+from .jobs import enqueue
+from .matching import refresh_matches_for_user
+from .metrics import registry
+from .pagination import TutorCursorPagination, MatchCursorPagination, PendingUserCursorPagination, BookingCursorPagination
+from .search import search_tutors
+from .throttling import LoginEmailThrottle, LoginIPThrottle, login_throttle_metrics, record_login_result
 from rest_framework.views import APIView
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.http import FileResponse, HttpResponse
+import uuid
 
 
 
+def enqueue_registration_jobs(profile, image_field):
+    # Image processing and admin mail happen in the job worker, off the request path
+    if getattr(profile, image_field):
+        enqueue('process_profile_image', model=type(profile).__name__, pk=profile.pk, field=image_field)
+    enqueue('notify_admins_of_registration', user_id=profile.user_id)
+
+
 class StudentRegisterView(generics.CreateAPIView):
     serializer_class = StudentRegistrationSerializer
     permission_classes = [AllowAny]  
@@ -15,8 +42,11 @@ class StudentRegisterView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        token, _ = Token.objects.get_or_create(user=user)
+        # One transaction, so the jobs exist exactly when the registration does
+        with transaction.atomic():
+            user = serializer.save()
+            token, _ = Token.objects.get_or_create(user=user)
+            enqueue_registration_jobs(user.student_profile, 'profile_photo')
         return Response({
             "message": "Student registered successfully. Awaiting admin approval.",
             "token": token.key,
@@ -32,8 +62,11 @@ class TutorRegisterView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        token, _ = Token.objects.get_or_create(user=user)
+        # One transaction, so the jobs exist exactly when the registration does
+        with transaction.atomic():
+            user = serializer.save()
+            token, _ = Token.objects.get_or_create(user=user)
+            enqueue_registration_jobs(user.tutor_profile, 'profile_image')
         return Response({
             "message": "Tutor registered successfully. Awaiting admin approval.",
             "token": token.key,
@@ -45,10 +78,15 @@ class TutorRegisterView(generics.CreateAPIView):
 class LoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [AllowAny]  
+    # Checked before the serializer runs, so throttled callers never reach the password hasher
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        valid = serializer.is_valid()
+        record_login_result(request.data, valid)
+        if not valid:
+            raise ValidationError(serializer.errors)
         user = serializer.validated_data['user']
 
         #  Block unapproved users from logging in
@@ -58,7 +96,7 @@ class LoginView(generics.GenericAPIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_token(user)
         return Response({
             'token': token.key,
             'role': user.role,
@@ -91,7 +129,10 @@ class ReviewUserView(generics.UpdateAPIView):
             return Response({"error": "Invalid action. Use 'approve' or 'reject'."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        user.save()
+        # One transaction, so listings are invalidated once the new matches are in
+        with transaction.atomic():
+            user.save()
+            refresh_matches_for_user(user)
         return Response({
             "message": msg,
             "is_approved": user.is_approved,
@@ -99,6 +140,103 @@ class ReviewUserView(generics.UpdateAPIView):
             "rejection_reason": user.rejection_reason
         })
 
+
+# Users rematched per refresh_matches job after a bulk review
+REMATCH_JOB_SIZE = 500
+
+
+class BulkReviewUserView(generics.GenericAPIView):
+    serializer_class = BulkReviewSerializer
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data['action']
+
+        if action == 'approve':
+            changes = {'is_approved': True, 'is_rejected': False, 'rejection_reason': ''}
+            outcome = 'approved'
+        else:
+            reason = serializer.validated_data.get('reason') or 'No reason provided'
+            changes = {'is_approved': False, 'is_rejected': True, 'rejection_reason': reason}
+            outcome = 'rejected'
+
+        with transaction.atomic():
+            requested = serializer.get_user_ids()
+            found = set(User.objects.select_for_update().filter(pk__in=requested).values_list('pk', flat=True))
+            updated = User.objects.filter(pk__in=found).update(**changes)
+
+            # update() sends no signals, so refresh derived state explicitly
+            reviewed = list(found)
+            for pk in reviewed:
+                token_cache.invalidate_user(pk)
+            transaction.on_commit(bump_listing_version)
+            # Rematching costs a few queries per user, so it runs in the job worker
+            for start in range(0, len(reviewed), REMATCH_JOB_SIZE):
+                enqueue('refresh_matches', user_ids=reviewed[start:start + REMATCH_JOB_SIZE])
+
+        return Response({
+            "action": action,
+            "updated": updated,
+            "results": [
+                {"id": pk, "status": outcome if pk in found else "not_found"}
+                for pk in requested
+            ],
+        })
+
+
+class BulkImportView(generics.GenericAPIView):
+    serializer_class = BulkImportSerializer
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        file_format = serializer.validated_data.get('format') or detect_format(upload.name)
+
+        # Parsing, hashing and inserting thousands of rows happens in the job worker
+        stored = import_storage().save(f'{uuid.uuid4().hex}.{file_format}', upload)
+        queued = enqueue(
+            'import_users', upload=stored, role=serializer.validated_data['role'], file_format=file_format,
+            batch_size=serializer.validated_data['batch_size'],
+        )
+        return Response(ImportJobSerializer(queued).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ImportJobView(generics.RetrieveAPIView):
+    queryset = Job.objects.filter(name='import_users')
+    serializer_class = ImportJobSerializer
+    permission_classes = [IsAdminUser]
+
+
+class ImportReportView(generics.GenericAPIView):
+    queryset = Job.objects.filter(name='import_users', status='done')
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        report = (self.get_object().result or {}).get('report')
+        if not report:
+            return Response({"detail": "This import rejected no rows."}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(import_storage().open(report, 'rb'), as_attachment=True,
+                            filename=f'import-{pk}-errors.jsonl', content_type='application/x-ndjson')
+
+
+class LoginMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(login_throttle_metrics())
+
+
+class MetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 class ForgotPasswordView(generics.GenericAPIView):
     serializer_class = ForgotPasswordSerializer
     permission_classes = [AllowAny]
@@ -125,58 +263,96 @@ class ResetPasswordView(generics.GenericAPIView):
     
 
 
-class AdminStudentListView(generics.ListAPIView):
-    queryset = StudentProfile.objects.select_related('user').all()
+class AdminStudentListView(StreamingExportMixin, FastListMixin, generics.ListAPIView):
+    queryset = StudentProfile.objects.for_listing()
     serializer_class = StudentProfileSerializer
     permission_classes = [IsAdminUser]
+    export_filename = 'students'
 
 
-class AdminTutorListView(generics.ListAPIView):
-    queryset = TutorProfile.objects.select_related('user').all()
+class AdminTutorListView(StreamingExportMixin, FastListMixin, generics.ListAPIView):
+    queryset = TutorProfile.objects.for_listing()
     serializer_class = TutorProfileSerializer
     permission_classes = [IsAdminUser]
+    export_filename = 'tutors'
 
 
 
-class ApprovedStudentsListView(generics.ListAPIView):
+class ApprovedStudentsListView(VersionedCacheMixin, FastListMixin, generics.ListAPIView):
     serializer_class = StudentProfileSerializer
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
-        return StudentProfile.objects.select_related('user').filter(user__is_approved=True, user__is_rejected=False)
+        return StudentProfile.objects.for_listing().filter(approved('user__'))
 
 
-class RejectedStudentsListView(generics.ListAPIView):
+class RejectedStudentsListView(FastListMixin, generics.ListAPIView):
     serializer_class = StudentProfileSerializer
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
-        return StudentProfile.objects.select_related('user').filter(user__is_rejected=True)
+        return StudentProfile.objects.for_listing().filter(user__is_rejected=True)
 
 
-class ApprovedTutorsListView(generics.ListAPIView):
+class ApprovedTutorsListView(VersionedCacheMixin, FastListMixin, generics.ListAPIView):
     serializer_class = TutorProfileSerializer
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
-        return TutorProfile.objects.select_related('user').filter(user__is_approved=True, user__is_rejected=False)
+        return TutorProfile.objects.for_listing().filter(approved('user__'))
 
 
-class RejectedTutorsListView(generics.ListAPIView):
+class RejectedTutorsListView(FastListMixin, generics.ListAPIView):
     serializer_class = TutorProfileSerializer
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
-        return TutorProfile.objects.select_related('user').filter(user__is_rejected=True)
+        return TutorProfile.objects.for_listing().filter(user__is_rejected=True)
 
 
 
 
 
-class TutorDashboardStudentsView(APIView):
-    permission_classes = [IsAuthenticated]
+class PendingUsersListView(generics.ListAPIView):
+    serializer_class = PendingUserSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = PendingUserCursorPagination
+
+    def get_queryset(self):
+        # Served by the partial indexes on users awaiting review: (role, id)
+        # for one role, (id) for both. A role__in filter would make SQLite
+        # search (role, id) once per role and sort, so admins are excluded instead.
+        users = User.objects.filter(is_approved=False, is_rejected=False).select_related(
+            'student_profile', 'tutor_profile'
+        )
+        role = self.request.query_params.get('role')
+        if role in ('student', 'tutor'):
+            return users.filter(role=role)
+        return users.exclude(role='admin')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data['counts'] = pending_counts()
+        return response
+
+
+class PendingUserCountsView(APIView):
+    permission_classes = [IsAdminUser]
 
     def get(self, request):
+        return Response(pending_counts())
+
+
+
+
+
+class TutorDashboardStudentsView(VersionedCacheMixin, generics.ListAPIView):
+    permission_classes = [IsAuthenticated]
+    cache_per_user = True
+    default_limit = 50
+    max_limit = 200
+
+    def list(self, request):
         user = request.user
 
         # Check tutor role
@@ -187,17 +363,35 @@ class TutorDashboardStudentsView(APIView):
         if not user.is_approved:
             return Response({"error": "Your account is not approved yet"}, status=status.HTTP_403_FORBIDDEN)
 
-        # ✅ Get all approved students
-        students = StudentProfile.objects.filter(user__is_approved=True)
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.max_limit))
+
+        # ✅ Top matched students, read from the precomputed match index
+        matches = (
+            Match.objects.filter(tutor__user=user)
+            .with_students()
+            .order_by('-score', 'id')[:limit]
+        )
 
-        serializer = StudentProfileSerializer(students, many=True)
+        serializer = MatchedStudentSerializer(matches, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 
-class StudentDashboardTutorsView(APIView):
+class TutorSearchView(VersionedCacheMixin, generics.ListAPIView):
+    serializer_class = BookableTutorSerializer
     permission_classes = [IsAuthenticated]
+    cache_per_user = True
+    pagination_class = TutorCursorPagination
 
-    def get(self, request):
+    def get_queryset(self):
+        # Matches the (is_approved, is_rejected, role) index on User
+        tutors = TutorProfile.objects.for_listing().filter(approved('user__'), user__role='tutor')
+        return filter_tutors(tutors, self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
         user = request.user
 
         # ✅ Check if student
@@ -208,8 +402,137 @@ class StudentDashboardTutorsView(APIView):
         if not user.is_approved:
             return Response({"error": "Your account is not approved yet"}, status=status.HTTP_403_FORBIDDEN)
 
-        # ✅ Fetch all approved tutors
-        tutors = TutorProfile.objects.filter(user__is_approved=True)
+        return super().list(request, *args, **kwargs)
 
-        serializer = TutorProfileSerializer(tutors, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class StudentDashboardTutorsView(TutorSearchView):
+    serializer_class = MatchedTutorSerializer
+    pagination_class = MatchCursorPagination
+
+    def get_queryset(self):
+        # ✅ Matched tutors, best score first, from the precomputed match index
+        matches = Match.objects.filter(student__user=self.request.user).with_tutors()
+        return filter_tutors(matches, self.request.query_params, prefix='tutor__')
+
+
+class NearbyTutorsView(TutorSearchView):
+    """Approved tutors within ``radius`` km, nearest first.
+
+    Distances are measured from ``lat``/``lon``, else from the place named by
+    ``near``, else from the student's own geocoded location. The other tutor
+    search filters apply too.
+    """
+    serializer_class = NearbyTutorSerializer
+    pagination_class = None
+    default_radius = 10
+    max_radius = 100
+    default_limit = 50
+    max_limit = 200
+
+    def get_queryset(self):
+        params = self.request.query_params
+        latitude, longitude, radius = parse_proximity(
+            params, getattr(self.request.user, 'student_profile', None), self.default_radius, self.max_radius
+        )
+        try:
+            limit = int(params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({'limit': "limit must be an integer"})
+        limit = max(1, min(limit, self.max_limit))
+        return within_radius(super().get_queryset(), latitude, longitude, radius)[:limit]
+
+
+class TutorTextSearchView(TutorSearchView):
+    """Approved tutors whose qualification or description matches ``q``, best match first.
+
+    Pages with ``limit`` and ``offset``; the other tutor search filters apply too.
+    """
+    serializer_class = TutorTextSearchSerializer
+    pagination_class = None
+    default_limit = 20
+    max_limit = 100
+
+    def get_queryset(self):
+        params = self.request.query_params
+        text = params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': "Enter something to search for."})
+        try:
+            limit = int(params.get('limit', self.default_limit))
+            offset = int(params.get('offset', 0))
+        except ValueError:
+            raise ValidationError({'limit': "limit and offset must be integers"})
+        limit = max(1, min(limit, self.max_limit))
+        return search_tutors(super().get_queryset(), text, limit, max(0, offset))
+
+
+class TutorAvailabilityView(generics.GenericAPIView):
+    serializer_class = AvailabilitySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_tutor(self):
+        if self.request.user.role != 'tutor':
+            return None
+        return TutorProfile.objects.filter(user=self.request.user).first()
+
+    def get(self, request):
+        tutor = self.get_tutor()
+        if tutor is None:
+            return Response({"error": "Only tutors can access this endpoint"}, status=status.HTTP_403_FORBIDDEN)
+        return Response({"slots": get_slots(tutor)})
+
+    def put(self, request):
+        tutor = self.get_tutor()
+        if tutor is None:
+            return Response({"error": "Only tutors can access this endpoint"}, status=status.HTTP_403_FORBIDDEN)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({"slots": set_availability(tutor, serializer.validated_data['slots'])})
+
+
+class BookingListCreateView(generics.ListCreateAPIView):
+    """Upcoming sessions of the requesting student or tutor; students book new ones with POST."""
+    serializer_class = BookingSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = BookingCursorPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        bookings = Booking.objects.select_related('tutor', 'student').filter(end__gt=timezone.now())
+        if user.role == 'tutor':
+            return bookings.filter(tutor__user=user)
+        return bookings.filter(student__user=user)
+
+    def create(self, request, *args, **kwargs):
+        user = request.user
+        if user.role != 'student':
+            return Response({"error": "Only students can book sessions"}, status=status.HTTP_403_FORBIDDEN)
+        if not user.is_approved:
+            return Response({"error": "Your account is not approved yet"}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            booking = book(user.student_profile, data['tutor'], data['start'], data['end'])
+        except OutsideAvailability as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except BookingConflict as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(booking).data, status=status.HTTP_201_CREATED)
+
+
+class BookingCancelView(generics.GenericAPIView):
+    serializer_class = BookingSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        return Booking.objects.filter(Q(tutor__user=user) | Q(student__user=user))
+
+    def post(self, request, pk):
+        booking = self.get_object()
+        if booking.status != 'cancelled':
+            booking.status = 'cancelled'
+            booking.save(update_fields=['status'])
+        return Response(self.get_serializer(booking).data)
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,19 +47,34 @@ INSTALLED_APPS = [
 
 AUTH_USER_MODEL = 'core.User'
 
+# Responses are JSON rendered with orjson (core/renderers.py), or MessagePack
+# for clients that send "Accept: application/msgpack" when msgpack is installed.
+# NUM_PROXIES is the number of trusted reverse proxies in front of the app:
+# throttles identify clients by REMOTE_ADDR when it is 0, and otherwise by the
+# address that many entries from the end of X-Forwarded-For. Never leave it
+# unset (None), since DRF would then trust a client-supplied X-Forwarded-For.
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        *(['core.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
 }
 
 
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.routers.ReplicaReadMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,12 +105,147 @@ WSGI_APPLICATION = 'tutor_platform.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Configured from the environment. DB_ENGINE=postgresql selects PostgreSQL
+# (psycopg 3); anything else keeps SQLite through core.backends.sqlite_wal,
+# in WAL mode so readers do not block behind the writer. DB_CONN_MAX_AGE
+# keeps connections open between requests under WSGI; under ASGI use
+# DB_POOL=1 (PostgreSQL only) instead, since persistent connections are not
+# reused across async requests. DB_REPLICA_HOSTS is a comma-separated list of
+# read replicas, used for list endpoints by core.routers.ReplicaRouter.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+DB_POOL = os.environ.get('DB_POOL', '').lower() in ('1', 'true', 'yes')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'tutor_platform'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # The pool manages connection reuse itself, so it needs CONN_MAX_AGE = 0
+            'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+                },
+            } if DB_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            # WAL mode and tuned pragmas, see core/backends/sqlite_wal/base.py
+            'ENGINE': 'core.backends.sqlite_wal',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pragmas': {
+                    'busy_timeout': int(os.environ.get('DB_BUSY_TIMEOUT', '5000')),
+                },
+                # IMMEDIATE takes the write lock when a transaction starts, so
+                # read-then-write transactions wait instead of failing; set
+                # DB_SQLITE_TRANSACTION_MODE to an empty string for DEFERRED
+                'transaction_mode': os.environ.get('DB_SQLITE_TRANSACTION_MODE', 'IMMEDIATE') or None,
+            },
+            # Set DB_TEST_NAME to a file path to run the tests against an
+            # on-disk WAL database instead of an in-memory one
+            'TEST': {
+                'NAME': os.environ.get('DB_TEST_NAME'),
+            },
+        }
+    }
+
+DATABASE_REPLICAS = []
+for number, host in enumerate(host.strip() for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',')):
+    if host and DB_ENGINE == 'postgresql':
+        alias = f'replica_{number}'
+        DATABASES[alias] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+        DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
 
-DATABASES = {
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The "listings" cache holds rendered listing data keyed by a version counter
+# (see core/cache.py). LocMemCache evicts least-recently-used entries once
+# MAX_ENTRIES is reached; with several worker processes, point it at a shared
+# backend so version bumps reach every worker.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'listings': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'listings',
+        'TIMEOUT': 600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 2000,
+        },
+    },
+}
+
+
+# Token authentication: cached token -> user lookups (core/authentication.py)
+# and an optional token lifetime in seconds; expired tokens are rotated on login.
+
+AUTH_TOKEN_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,
+}
+
+AUTH_TOKEN_TTL = None
+
+# Seconds a password reset token stays valid; expired tokens are refused at
+# lookup and removed by "manage.py purge_reset_tokens".
+PASSWORD_RESET_TOKEN_TTL = 3600
+
+
+# Login throttling (core/throttling.py): attempts per client IP and failed
+# attempts per email allowed within a sliding WINDOW of seconds.
+
+LOGIN_THROTTLE = {
+    'IP_LIMIT': 30,
+    'EMAIL_LIMIT': 5,
+    'WINDOW': 300,
+}
+
+
+# Background jobs (core/jobs.py) are run by "manage.py run_jobs". Set
+# JOBS_EAGER to run them in-process right after the request commits instead.
+
+JOBS_EAGER = False
+
+
+# Request metrics (core/metrics.py), served in the Prometheus text format at
+# /api/admin/metrics/. Requests slower than SLOW_REQUEST_LOG['THRESHOLD']
+# seconds are logged to "core.metrics" with up to MAX_QUERIES of their SQL
+# statements; None turns the log off.
+
+SLOW_REQUEST_LOG = {
+    'THRESHOLD': None,
+    'MAX_QUERIES': 50,
+}
+
+
+# Response compression (core.middleware.CompressionMiddleware): brotli when
+# the client accepts it and the brotli package is installed, gzip otherwise,
+# for bodies of at least MIN_SIZE bytes whose content type starts with one of
+# CONTENT_TYPES. Request metrics record the compressed size.
+
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 4,
+    'CONTENT_TYPES': ['application/json', 'application/msgpack', 'text/'],
 }
 
 
@@ -133,6 +285,30 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded profile images
+
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Processes used to render profile thumbnails (core/images.py); a job worker
+# renders every image it claimed at once. None means one per CPU, 0 renders
+# inline in the job worker.
+IMAGE_PROCESS_WORKERS = None
+
+# Uploaded bulk import files and their error reports (core/imports.py). They
+# contain passwords, so they live outside MEDIA_ROOT and are never served;
+# reports are downloaded through the admin imports API only.
+IMPORT_ROOT = BASE_DIR / 'private' / 'imports'
+
+# Processes used to hash passwords during bulk imports (core/imports.py);
+# None means one per CPU, 0 hashes inline.
+PASSWORD_HASH_WORKERS = None
+
+# Places that profile locations are geocoded against (core/geo.py): a CSV of
+# name,latitude,longitude rows. Run "manage.py geocode_locations" after
+# pointing this at a larger file.
+GAZETTEER_PATH = BASE_DIR / 'core' / 'data' / 'gazetteer.csv'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 